@@ -1,31 +1,147 @@
 # -*- coding: UTF-8 -*-
 
-""" SUDOKU SOLVING METHODS """
+""" SUDOKU SOLVING METHODS
+
+    CLASS DEFINITIONS:
+        Als - named tuple: Almost Locked Set (see IMPORTANT DATA STRUCTURES)
+        Rcc - named tuple: common candidates of two ALS'es (see IMPORTANT DATA STRUCTURES)
+        AlsIndex - ALS'es of the board with per-digit and per-cell lookup tables and RCC table
+
+    IMPORTANT DATA STRUCTURES:
+        Als(candidates, cells, cells_mask, digits, digit_cells, digit_peers):
+            candidates - {candidate: {cell, ...}, ...} - cells of the ALS with the candidate
+            cells - frozenset of the ALS cells, cells_mask - their 81-bit mask (see geometry.py)
+            digits - 9-bit mask of the ALS candidates (see bit_board.py)
+            digit_cells - {candidate: mask of the ALS cells with the candidate, ...}
+            digit_peers - {candidate: mask of cells seeing all the ALS cells with the candidate, ...}
+        Rcc(common, restricted, common_peers) - entry of the RCC table for a pair of ALS'es A and B:
+            common - set of common candidates of A and B
+            restricted - set of restricted common candidates: all the cells of A with the candidate
+                see all the cells of B with it (so the candidate is in A or in B, not in both)
+            common_peers - {common candidate: mask of cells seeing all cells of A and B with the candidate}
+
+    The ALS index is shared by all ALS strategies. It is kept per house and on update only ALS'es
+    of the houses changed since the previous update (as per the solver status change journal)
+    are searched for again. The RCC table of the index is filled on demand: each pair of ALS'es
+    is evaluated at most once per index update, whichever strategy asks for it first
+"""
 
 from itertools import combinations
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+
+from utils import CELLS_IN_ROW, CELLS_IN_COL, CELLS_IN_BOX
+from utils import get_stats, eliminate_options
+from bit_board import ALL_DIGITS_MASK, digits_to_mask, mask_to_digits, popcount
+from geometry import ALL_CELLS_MASK, PEERS_MASK, cells_mask, mask_cells
+
+Als = namedtuple("Als", ["candidates", "cells", "cells_mask", "digits", "digit_cells", "digit_peers"])
+Rcc = namedtuple("Rcc", ["common", "restricted", "common_peers"])
+
+_HOUSES = CELLS_IN_ROW + CELLS_IN_COL + CELLS_IN_BOX    # in the order of house ids
+_MAX_ALS_SIZE = 7
+
+
+def _get_als(cells, board):
+    candidates = defaultdict(set)
+    for cell in cells:
+        for candidate in board[cell]:
+            candidates[candidate].add(cell)
+    digit_cells = {candidate: cells_mask(candidate_cells) for candidate, candidate_cells in candidates.items()}
+    digit_peers = {}
+    for candidate, candidate_cells in candidates.items():
+        peers = ALL_CELLS_MASK
+        for cell in candidate_cells:
+            peers &= PEERS_MASK[cell]
+        digit_peers[candidate] = peers
+    return Als(dict(candidates), frozenset(cells), cells_mask(cells), digits_to_mask("".join(board[cell] for cell in cells)),
+               digit_cells, digit_peers)
+
+
+def _get_house_alses(house, board):
+    """ return lists of ALS'es of the house by size (1 - 7 cells), each list in the order of
+    itertools.combinations() of the house unsolved cells
+    The subsets are extended cell by cell with a running mask of their candidates: a subset having
+    more candidates than the largest ALS possible in the house is not extended
+    """
+    unsolved = tuple({cell for cell in house if len(board[cell]) > 1})
+    max_size = min(_MAX_ALS_SIZE, len(unsolved) - 2)
+    alses = [[] for _ in range(_MAX_ALS_SIZE + 1)]
+    masks = [digits_to_mask(board[cell]) for cell in unsolved]
+
+    def _extend(start, cells, digits):
+        size = len(cells) + 1
+        for idx in range(start, len(unsolved)):
+            subset_digits = digits | masks[idx]
+            n_digits = popcount(subset_digits)
+            if n_digits > max_size + 1:
+                continue
+            subset = cells + (unsolved[idx], )
+            if n_digits == size + 1:
+                alses[size].append(subset)
+            if size < max_size:
+                _extend(idx + 1, subset, subset_digits)
+
+    if max_size > 0:
+        _extend(0, (), 0)
+    return [[_get_als(cells, board) for cells in size_alses] for size_alses in alses]
 
-from utils import ALL_NBRS
-from utils import get_stats, get_subsets, eliminate_options
 
+class AlsIndex:
+    """ Almost Locked Sets of the board (in the order of itertools.combinations() of the houses cells, duplicates removed)
+    with lookup tables of the ALS'es by candidate and by cell """
 
-def _get_restricted_commons(als_a, als_b, common_values):
-    x_values = set()
-    for x in common_values:
-        for cell in als_a[x]:
-            if als_b[x].intersection(ALL_NBRS[cell]) != als_b[x]:
-                break
-        else:
-            x_values.add(x)
-    return x_values
+    def __init__(self):
+        self.journal = None
+        self.stamp = -1
+        self.house_alses = [None] * 27
+        self.alses = []
+        self.by_digit = {}
+        self.by_cell = []
+        self.rcc_table = {}
 
+    def update(self, solver_status, board):
+        """ bring the index up to date with the board, return the index """
+        journal = solver_status.journal
+        if journal is self.journal and journal.counter == self.stamp:
+            return self
+        for house_id, house in enumerate(_HOUSES):
+            if journal is not self.journal or journal.house_stamps[house_id] > self.stamp:
+                self.house_alses[house_id] = _get_house_alses(house, board)
+        self.journal = journal
+        self.stamp = journal.counter
 
-def _get_common_neighbours(cells_a, cells_b, impacted_cells):
-    common_neighbours = impacted_cells
-    for cell_a in cells_a:
-        for cell_b in cells_b:
-            common_neighbours = common_neighbours.intersection(ALL_NBRS[cell_a]).intersection(ALL_NBRS[cell_b])
-    return common_neighbours
+        self.alses = []
+        self.by_digit = defaultdict(list)
+        self.by_cell = [[] for _ in range(81)]
+        self.rcc_table = {}
+        seen = set()
+        for size in range(1, _MAX_ALS_SIZE + 1):
+            for house_alses in self.house_alses:
+                for als in house_alses[size]:
+                    if als.cells_mask not in seen:
+                        seen.add(als.cells_mask)
+                        als_id = len(self.alses)
+                        self.alses.append(als)
+                        for candidate in als.candidates:
+                            self.by_digit[candidate].append(als_id)
+                        for cell in als.cells:
+                            self.by_cell[cell].append(als_id)
+        return self
+
+    def rcc(self, id_a, id_b):
+        """ return Rcc entry of the ALS'es (see IMPORTANT DATA STRUCTURES) """
+        key = (id_a, id_b)
+        if key not in self.rcc_table:
+            als_a = self.alses[id_a]
+            als_b = self.alses[id_b]
+            common = set(als_a.candidates).intersection(als_b.candidates)
+            restricted = {x for x in common if not als_b.digit_cells[x] & ~als_a.digit_peers[x]}
+            self.rcc_table[key] = Rcc(common, restricted,
+                                      {x: als_a.digit_peers[x] & als_b.digit_peers[x] for x in common})
+        return self.rcc_table[key]
+
+
+_als_index = AlsIndex()
 
 
 def _get_c_chain(als_a=None, als_b=None, als_c=None, x=None, y=None, z=None):
@@ -38,9 +154,8 @@ def _get_c_chain(als_a=None, als_b=None, als_c=None, x=None, y=None, z=None):
     color_z = 'yellow'
     for als, chain in als_es:
         if als:
-            cells = {cell for candidate in als for cell in als[candidate]}
-            for cell in cells:
-                for candidate in als:
+            for cell in als.cells:
+                for candidate in als.candidates:
                     if als != als_c and candidate == x:
                         chain[cell].add((candidate, color_x))
                     elif (als != als_b or not als_c) and candidate == y:
@@ -52,86 +167,43 @@ def _get_c_chain(als_a=None, als_b=None, als_c=None, x=None, y=None, z=None):
     return chain_a, chain_b, chain_c
 
 
-def _get_alses(board):
-    alses = []
-    for n in range(1, 8):
-        n_alses = []
-        for _, als in get_subsets(board, n, als=True):
-            if als not in n_alses:
-                n_alses.append(als)
-        alses.extend(n_alses)
-    return alses
-
-
-def _get_alses_with_restricted_common(stem, candidate, alses):
-    connected_alses = []
-    stem_neighbours = ALL_NBRS[stem]
-    for als in alses:
-        if candidate in als and als[candidate].intersection(stem_neighbours) == als[candidate]:
-            connected_alses.append(als)
-    return connected_alses
-
-
-def _check_if_overlap(als_a, als_b):
-    cells_a = {cell for candidate in als_a for cell in als_a[candidate]}
-    cells_b = {cell for candidate in als_b for cell in als_b[candidate]}
-    return bool(cells_a.intersection(cells_b))
-
-
-def _select_2_petals(all_petals, stem_candidates):
-    for petal_1 in all_petals[stem_candidates[0]]:
-        cells_1 = {cell for candidate in petal_1 for cell in petal_1[candidate]}
-        for petal_2 in all_petals[stem_candidates[1]]:
-            cells_2 = {cell for candidate in petal_2 for cell in petal_2[candidate]}
-            blossom_cells = cells_1.union(cells_2)
-            petals_lengths = len(cells_1) + len(cells_2)
-            if len(blossom_cells) == petals_lengths:
-                possible_candidates = set(petal_1).intersection(petal_2)
-                possible_candidates = possible_candidates.difference(stem_candidates)
-                blossom = {}
-                for candidate in possible_candidates:
-                    blossom[candidate] = petal_1[candidate].union(petal_2[candidate])
-                yield blossom
-
-
-def _select_3_petals(all_petals, stem_candidates):
-    for petal_1 in all_petals[stem_candidates[0]]:
-        cells_1 = {cell for candidate in petal_1 for cell in petal_1[candidate]}
-        for petal_2 in all_petals[stem_candidates[1]]:
-            cells_2 = {cell for candidate in petal_2 for cell in petal_2[candidate]}
-            for petal_3 in all_petals[stem_candidates[2]]:
-                cells_3 = {cell for candidate in petal_3 for cell in petal_3[candidate]}
-                blossom_cells = cells_1.union(cells_2).union(cells_3)
-                petals_lengths = len(cells_1) + len(cells_2) + len(cells_3)
-                if len(blossom_cells) == petals_lengths:
-                    possible_candidates = set(petal_1).intersection(petal_2).intersection(petal_3)
-                    possible_candidates = possible_candidates.difference(stem_candidates)
-                    blossom = {}
-                    for candidate in possible_candidates:
-                        blossom[candidate] = petal_1[candidate].union(petal_2[candidate]).union(petal_3[candidate])
-                    yield blossom
-
-
-def _select_4_petals(all_petals, stem_candidates):
-    for petal_1 in all_petals[stem_candidates[0]]:
-        cells_1 = {cell for candidate in petal_1 for cell in petal_1[candidate]}
-        for petal_2 in all_petals[stem_candidates[1]]:
-            cells_2 = {cell for candidate in petal_2 for cell in petal_2[candidate]}
-            for petal_3 in all_petals[stem_candidates[2]]:
-                cells_3 = {cell for candidate in petal_3 for cell in petal_3[candidate]}
-                for petal_4 in all_petals[stem_candidates[3]]:
-                    cells_4 = {cell for candidate in petal_4 for cell in petal_4[candidate]}
-                    blossom_cells = cells_1.union(cells_2).union(cells_3).union(cells_4)
-                    petals_lengths = len(cells_1) + len(cells_2) + len(cells_3) + len(cells_4)
-                    if len(blossom_cells) == petals_lengths:
-                        possible_candidates = set(petal_1).intersection(petal_2).intersection(
-                            petal_3).intersection(petal_4)
-                        possible_candidates = possible_candidates.difference(stem_candidates)
-                        blossom = {}
-                        for candidate in possible_candidates:
-                            blossom[candidate] = petal_1[candidate].union(petal_2[candidate]).union(
-                                petal_3[candidate]).union(petal_4[candidate])
-                        yield blossom
+def _get_alses_with_restricted_common(stem, candidate, index):
+    """ return ALS'es with the candidate only in cells seeing the stem cell """
+    stem_peers = PEERS_MASK[stem]
+    return [index.alses[als_id] for als_id in index.by_digit.get(candidate, ())
+            if not index.alses[als_id].digit_cells[candidate] & ~stem_peers]
+
+
+def _select_petals(all_petals, stem_candidates):
+    """ generator of death blossoms: disjoint petals (ALS'es), one for each stem candidate,
+    having common candidates other than the stem candidates
+    Yields: mask of the blossom cells,
+     {common candidate: mask of cells seeing all the blossom cells with the candidate, ...}
+    The stem candidates with fewer petals are branched on first. The cells and common candidates
+    of the petals are accumulated as masks, so a branch is cut as soon as a petal overlaps
+    the ones selected so far or no common candidate is left
+    """
+    order = sorted(stem_candidates, key=lambda candidate: len(all_petals[candidate]))
+    petals = []
+
+    def _extend(depth, cells, common):
+        if depth == len(order):
+            common_peers = {}
+            for candidate in mask_to_digits(common):
+                peers = ALL_CELLS_MASK
+                for petal in petals:
+                    peers &= petal.digit_peers[candidate]
+                common_peers[candidate] = peers
+            yield cells, common_peers
+            return
+        for petal in all_petals[order[depth]]:
+            if petal.cells_mask & cells or not petal.digits & common:
+                continue
+            petals.append(petal)
+            yield from _extend(depth + 1, cells | petal.cells_mask, common & petal.digits)
+            petals.pop()
+
+    yield from _extend(0, 0, ALL_DIGITS_MASK & ~digits_to_mask(stem_candidates))
 
 
 @get_stats
@@ -147,25 +219,30 @@ def als_xz(solver_status, board, window):
     giving us the chance to eliminate the other candidate from outside cells.
     Rating: 300-350
     """
-    als_es = _get_alses(board)
-    for als_a, als_b in combinations(als_es, 2):
-        common_values = set(als_a).intersection(als_b)
-        cells_a = {cell for candidate in als_a for cell in als_a[candidate]}
-        cells_b = {cell for candidate in als_b for cell in als_b[candidate]}
-        impacted_cells = {cell for cell in range(81) if len(board[cell]) > 1}.difference(cells_a).difference(cells_b)
-        if len(common_values) > 1 and impacted_cells:
-            for x in _get_restricted_commons(als_a, als_b, common_values):
-                for z in common_values.difference((x,)):
-                    common_neighbours = _get_common_neighbours(als_a[z], als_b[z], impacted_cells)
+    index = _als_index.update(solver_status, board)
+    alses = index.alses
+    unresolved = cells_mask(cell for cell in range(81) if len(board[cell]) > 1)
+    for id_a, id_b in combinations(range(len(alses)), 2):
+        als_a = alses[id_a]
+        als_b = alses[id_b]
+        if popcount(als_a.digits & als_b.digits) < 2:
+            continue
+        impacted_cells = unresolved & ~(als_a.cells_mask | als_b.cells_mask)
+        if impacted_cells:
+            rcc = index.rcc(id_a, id_b)
+            for x in rcc.restricted:
+                for z in rcc.common.difference((x,)):
+                    common_neighbours = rcc.common_peers[z] & impacted_cells
                     if common_neighbours:
+                        common_neighbours = mask_cells(common_neighbours)
                         to_eliminate = {(z, cell) for cell in common_neighbours if z in board[cell]}
                         if to_eliminate:
                             chain_a, chain_b, _ = _get_c_chain(als_a=als_a, als_b=als_b, x=z, y=x)
                             solver_status.capture_baseline(board, window)
                             eliminate_options(solver_status, board, to_eliminate, window)
                             if window:
-                                window.options_visible = window.options_visible.union(cells_a).union(
-                                    cells_b).union(common_neighbours)
+                                window.options_visible = window.options_visible.union(als_a.cells).union(
+                                    als_b.cells).union(common_neighbours)
                             als_xz.options_removed += len(to_eliminate)
                             als_xz.clues += len(solver_status.naked_singles)
                             return {"solver_tool": "als_xz",
@@ -187,54 +264,59 @@ def als_xy_wing(solver_status, board, window):
     we can eliminate X from any cell that sees all cells belonging to either A or B and having X as a candidate.
     Rating: 320-350
     """
-    als_es = _get_alses(board)
-    als_cells = {}
-    unresolved = {cell for cell in range(81) if len(board[cell]) > 1}
-    for idx_0, idx_1, idx_2 in combinations(range(len(als_es)), 3):
-        common_values = set(als_es[idx_0]).intersection(als_es[idx_1]).intersection(als_es[idx_2])
-        if not common_values:
-            continue
-        if idx_0 not in als_cells:
-            als_cells[idx_0] = {cell for candidate in als_es[idx_0] for cell in als_es[idx_0][candidate]}
-        if idx_1 not in als_cells:
-            als_cells[idx_1] = {cell for candidate in als_es[idx_1] for cell in als_es[idx_1][candidate]}
-        if idx_2 not in als_cells:
-            als_cells[idx_2] = {cell for candidate in als_es[idx_2] for cell in als_es[idx_2][candidate]}
-        for idx_a, idx_b, idx_c in ((idx_0, idx_1, idx_2), (idx_1, idx_2, idx_0), (idx_0, idx_2, idx_1)):
-            als_a = als_es[idx_a]
-            cells_a = als_cells[idx_a]
-            als_b = als_es[idx_b]
-            cells_b = als_cells[idx_b]
-            als_c = als_es[idx_c]
-            cells_c = als_cells[idx_c]
-            impacted_cells = unresolved.difference(cells_a).difference(cells_b)
-            if impacted_cells:
-                for y in _get_restricted_commons(als_a, als_c, set(als_a).intersection(als_c)):
-                    for z in _get_restricted_commons(als_b, als_c, set(als_b).intersection(als_c)):
-                        if y != z:
-                            for x in set(als_a).intersection(als_b).difference({y, z}):
-                                common_neighbours = _get_common_neighbours(als_a[x], als_b[x], impacted_cells)
-                                if common_neighbours:
-                                    to_eliminate = {(x, cell) for cell in common_neighbours if x in board[cell]}
-                                    if to_eliminate:
-                                        chain_a, chain_b, chain_c = _get_c_chain(als_a=als_a, als_b=als_b, als_c=als_c,
-                                                                                 x=x, y=y, z=z)
-                                        impacted_cells = {cell for _, cell in to_eliminate}.difference(
-                                            cells_a).difference(cells_b).difference(cells_c)
-                                        solver_status.capture_baseline(board, window)
-                                        eliminate_options(solver_status, board, to_eliminate, window)
-                                        if window:
-                                            window.options_visible = window.options_visible.union(cells_a).union(
-                                                cells_b).union(cells_c).union(common_neighbours)
-                                        als_xy_wing.options_removed += len(to_eliminate)
-                                        als_xy_wing.clues += len(solver_status.naked_singles)
-                                        return {"solver_tool": "als_xy_wing",
-                                                "chain_a": chain_a,
-                                                "chain_b": chain_b,
-                                                "chain_c": chain_c,
-                                                "eliminate": to_eliminate,
-                                                "impacted_cells": impacted_cells,
-                                                }
+    index = _als_index.update(solver_status, board)
+    alses = index.alses
+    unresolved = cells_mask(cell for cell in range(81) if len(board[cell]) > 1)
+    for idx_0, als_0 in enumerate(alses):
+        for idx_1 in range(idx_0 + 1, len(alses)):
+            digits_01 = als_0.digits & alses[idx_1].digits
+            if not digits_01:
+                continue
+            for idx_2 in range(idx_1 + 1, len(alses)):
+                if digits_01 & alses[idx_2].digits:
+                    kwargs = _find_als_xy_wing(solver_status, board, window, index, unresolved, idx_0, idx_1, idx_2)
+                    if kwargs:
+                        return kwargs
+    return None
+
+
+def _find_als_xy_wing(solver_status, board, window, index, unresolved, idx_0, idx_1, idx_2):
+    """ check the three ALS'es (with a common candidate) in each role of ALS-XY-Wing,
+    return kwargs of the move if an elimination was found """
+    for idx_a, idx_b, idx_c in ((idx_0, idx_1, idx_2), (idx_1, idx_2, idx_0), (idx_0, idx_2, idx_1)):
+        als_a = index.alses[idx_a]
+        als_b = index.alses[idx_b]
+        als_c = index.alses[idx_c]
+        impacted_cells = unresolved & ~(als_a.cells_mask | als_b.cells_mask)
+        if impacted_cells:
+            rcc_ab = index.rcc(idx_a, idx_b)
+            for y in index.rcc(idx_a, idx_c).restricted:
+                for z in index.rcc(idx_b, idx_c).restricted:
+                    if y != z:
+                        for x in rcc_ab.common.difference({y, z}):
+                            common_neighbours = rcc_ab.common_peers[x] & impacted_cells
+                            if common_neighbours:
+                                common_neighbours = mask_cells(common_neighbours)
+                                to_eliminate = {(x, cell) for cell in common_neighbours if x in board[cell]}
+                                if to_eliminate:
+                                    chain_a, chain_b, chain_c = _get_c_chain(als_a=als_a, als_b=als_b, als_c=als_c,
+                                                                             x=x, y=y, z=z)
+                                    impacted = {cell for _, cell in to_eliminate}.difference(
+                                        als_a.cells).difference(als_b.cells).difference(als_c.cells)
+                                    solver_status.capture_baseline(board, window)
+                                    eliminate_options(solver_status, board, to_eliminate, window)
+                                    if window:
+                                        window.options_visible = window.options_visible.union(als_a.cells).union(
+                                            als_b.cells).union(als_c.cells).union(common_neighbours)
+                                    als_xy_wing.options_removed += len(to_eliminate)
+                                    als_xy_wing.clues += len(solver_status.naked_singles)
+                                    return {"solver_tool": "als_xy_wing",
+                                            "chain_a": chain_a,
+                                            "chain_b": chain_b,
+                                            "chain_c": chain_c,
+                                            "eliminate": to_eliminate,
+                                            "impacted_cells": impacted,
+                                            }
     return None
 
 
@@ -244,37 +326,28 @@ def death_blossom(solver_status, board, window):
     Rating: 360
     """
 
-    unresolved = {cell for cell in range(81) if len(board[cell]) > 1}
-    als_es = _get_alses(board)
+    unresolved = cells_mask(cell for cell in range(81) if len(board[cell]) > 1)
+    index = _als_index.update(solver_status, board)
     for stem_size in (2, 3, 4):
         stems = {cell for cell in range(81) if len(board[cell]) == stem_size}
         for stem in stems:
             all_petals = {}
             for candidate in board[stem]:
-                candidate_petals = _get_alses_with_restricted_common(stem, candidate, als_es)
+                candidate_petals = _get_alses_with_restricted_common(stem, candidate, index)
                 if candidate_petals:
                     all_petals[candidate] = candidate_petals
             if len(all_petals) == len(board[stem]):
-                stem_candidates = board[stem]
-                for blossom in _select_2_petals(all_petals, stem_candidates) if stem_size == 2 \
-                        else (_select_3_petals(all_petals, stem_candidates) if stem_size == 3
-                              else _select_4_petals(all_petals, stem_candidates)):
-                    blossom_cells = {cell for petal in blossom for cell in petal}
-                    impacted_cells = unresolved.difference(blossom_cells)
-                    possible_candidates = set(blossom)
+                for blossom_cells, common_peers in _select_petals(all_petals, board[stem]):
+                    impacted_cells = unresolved & ~blossom_cells
                     to_eliminate = set()
-                    for cell in impacted_cells:
-                        if possible_candidates.intersection(board[cell]):
-                            cell_neighbours = set(ALL_NBRS[cell])
-                            for candidate in possible_candidates.intersection(board[cell]):
-                                candidate_cells = blossom[candidate]
-                                if candidate_cells.intersection(cell_neighbours) == candidate_cells:
-                                    to_eliminate.add((candidate, cell))
+                    for candidate, peers in common_peers.items():
+                        to_eliminate.update((candidate, cell) for cell in mask_cells(peers & impacted_cells)
+                                            if candidate in board[cell])
                     if to_eliminate:
                         solver_status.capture_baseline(board, window)
                         eliminate_options(solver_status, board, to_eliminate, window)
                         if window:
-                            window.options_visible = window.options_visible.union(blossom_cells)
+                            window.options_visible = window.options_visible.union(mask_cells(blossom_cells))
                         # print('\tDeath Blossom')
                         return {"solver_tool": "death_blossom",
                                 "eliminate": to_eliminate, }
@@ -286,45 +359,36 @@ def als_xy(solver_status, board, window):
     """  TODO
     Rating: 300
     """
-    als_es = _get_alses(board)
-    for als_a, als_b in combinations(als_es, 2):
-        if _check_if_overlap(als_a, als_b):
+    index = _als_index.update(solver_status, board)
+    alses = index.alses
+    unresolved = cells_mask(cell for cell in range(81) if len(board[cell]) > 1)
+    for id_a, id_b in combinations(range(len(alses)), 2):
+        als_a = alses[id_a]
+        als_b = alses[id_b]
+        if als_a.cells_mask & als_b.cells_mask or popcount(als_a.digits & als_b.digits) < 2:
             continue
-        common_values = set(als_a).intersection(als_b)
-        impacted_cells = {cell for cell in range(81) if len(board[cell]) > 1}.difference(als_a).difference(als_b)
-        if len(common_values) > 1 and impacted_cells:
-            restricted_commons = _get_restricted_commons(als_a, als_b, common_values)
+        rcc = index.rcc(id_a, id_b)
+        if unresolved:
+            restricted_commons = set(rcc.restricted)
             if len(restricted_commons) == 2:
                 to_eliminate = set()
-                x = list(restricted_commons)[0]
-                y = list(restricted_commons)[1]
-                for cell in impacted_cells:
-                    if x in board[cell] and set(ALL_NBRS[cell]).intersection(als_a[x]) == als_a[x] and \
-                            set(ALL_NBRS[cell]).intersection(als_b[x]) == als_b[x]:
-                        to_eliminate.add((x, cell))
-                    if y in board[cell] and set(ALL_NBRS[cell]).intersection(als_a[y]) == als_a[y] and \
-                            set(ALL_NBRS[cell]).intersection(als_b[y]) == als_b[y]:
-                        to_eliminate.add((y, cell))
-                # if to_eliminate:
-                #     print('\tBingo!')
-                for z in set(als_a).difference(restricted_commons):
-                    for cell in impacted_cells:
-                        if z in board[cell] and set(ALL_NBRS[cell]).intersection(als_a[z]) == als_a[z]:
-                            to_eliminate.add((z, cell))
-                for z in set(als_b).difference(restricted_commons):
-                    for cell in impacted_cells:
-                        if z in board[cell] and set(ALL_NBRS[cell]).intersection(als_b[z]) == als_b[z]:
-                            to_eliminate.add((z, cell))
+                for x in restricted_commons:
+                    impacted_cells = rcc.common_peers[x] & unresolved
+                    to_eliminate.update((x, cell) for cell in mask_cells(impacted_cells) if x in board[cell])
+                for als in (als_a, als_b):
+                    for z in set(als.candidates).difference(restricted_commons):
+                        impacted_cells = als.digit_peers[z] & unresolved
+                        to_eliminate.update((z, cell) for cell in mask_cells(impacted_cells) if z in board[cell])
                 if to_eliminate:
-                    cells_a = {cell for candidate in als_a for cell in als_a[candidate]}
-                    cells_b = {cell for candidate in als_b for cell in als_b[candidate]}
+                    cells_a = als_a.cells
+                    cells_b = als_b.cells
                     c_chain, d_chain, _ = _get_c_chain(als_a=als_a, als_b=als_b,
                                                        x=restricted_commons.pop(), z=restricted_commons.pop())
                     solver_status.capture_baseline(board, window)
                     eliminate_options(solver_status, board, to_eliminate, window)
                     if window:
                         window.options_visible = window.options_visible.union(cells_a).union(
-                            cells_b).union(impacted_cells)
+                            cells_b).union(mask_cells(unresolved))
                     # print(f'\n{cells_a = }, \n{cells_b = }, \n{restricted_commons = }')
                     als_xy.options_removed += len(to_eliminate)
                     als_xy.clues += len(solver_status.naked_singles)
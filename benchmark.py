@@ -0,0 +1,316 @@
+# -*- coding: UTF-8 -*-
+
+""" BENCHMARK OF THE SUDOKU SOLVER STRATEGIES AND OF END-TO-END SOLVING
+
+    GLOBAL FUNCTIONS:
+        main() - runs the benchmark as per command line options, compares the results with the baseline
+        make_corpus() - returns list of puzzles generated reproducibly from a random seed
+        run_benchmark() - returns benchmark results of puzzle corpora
+        compare_results() - returns list of regressions of the results against the baseline
+
+    LOCAL FUNCTIONS:
+        _random_grid() - returns randomly transformed solved sudoku grid
+        _write_corpora() - generates puzzle corpora of all difficulty levels and writes them to files
+        _solve_corpus() - solves corpus puzzles end-to-end with the solver application functions
+        _capture_states() - returns board states met when solving the puzzle with standard techniques
+        _restore_state() - returns board and solver status as per the captured state
+        _time_strategies() - times each solver strategy in isolation on captured board states
+        _parse_args() - parses command line options
+
+    IMPORTANT DATA STRUCTURES:
+        state: (board, pencilmarks, givens, cells_solved, naked_singles) - copies of board and solver status data
+        captured states: [(state, number of strategies called on the state), ...]
+        results (saved as JSON):
+            {"python": version, "platform": platform, "repeat": n, "states": n,
+             "corpora": {corpus name: {"puzzles": n, "solved": n, "states": n,
+                                       "end_to_end": {"total": s, "mean": s, "max": s},
+                                       "strategies": {strategy: {"calls": n, "hits": n, "total": s, "mean": s}}}}}
+
+    Each puzzle is timed end-to-end (standard techniques and brute force, as the application solves it),
+    then each active strategy of the solver is timed on the same board states (captured while solving
+    the puzzle with standard techniques): a strategy is timed on the states it is called on in the solver
+    loop, i.e. on which all the strategies of higher priority failed. The minimum of 'repeat' runs is taken.
+    A strategy, or end-to-end solving of a corpus, regresses if its mean time is greater than
+    the baseline one by more than the threshold (relative), or if fewer puzzles of a corpus are solved
+
+    Examples:
+        python benchmark.py --generate 20 -i puzzles
+        python benchmark.py -i puzzles bench_easy.txt bench_hard.txt -o bench.json
+        python benchmark.py -i puzzles bench_easy.txt bench_hard.txt -b bench.json -t 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from solver import SolverStatus, get_prioritized_strategies
+from utils import is_solved, DeadEndException
+
+import dlx
+import sudoku_solver
+
+_LEVELS = {"easy": 36, "medium": 28, "hard": 0}     # number of givens to stop removing at (0: minimal puzzle)
+
+
+def _random_grid(rng):
+    """ return solved grid (list of 81 digits) transformed with random sudoku symmetries """
+    base = dlx.solve(["."] * 81, limit=1).solution
+    labels = rng.sample("123456789", 9)
+    bands = rng.sample(range(3), 3)
+    stacks = rng.sample(range(3), 3)
+    rows = [3 * band + row for band in bands for row in rng.sample(range(3), 3)]
+    cols = [3 * stack + col for stack in stacks for col in rng.sample(range(3), 3)]
+    transposed = rng.random() < 0.5
+    grid = []
+    for row in rows:
+        for col in cols:
+            cell = col * 9 + row if transposed else row * 9 + col
+            grid.append(labels[int(base[cell]) - 1])
+    return grid
+
+
+def make_corpus(count, level, seed):
+    """ Return list of 'count' puzzles (81-character strings) with unique solutions
+    Puzzles are made from randomly transformed solved grids by removing givens in random order
+    as long as the solution stays unique, until the number of givens of the level is reached.
+    The same seed and level give the same puzzles
+    """
+    rng = random.Random(f"{level}:{seed}")
+    corpus = []
+    for _ in range(count):
+        puzzle = _random_grid(rng)
+        givens = 81
+        for cell in rng.sample(range(81), 81):
+            if givens <= _LEVELS[level]:
+                break
+            value = puzzle[cell]
+            puzzle[cell] = "."
+            if dlx.solve(puzzle).count == 1:
+                givens -= 1
+            else:
+                puzzle[cell] = value
+        corpus.append("".join(puzzle))
+    return corpus
+
+
+def _write_corpora(count, seed, path):
+    """ generate corpora of all difficulty levels and write them to 'bench_<level>.txt' files """
+    for level in _LEVELS:
+        pathname = os.path.join(path, f"bench_{level}.txt")
+        with open(pathname, "w") as corpus_file:
+            corpus_file.writelines(puzzle + "\n" for puzzle in make_corpus(count, level, seed))
+        print(f"{pathname}: {count} puzzles")
+
+
+def _solve_corpus(pathname, model, repeat):
+    """ solve the corpus puzzles with the application functions (textual mode, no output)
+    Returns: list of puzzles (lists of 81 strings), list of minimum solving times and number of solved puzzles
+    """
+    argv = ["sudoku_solver.py", "-x", "-v", "0", "-m", model,
+            "-i", os.path.dirname(os.path.abspath(pathname)), os.path.basename(pathname)]
+    saved_argv = sys.argv
+    sys.argv = argv
+    try:
+        sudoku_solver.set_solver_options(sudoku_solver.config, sudoku_solver.data)
+    finally:
+        sys.argv = saved_argv
+    sudoku_solver._read_boards()
+
+    puzzles = []
+    times = []
+    solved = 0
+    for sudoku_id in sudoku_solver._next_puzzles():
+        puzzles.append(sudoku_solver.boards[sudoku_id - 1].copy())
+        sudoku_solver.data["current_sudoku"] = sudoku_id
+        best = None
+        for _ in range(repeat):
+            sudoku_solver.data["current_loop"] = 0
+            sudoku_solver.data["critical_error"] = False
+            start = time.perf_counter()
+            ret = sudoku_solver._run_solver()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        solved += 1 if ret and not sudoku_solver.data["critical_error"] else 0
+        times.append(best)
+    return puzzles, times, solved
+
+
+def _capture_states(puzzle, strategies):
+    """ return board states met when solving the puzzle with standard techniques - as solver_loop()
+    does it in textual mode - each with number of the strategies called on it (all up to the one
+    that succeeded) """
+    board = puzzle.copy()
+    solver_status = SolverStatus()
+    solver_status.initialize(board)
+    states = []
+    while not is_solved(board, solver_status):
+        state = (board.copy(), solver_status.pencilmarks, set(solver_status.givens),
+                 set(solver_status.cells_solved), set(solver_status.naked_singles))
+        called = 0
+        try:
+            for solver in strategies.values():
+                called += 1
+                if solver(solver_status, board, None):
+                    break
+            else:
+                states.append((state, called))
+                break
+        except DeadEndException:
+            break
+        states.append((state, called))
+    return states
+
+
+def _restore_state(state):
+    """ return board and new SolverStatus instance as per the captured state """
+    board, pencilmarks, givens, cells_solved, naked_singles = state
+    solver_status = SolverStatus()
+    solver_status.pencilmarks = pencilmarks
+    solver_status.givens = set(givens)
+    solver_status.cells_solved.update(cells_solved)
+    solver_status.naked_singles.update(naked_singles)
+    solver_status.board_changed()
+    return board.copy(), solver_status
+
+
+def _time_strategies(puzzles_states, strategies, repeat, max_states):
+    """ time each strategy in isolation on the board states it is called on by the solver
+    (up to 'max_states' evenly spaced states per puzzle, minimum of 'repeat' runs) """
+    timings = {}
+    for position, (name, solver) in enumerate(strategies.items()):
+        calls = hits = 0
+        total = 0.0
+        for puzzle_states in puzzles_states:
+            states = [state for state, called in puzzle_states if called > position]
+            if len(states) > max_states:
+                step = len(states) / max_states
+                states = [states[int(i * step)] for i in range(max_states)]
+            for state in states:
+                best = None
+                for _ in range(repeat):
+                    board, solver_status = _restore_state(state)
+                    start = time.perf_counter()
+                    try:
+                        ret = solver(solver_status, board, None)
+                    except DeadEndException:
+                        ret = None
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                calls += 1
+                hits += 1 if ret else 0
+                total += best
+        timings[name] = {"calls": calls, "hits": hits, "total": total, "mean": total / calls if calls else 0.0}
+    return timings
+
+
+def run_benchmark(corpora, model, repeat=1, max_states=5):
+    """ Return benchmark results (see IMPORTANT DATA STRUCTURES) of the corpora (list of puzzle file pathnames)
+    Solver output (e.g. printouts of the strategies) is suppressed """
+    strategies = {name: strategy.solver for name, strategy in get_prioritized_strategies().items()
+                  if strategy.active and strategy.solver}
+    results = {"python": platform.python_version(), "platform": platform.platform(),
+               "repeat": repeat, "states": max_states, "corpora": {}}
+    for pathname in corpora:
+        with contextlib.redirect_stdout(io.StringIO()):
+            puzzles, times, solved = _solve_corpus(pathname, model, repeat)
+            puzzles_states = [_capture_states(puzzle, strategies) for puzzle in puzzles]
+            timings = _time_strategies(puzzles_states, strategies, repeat, max_states)
+        results["corpora"][os.path.basename(pathname)] = {
+            "puzzles": len(puzzles),
+            "solved": solved,
+            "states": sum(len(puzzle_states) for puzzle_states in puzzles_states),
+            "end_to_end": {"total": sum(times), "mean": sum(times) / len(times) if times else 0.0,
+                           "max": max(times, default=0.0)},
+            "strategies": timings,
+        }
+    return results
+
+
+def compare_results(results, baseline, threshold):
+    """ Return list of regressions (strings) of the results against the baseline results
+    (mean times greater by more than 'threshold' relative to the baseline, fewer solved puzzles) """
+    regressions = []
+    for corpus, corpus_results in results["corpora"].items():
+        corpus_baseline = baseline["corpora"].get(corpus)
+        if corpus_baseline is None:
+            continue
+        if corpus_results["solved"] < corpus_baseline["solved"]:
+            regressions.append(f"{corpus}: solved {corpus_results['solved']} puzzles "
+                               f"(baseline: {corpus_baseline['solved']})")
+        timings = [("end-to-end", corpus_results["end_to_end"], corpus_baseline["end_to_end"])]
+        timings += [(name, timing, corpus_baseline["strategies"][name])
+                    for name, timing in corpus_results["strategies"].items() if name in corpus_baseline["strategies"]]
+        for name, timing, timing_baseline in timings:
+            if timing_baseline["mean"] and timing["mean"] > timing_baseline["mean"] * (1 + threshold):
+                regressions.append(f"{corpus}: {name} mean time {timing['mean'] * 1000:.3f} ms "
+                                   f"(baseline: {timing_baseline['mean'] * 1000:.3f} ms, "
+                                   f"+{(timing['mean'] / timing_baseline['mean'] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="benchmark of the sudoku solver strategies and end-to-end solving")
+    parser.add_argument("corpora", metavar="corpus", type=str, nargs="*",
+                        help="sudoku puzzles list file (in the input folder unless it is a path)")
+    parser.add_argument("-i", "--input", type=str, default=os.path.join(os.path.abspath(os.getcwd()), "puzzles"),
+                        help="path to sudoku input files folder")
+    parser.add_argument("-m", "--model", type=str, default="./cnn_models/neuralNetMLP.pkl",
+                        help="pathname of a trained neural network digit classifier (required by the solver)")
+    parser.add_argument("-g", "--generate", type=int, default=0, metavar="COUNT",
+                        help="generate corpora of COUNT puzzles per difficulty level in the input folder")
+    parser.add_argument("--seed", type=int, default=1, help="random seed of the generated corpora")
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="take the minimum time of REPEAT runs")
+    parser.add_argument("-s", "--states", type=int, default=5,
+                        help="maximum number of board states per puzzle each strategy is timed on")
+    parser.add_argument("-o", "--output", type=str, default=None, help="write the results to OUTPUT JSON file")
+    parser.add_argument("-b", "--baseline", type=str, default=None, help="compare the results with BASELINE JSON file")
+    parser.add_argument("-t", "--threshold", type=float, default=0.1,
+                        help="relative slowdown against the baseline reported as regression (default: 0.1)")
+    return parser.parse_args()
+
+
+def main():
+    """ run the benchmark as per command line options
+    Exit code is 1 if there are regressions against the baseline, 0 otherwise """
+    args = _parse_args()
+    if args.generate:
+        _write_corpora(args.generate, args.seed, args.input)
+    corpora = [corpus if os.path.dirname(corpus) else os.path.join(args.input, corpus) for corpus in args.corpora]
+    if not corpora:
+        return 0
+
+    results = run_benchmark(corpora, args.model, max(args.repeat, 1), max(args.states, 1))
+    for corpus, corpus_results in results["corpora"].items():
+        end_to_end = corpus_results["end_to_end"]
+        print(f"\n{corpus}: solved {corpus_results['solved']}/{corpus_results['puzzles']} puzzles, "
+              f"{end_to_end['total']:.3f} s (mean: {end_to_end['mean'] * 1000:.3f} ms, "
+              f"max: {end_to_end['max'] * 1000:.3f} ms), {corpus_results['states']} board states")
+        print(f"{'Strategy':<28}{'Calls':>8}{'Hits':>8}{'Total [s]':>12}{'Mean [ms]':>12}")
+        for name, timing in sorted(corpus_results["strategies"].items(), key=lambda item: -item[1]["total"]):
+            if not timing["calls"]:
+                continue
+            print(f"{name:<28}{timing['calls']:>8}{timing['hits']:>8}{timing['total']:>12.4f}"
+                  f"{timing['mean'] * 1000:>12.4f}")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare_results(results, json.load(baseline_file), args.threshold)
+        print()
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        print(f"{len(regressions)} regression(s) against {args.baseline} (threshold: {args.threshold:.0%})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+# -*- coding: UTF-8 -*-
+
+""" BIT MASK REPRESENTATION OF THE SUDOKU BOARD CANDIDATES
+
+    CLASS DEFINITIONS:
+        BitBoard - 81 9-bit masks of cells candidates (array-backed)
+        PositionIndex - 27x9 masks of digits positions within houses, updated incrementally
+        ChangeJournal - stamps of the last changes of digits and houses, and of strategies misses
+
+    GLOBAL FUNCTIONS:
+        digits_to_mask() - returns bit mask of the digits in a candidates string
+        mask_to_digits() - returns candidates string of the bit mask
+        popcount() - returns number of bits set in the mask
+        lowest_bit() - returns the lowest bit set in the mask
+        lowest_digit() - returns digit of the lowest bit set in the mask
+        mask_bits() - returns tuple of single bits set in the mask
+        mask_positions() - returns tuple of positions (bit numbers) set in the mask
+
+    IMPORTANT DATA STRUCTURES:
+        mask: bit (n - 1) is set if digit n is a cell candidate, e.g. '158' -> 0b010010001
+        house id: 0-8 for rows, 9-17 for columns, 18-26 for boxes (see HOUSES)
+        positions mask: bit p is set if HOUSES[house_id][p] cell has the digit
+        POPCOUNT[mask] - number of bits set in the mask (lookup table for the hot loops)
+        MASK_BITS[mask] - tuple of single bits set in the mask (lookup table for the hot loops)
+
+    The string board (list of 81 strings) remains the primary board representation.
+    BitBoard is the adapter that lets solver methods move to bit operations one at a time:
+    build it from the board at the beginning of a scan (or keep it up to date)
+    and use popcount/bitwise 'and'/'or' instead of ''.join(), str.count() and set() operations
+    (the subset strategies keep a BitBoard in their index, see subsets.py).
+"""
+
+from array import array
+
+ALL_DIGITS_MASK = 0x1FF
+DIGIT_BIT = {str(digit): 1 << (digit - 1) for digit in range(1, 10)}
+BIT_DIGIT = {bit: digit for digit, bit in DIGIT_BIT.items()}
+
+POPCOUNT = tuple(bin(mask).count("1") for mask in range(ALL_DIGITS_MASK + 1))
+_MASK_DIGITS = tuple("".join(digit for digit, bit in DIGIT_BIT.items() if mask & bit)
+                     for mask in range(ALL_DIGITS_MASK + 1))
+MASK_BITS = tuple(tuple(bit for bit in BIT_DIGIT if mask & bit) for mask in range(ALL_DIGITS_MASK + 1))
+_MASK_POSITIONS = tuple(tuple(position for position in range(9) if mask & (1 << position))
+                        for mask in range(ALL_DIGITS_MASK + 1))
+_STRING_MASKS = {"": 0, ".": 0}
+
+ROW_HOUSES = 0
+COL_HOUSES = 9
+BOX_HOUSES = 18
+HOUSES = tuple(tuple(row * 9 + col for col in range(9)) for row in range(9)) + \
+    tuple(tuple(row * 9 + col for row in range(9)) for col in range(9)) + \
+    tuple(tuple((box // 3 * 3 + i // 3) * 9 + box % 3 * 3 + i % 3 for i in range(9)) for box in range(9))
+CELL_HOUSES = tuple(tuple((house_id, 1 << house.index(cell)) for house_id, house in enumerate(HOUSES)
+                          if cell in house) for cell in range(81))
+DIGIT_ID = {str(digit): digit - 1 for digit in range(1, 10)}
+
+
+def digits_to_mask(candidates):
+    """ return bit mask of the digits in 'candidates' string ('.' and '' give 0) """
+    mask = _STRING_MASKS.get(candidates)
+    if mask is None:
+        mask = 0
+        for digit in candidates:
+            mask |= DIGIT_BIT[digit]
+        _STRING_MASKS[candidates] = mask
+    return mask
+
+
+def mask_to_digits(mask):
+    """ return candidates string (digits in ascending order) of the 9-bit mask """
+    return _MASK_DIGITS[mask]
+
+
+def popcount(mask):
+    """ return number of bits set in the 9-bit mask """
+    return POPCOUNT[mask]
+
+
+def lowest_bit(mask):
+    """ return the lowest bit set in the mask (0 for empty mask) """
+    return mask & -mask
+
+
+def lowest_digit(mask):
+    """ return digit of the lowest bit set in the mask (None for empty mask) """
+    return BIT_DIGIT.get(mask & -mask)
+
+
+def mask_bits(mask):
+    """ return tuple of single bits set in the 9-bit mask """
+    return MASK_BITS[mask]
+
+
+def mask_positions(mask):
+    """ return tuple of positions (bit numbers, ascending) set in the 9-bit mask """
+    return _MASK_POSITIONS[mask]
+
+
+class BitBoard:
+    """ 81 9-bit masks of cells candidates
+    Solved cells (and naked singles) have a single bit set, unresolved cells
+    without candidates calculated yet ('.') have empty mask.
+    """
+
+    def __init__(self, board=None):
+        self.cells = array('H', bytes(162))
+        if board is not None:
+            self.load(board)
+
+    def __getitem__(self, cell):
+        return self.cells[cell]
+
+    def __len__(self):
+        return 81
+
+    def load(self, board):
+        """ set cells masks as per the string board """
+        for cell in range(81):
+            self.cells[cell] = digits_to_mask(board[cell])
+
+    def to_board(self):
+        """ return string board corresponding to the cells masks """
+        return [_MASK_DIGITS[mask] if mask else "." for mask in self.cells]
+
+    def count(self, cell):
+        """ return number of the cell candidates """
+        return POPCOUNT[self.cells[cell]]
+
+    def digits(self, cell):
+        """ return candidates string of the cell """
+        return _MASK_DIGITS[self.cells[cell]]
+
+    def remove(self, cell, mask):
+        """ remove candidates of the mask from the cell, return mask of actually removed candidates """
+        removed = self.cells[cell] & mask
+        self.cells[cell] ^= removed
+        return removed
+
+    def house_mask(self, house, unsolved_only=False):
+        """ return union of candidates of the house cells """
+        mask = 0
+        for cell in house:
+            cell_mask = self.cells[cell]
+            if not unsolved_only or POPCOUNT[cell_mask] > 1:
+                mask |= cell_mask
+        return mask
+
+    def positions(self, house, bit):
+        """ return 9-bit mask of positions (indices within the house) of cells with the candidate bit """
+        mask = 0
+        for position, cell in enumerate(house):
+            if self.cells[cell] & bit:
+                mask |= 1 << position
+        return mask
+
+
+class PositionIndex:
+    """ Index of 'where can digit d go in house h': for each of 27 houses and 9 digits
+    the mask of positions of the house cells having the digit in their candidates string.
+    The index mirrors the string board exactly ('digit in board[cell]', solved cells included);
+    additionally, for each house it keeps the mask of unsolved cells (len(board[cell]) > 1).
+    It is kept up to date by eliminate_options() and place_digit(); any other change
+    of the board has to be followed by invalidate() - the index is then rebuilt on next sync()
+    """
+
+    def __init__(self):
+        self.masks = array('H', bytes(2 * 27 * 9))
+        self.unsolved = array('H', bytes(2 * 27))
+        self.valid = False
+
+    def invalidate(self):
+        self.valid = False
+
+    def sync(self, board):
+        """ rebuild the index if it is not valid, return the index """
+        if not self.valid:
+            self.build(board)
+        return self
+
+    def build(self, board):
+        """ set the index as per the string board """
+        masks = self.masks
+        for idx in range(27 * 9):
+            masks[idx] = 0
+        for house_id, house in enumerate(HOUSES):
+            unsolved = 0
+            for position, cell in enumerate(house):
+                bit = 1 << position
+                candidates = board[cell]
+                if len(candidates) > 1:
+                    unsolved |= bit
+                for digit in candidates:
+                    if digit != ".":
+                        masks[house_id * 9 + DIGIT_ID[digit]] |= bit
+            self.unsolved[house_id] = unsolved
+        self.valid = True
+
+    def discard(self, cell, digit):
+        """ remove the digit from the cell positions """
+        if self.valid:
+            digit_id = DIGIT_ID[digit]
+            for house_id, bit in CELL_HOUSES[cell]:
+                self.masks[house_id * 9 + digit_id] &= ~bit
+
+    def place(self, cell, digit, candidates):
+        """ set the digit as the cell value ('candidates' - the cell string before the move) """
+        if self.valid:
+            digit_id = DIGIT_ID[digit]
+            for house_id, bit in CELL_HOUSES[cell]:
+                for candidate in candidates:
+                    if candidate != ".":
+                        self.masks[house_id * 9 + DIGIT_ID[candidate]] &= ~bit
+                self.masks[house_id * 9 + digit_id] |= bit
+                self.unsolved[house_id] &= ~bit
+
+    def set_solved(self, cell):
+        """ remove the cell from unsolved cells of its houses """
+        if self.valid:
+            for house_id, bit in CELL_HOUSES[cell]:
+                self.unsolved[house_id] &= ~bit
+
+    def get(self, house_id, digit, unsolved_only=False):
+        """ return positions mask of the digit in the house """
+        mask = self.masks[house_id * 9 + DIGIT_ID[digit]]
+        return mask & self.unsolved[house_id] if unsolved_only else mask
+
+    def count(self, house_id, digit, unsolved_only=False):
+        """ return number of the house cells with the digit """
+        return POPCOUNT[self.get(house_id, digit, unsolved_only)]
+
+    def cells(self, house_id, digit, unsolved_only=False):
+        """ return tuple of the house cells with the digit (in the house order) """
+        house = HOUSES[house_id]
+        return tuple(house[position] for position in _MASK_POSITIONS[self.get(house_id, digit, unsolved_only)])
+
+    def conjugate_pair(self, house_id, digit, unsolved_only=False):
+        """ return pair of cells (strong link) if the digit is in exactly two cells of the house, None otherwise """
+        mask = self.get(house_id, digit, unsolved_only)
+        if POPCOUNT[mask] == 2:
+            house = HOUSES[house_id]
+            return tuple(house[position] for position in _MASK_POSITIONS[mask])
+        return None
+
+
+class ChangeJournal:
+    """ Journal of the board changes made since each solver strategy last returned without result.
+    Every change of a digit candidate in a cell is stamped with the next value of a change counter:
+    the stamp is kept for the digit and for the three houses of the cell.
+    When a strategy is unsuccessful its miss is recorded with the current counter value;
+    a strategy that scans digits (houses) independently needs to rescan only the digits (houses)
+    stamped after its last miss - the remaining ones cannot give a different (i.e. positive) result.
+    Changes of the board made outside eliminate_options() and place_digit() are recorded with touch_all()
+    """
+
+    def __init__(self):
+        self.counter = 0
+        self.digit_stamps = dict.fromkeys(DIGIT_BIT, 0)
+        self.house_stamps = [0] * 27
+        self.misses = {}
+
+    def touch(self, cell, digit):
+        """ record change of the digit candidate in the cell """
+        self.counter += 1
+        self.digit_stamps[digit] = self.counter
+        for house_id, _ in CELL_HOUSES[cell]:
+            self.house_stamps[house_id] = self.counter
+
+    def touch_cell(self, cell, candidates):
+        """ record change of all candidates of the cell ('candidates' - the cell string before the change) """
+        for digit in candidates:
+            if digit != ".":
+                self.touch(cell, digit)
+
+    def touch_all(self):
+        """ record change of the whole board """
+        self.counter += 1
+        for digit in self.digit_stamps:
+            self.digit_stamps[digit] = self.counter
+        self.house_stamps = [self.counter] * 27
+
+    def record_miss(self, strategy):
+        self.misses[strategy] = self.counter
+
+    def changed_digits(self, strategy):
+        """ return list of digits changed since the last miss of the strategy (all digits if it has no miss) """
+        last_miss = self.misses.get(strategy, -1)
+        return [digit for digit, stamp in self.digit_stamps.items() if stamp > last_miss]
+
+    def changed_houses(self, strategy):
+        """ return set of ids of houses changed since the last miss of the strategy """
+        last_miss = self.misses.get(strategy, -1)
+        return {house_id for house_id, stamp in enumerate(self.house_stamps) if stamp > last_miss}
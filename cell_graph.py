@@ -0,0 +1,74 @@
+# -*- coding: UTF-8 -*-
+
+""" GRAPH OF STRONGLY LINKED CELLS USED BY THE COLORING STRATEGIES
+
+    CLASS DEFINITIONS:
+        CellGraph - undirected graph of cells (0-80) with optional candidates of the edges
+
+    IMPORTANT DATA STRUCTURES:
+        nodes: [cell, ...] - cells of the graph in the order they were added
+        adj: [[cell, ...] for each of the 81 cells] - neighbours of the cell in the order they were added
+        edge: (cell_1, cell_2) - cell_1 is the one added to the graph first
+        candidates: {(lower cell, higher cell): candidates of the edge, ...}
+
+    The graph is array-backed: neighbours of a cell are looked up by the cell index and connected
+    components are kept in a union-find forest updated as the edges are added, so components
+    are available without traversing the graph. Nodes, neighbours and edges are iterated in the order
+    they were added. The coloring strategies paint each component from its lowest cell
+    (see coloring._get_c_chain()), so the chains do not depend on the order the links were found
+"""
+
+class CellGraph:
+    """ Undirected graph of cells with union-find connected components """
+
+    def __init__(self):
+        self.nodes = []
+        self.adj = [[] for _ in range(81)]
+        self.candidates = {}
+        self._parent = list(range(81))
+
+    def _find(self, cell):
+        parent = self._parent
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    def add_edge(self, cell_1, cell_2, candidates=None):
+        """ add edge of the cells (and the cells if not in the graph yet);
+        candidates of an existing edge are replaced """
+        key = (cell_1, cell_2) if cell_1 < cell_2 else (cell_2, cell_1)
+        if key not in self.candidates:
+            for cell in (cell_1, cell_2):
+                if not self.adj[cell]:
+                    self.nodes.append(cell)
+            self.adj[cell_1].append(cell_2)
+            self.adj[cell_2].append(cell_1)
+            root_1, root_2 = self._find(cell_1), self._find(cell_2)
+            if root_1 != root_2:
+                self._parent[root_2] = root_1
+        self.candidates[key] = candidates
+
+    def edge_candidates(self, cell_1, cell_2):
+        """ return candidates of the edge """
+        return self.candidates[(cell_1, cell_2) if cell_1 < cell_2 else (cell_2, cell_1)]
+
+    def edges(self):
+        """ generator of the graph edges """
+        seen = [False] * 81
+        for node in self.nodes:
+            for neighbour in self.adj[node]:
+                if not seen[neighbour]:
+                    yield node, neighbour
+            seen[node] = True
+
+    def connected_components(self):
+        """ return list of sets of connected cells, in the order of their first cells in the graph """
+        components = {}
+        for node in self.nodes:
+            root = self._find(node)
+            if root in components:
+                components[root].add(node)
+            else:
+                components[root] = {node}
+        return list(components.values())
@@ -11,33 +11,10 @@
 from collections import defaultdict
 from itertools import combinations
 
-import networkx as nx
-
 from utils import CELLS_IN_ROW, CELLS_IN_COL, CELLS_IN_BOX, ALL_NBRS, SUDOKU_VALUES_LIST
 from utils import get_stats, eliminate_options, get_pair_house, set_remaining_candidates
-from utils import get_strong_links, DeadEndException
-
-
-def _get_strongly_connected_cells(board, solver_status):
-    """ Return dictionary of strongly connected cells
-    connected_cells data format:
-    {(cell_1, cell_2): {candidate_1, candidate_2, ...}, ...} """
-
-    def _add_connected(cells):
-        unsolved_cells = [cell for cell in cells if len(board[cell]) > 1]
-        if unsolved_cells:
-            candidates = ''.join(board[cell] for cell in unsolved_cells)
-            for value in SUDOKU_VALUES_LIST:
-                if candidates.count(value) == 2:
-                    cells_pair = tuple([cell for cell in unsolved_cells if value in board[cell]])
-                    connected_cells[cells_pair].add(value)
-
-    connected_cells = defaultdict(set)
-    for indx in range(9):
-        _add_connected(CELLS_IN_ROW[indx])
-        _add_connected(CELLS_IN_COL[indx])
-        _add_connected(CELLS_IN_BOX[indx])
-    return connected_cells
+from geometry import COMMON_PEERS
+from cell_graph import CellGraph
 
 
 def _get_graph_houses(edges):
@@ -50,37 +27,33 @@ def _get_graph_houses(edges):
 
 # single-digit techniques utility functions:
 
-def _build_graph(value, board, solver_status):
-    def _for_house(cells):
-        nodes = [cell for cell in cells if value in board[cell] and len(board[cell]) > 1]
-        if len(nodes) == 2:
-            graph.add_edge(nodes[0], nodes[1])
-
-    graph = nx.Graph()
-    for i in range(9):
-        _for_house(CELLS_IN_ROW[i])
-        _for_house(CELLS_IN_COL[i])
-        _for_house(CELLS_IN_BOX[i])
+def _build_graph(value, links):
+    """ Return graph of cells strongly linked by the value (conjugate pairs of the link graph) """
+    graph = CellGraph()
+    for pair in links.conjugate_pairs(value):
+        graph.add_edge(*pair)
     return graph
 
 
 def _get_c_chain(graph, component, value, colors=('lime', 'yellow')):
-    # c_chain = {node: set() for node in component}
+    """ Paint nodes of the component alternately with the two colors (depth-first, from its lowest cell)
+    The traversal uses explicit stack of neighbours iterators instead of recursion """
     c_chain = defaultdict(set)
-    node = list(component)[0]
-    _paint_node(graph, component, c_chain, node, value, colors, 0)
+    node = min(component)
+    c_chain[node].add((value, colors[0]))
+    stack = [(iter(graph.adj[node]), 1)]
+    while stack:
+        neighbours, color_id = stack[-1]
+        for node in neighbours:
+            if (value, colors[color_id]) not in c_chain[node]:
+                c_chain[node].add((value, colors[color_id]))
+                stack.append((iter(graph.adj[node]), 1 - color_id))
+                break
+        else:
+            stack.pop()
     return c_chain
 
 
-def _paint_node(graph, component, c_chain, node, value, colors, color_id):
-    if node not in component or (value, colors[color_id]) in c_chain[node]:
-        return
-    c_chain[node].add((value, colors[color_id]))
-    color_id = (color_id + 1) % 2
-    for neighbour_node in graph.adj[node]:
-        _paint_node(graph, component, c_chain, neighbour_node, value, colors, color_id)
-
-
 def _get_color_nodes(c_chain, value):
     """ Return dictionary of c_chain nodes by their color """
     color_nodes = {}
@@ -93,185 +66,49 @@ def _get_color_nodes(c_chain, value):
 
 # XXXXX
 
-def _check_bidirectional_traversing(end_value, path, board):
-    def _traverse(nodes):
-        exp_value = end_value
-        for node in nodes:
-            exp_value = board[node].replace(exp_value, '')
-            if len(exp_value) != 1:
-                return False
-        return True if exp_value == end_value else False
-
-    if len(path) < 3:
-        return False
-    return _traverse(path) and _traverse(path[-1::-1])
-
-
-def _try_value(board, node, value):
-    if value not in board[node]:
-        return False
-    board[node] = value
-    for impacted_cell in ALL_NBRS[node]:
-        board[impacted_cell] = board[impacted_cell].replace(value, '')
-        if not board[impacted_cell]:
-            return False
-    return True
-
-
-def _walk(board, graph, path, start_node, start_value, end_node, end_value):
-    """ walks possible paths between start_node and end_node,
-    starting with start value
-    Returns:
-        True if the only value in end_node can be end_value,
-        False otherwise
-    """
-
-    current_node = start_node
-    current_value = start_value
-    while current_node != end_node:
-        if not _try_value(board, current_node, current_value):
-            return
-        path.append(current_node)
-
-        next_nodes = set(graph.adj[current_node]).difference(set(path))
-        if not next_nodes:
-            return
-        elif len(next_nodes) == 1:
-            next_node = next_nodes.pop()
-            edge_values = set(graph.edges[(current_node, next_node)]['candidates'])
-            edge_values.discard(current_value)
-            if not edge_values:
-                return
-            # assert(len(edge_values) == 1)
-            if len(edge_values) != 1:
-                raise DeadEndException
-            current_node = next_node
-            current_value = edge_values.pop()
-
-        else:
-            for next_node in next_nodes:
-                edge_values = set(graph.edges[(current_node, next_node)]['candidates'])
-                edge_values.discard(current_value)
-                if edge_values:
-                    assert (len(edge_values) == 1)
-                    _walk(board.copy(), graph, path.copy(), next_node, edge_values.pop(), end_node, end_value)
-            return
-    path.append(current_node)
-    if current_value == end_value:
-        edge_1 = (path[-2], path[-1])
-        edge_2 = (path[1], path[2])
-        if end_value in graph.edges[edge_1]['candidates']:
-            if end_value in graph.edges[edge_2]['candidates']:
-                hidden_xy_chain.paths.append(path.copy())
-    else:
-        hidden_xy_chain.failures += 1
-
-
-def _color_hidden_xy_chain(graph, path, end_value):
-    """ Color candidates of strongly connected cells in Hidden XY Chain:
-        - with 'c' color (CYAN) for the first and last edge in the chain
-        - alternately with 'g' (LIME) or 'y' (YELLOW) for inner edges of the chain
+def _color_xy_chain(chain):
+    """ Color candidates of an alternating inference chain:
+        - the candidates of the first and last node of the chain with 'cyan'
+        - weakly linked candidates of subsequent nodes with 'lime', 'yellow', and 'moccasin' colors
     Input Data format:
-        graph: nx.graph
-        path: list of chain nodes
-        end_value: candiate value in the first and last chain node
+        chain: alternating inference chain (see link_graph.py)
     Returns:
-        c_chain: dictionary of chain nodes with set of (option, color) pairs as their values
-    """
-    xy_chain = defaultdict(set)
-    xy_chain[path[0]].add((end_value, 'cyan'))
-    xy_chain[path[-1]].add((end_value, 'cyan'))
-    for idx in range(len(path) - 1):
-        colors_used = {value: color for value, color in xy_chain[path[idx]]}
-        colors_available = [color for color in ('lime', 'yellow', 'magenta', 'aqua', 'moccasin')
-                            if color not in colors_used.values()]
-        edge = (path[idx], path[idx+1])
-        candidates = graph.edges[edge]['candidates']
-        for candidate in candidates:
-            if candidate in colors_used:
-                color = colors_used[candidate]
-            else:
-                color = colors_available[0]
-                colors_available = colors_available[1:]
-            if idx + 2 == len(path) and candidate == end_value:
-                color = 'cyan'
-            xy_chain[path[idx]].add((candidate, color))
-            xy_chain[path[idx+1]].add((candidate, color))
-    return xy_chain
-
-
-def _color_naked_xy_chain(graph, path, end_value):
-    """ Color candidates of strongly connected cells forming a chain:
-        - the common candidate in the first and last node of the chain with 'cyan'
-        - strongly connected candidates subsequently with 'lime', 'yellow', and 'moccasin' colors
-    Input Data format:
-        graph: nx.graph
-        path: list of chain nodes
-        end_value: common candidate value in the first and last chain node
-    Returns:
-        c_chain: dictionary of chain nodes with set of (option, color) pairs as their values
+        c_chain: dictionary of chain cells with set of (option, color) pairs as their values
     """
     c_chain = defaultdict(set)
-    c_chain[path[0]].add((end_value, 'cyan'))
-    c_chain[path[-1]].add((end_value, 'cyan'))
+    c_chain[chain[0][0]].add((chain[0][1], 'cyan'))
+    c_chain[chain[-1][0]].add((chain[-1][1], 'cyan'))
     colors = ('lime', 'yellow', 'moccasin')
     color_idx = 0
-    for node_idx in range(len(path)-1):
-        edge = (path[node_idx], path[node_idx+1])
-        values = graph.edges[edge]['candidates']
-        assert(len(values) == 1)
-        value_color_pair = (values.pop(), colors[color_idx])
-        c_chain[path[node_idx]].add(value_color_pair)
-        c_chain[path[node_idx+1]].add(value_color_pair)
+    for node_idx in range(1, len(chain) - 1, 2):
+        value_color_pair = (chain[node_idx][1], colors[color_idx])
+        c_chain[chain[node_idx][0]].add(value_color_pair)
+        c_chain[chain[node_idx + 1][0]].add(value_color_pair)
         color_idx = (color_idx + 1) % 3
     return c_chain
 
 
 @get_stats
 def hidden_xy_chain(solver_status, board, window):
-    """ TODO """
-
-    connected_cells = _get_strongly_connected_cells(board, solver_status)
-    graph = nx.Graph()
-    for edge, candidates in connected_cells.items():
-        graph.add_edge(*edge, candidates=candidates)
-
+    """ Remove the candidate from the cell seeing two cells of conjugate pairs of the candidate
+    if one of the two cells must have the candidate
+    Implementation comments:
+    The shortest alternating inference chain between the candidates of the two cells is searched for
+    in the link graph, with both conjugate pairs and bi-value cells as strong links
+    """
+    links = solver_status.links.sync(board)
     unresolved = [cell for cell in range(81) if len(board[cell]) > 2]
     kwargs = {}
 
     for cell in unresolved:
         for candidate in board[cell]:
-            hidden_xy_chain.paths = []
-            hidden_xy_chain.failures = 0
-            ends = set()
-            nodes = set(ALL_NBRS[cell])
-            for node_1, node_2, candidates in graph.edges.data('candidates'):
-                if candidate in candidates:
-                    if node_1 in nodes:
-                        ends.add(node_1)
-                    if node_2 in nodes:
-                        ends.add(node_2)
+            ends = sorted({node for pair in links.conjugate_pairs(candidate) for node in pair
+                           if node in ALL_NBRS[cell]})
             if len(ends) == 2:
-                ends = list(ends)
-                for start_node in ends:
-                    end_node = ends[1] if start_node == ends[0] else ends[0]
-                    start_values = board[start_node].replace(candidate, '')
-                    for start_value in start_values:
-                        visited_nodes = [cell, ]
-                        _walk(board.copy(), graph, visited_nodes, start_node, start_value, end_node, candidate)
-
-                path = []
-                min_length = 100
-                for p in hidden_xy_chain.paths:
-                    min_length = len(p) if len(p) < min_length else min_length
-                for p in hidden_xy_chain.paths:
-                    if len(p) == min_length:
-                        # print(p)
-                        path = p
-                        break
-                if path and hidden_xy_chain.failures == 0:
-                    path = path[1:]
-                    impacted_cells = {cell for cell in set(ALL_NBRS[path[0]]).intersection(set(ALL_NBRS[path[-1]]))
+                chain = links.chain((ends[0], candidate), (ends[1], candidate), conjugate_pairs=True)
+                if chain:
+                    path = [cell_id for cell_id, _ in chain]
+                    impacted_cells = {cell for cell in COMMON_PEERS[path[0]][path[-1]]
                                       if len(board[cell]) > 1}
                     to_eliminate = [(candidate, cell) for cell in impacted_cells if candidate in board[cell]]
                     solver_status.capture_baseline(board, window)
@@ -281,7 +118,9 @@ def hidden_xy_chain(solver_status, board, window):
                     kwargs["solver_tool"] = "hidden_xy_chain"
                     kwargs["impacted_cells"] = impacted_cells
                     kwargs["eliminate"] = to_eliminate
-                    kwargs["c_chain"] = _color_hidden_xy_chain(graph, path, candidate)
+                    kwargs["c_chain"] = _color_xy_chain(chain)
+                    hidden_xy_chain.options_removed += len(to_eliminate)
+                    hidden_xy_chain.clues += len(solver_status.naked_singles)
                     return kwargs
 
     return kwargs
@@ -296,24 +135,25 @@ def naked_xy_chain(solver_status, board, window):
     Ranking of the method (called XY-Chain) varies widely
     260 and 900
     Implementation comments:
-    Building a graph and identifying potential chains (paths) was straightforward.
-    A slightly tricky part was to add checking for possibility of bidirectional traversing
-    between end nodes of the potential paths
+    Bi-value cells seeing the cell with the candidate are the chain ends; the shortest chain between them
+    is searched for in the link graph, with strong links within bi-value cells only
     """
 
     def _build_bi_value_cells_graph():
-        bi_value_cells = set(cell for cell in range(81) if len(board[cell]) == 2)
-        graph = nx.Graph()
+        bi_value_cells = links.bi_value_cells()
+        graph = CellGraph()
         for cell in bi_value_cells:
             neighbours = set(ALL_NBRS[cell]).intersection(bi_value_cells)
-            graph.add_edges_from(
-                [(cell, other_cell, {'candidates': set(board[cell]).intersection(set(board[other_cell]))})
-                 for other_cell in neighbours if len(set(board[cell]).intersection(set(board[other_cell]))) == 1])
+            for other_cell in neighbours:
+                candidates = set(board[cell]).intersection(set(board[other_cell]))
+                if len(candidates) == 1:
+                    graph.add_edge(cell, other_cell, candidates)
         return graph
 
     set_remaining_candidates(board, solver_status)
+    links = solver_status.links.sync(board)
     graph = _build_bi_value_cells_graph()
-    components = list(nx.connected_components(graph))
+    components = graph.connected_components()
     unresolved = [cell for cell in range(81) if len(board[cell]) > 2]
     kwargs = {}
     for cell in unresolved:
@@ -323,9 +163,10 @@ def naked_xy_chain(solver_status, board, window):
             for candidate in board[cell]:
                 if candidates.count(candidate) == 2:
                     ends = [node for node in nodes if candidate in board[node]]
-                    path = nx.algorithms.shortest_paths.generic.shortest_path(graph, ends[0], ends[1])
-                    if _check_bidirectional_traversing(candidate, path, board):
-                        impacted_cells = {cell for cell in set(ALL_NBRS[path[0]]).intersection(set(ALL_NBRS[path[-1]]))
+                    chain = links.chain((ends[0], candidate), (ends[1], candidate), conjugate_pairs=False)
+                    if chain and len(chain) > 4:
+                        path = [cell_id for cell_id, _ in chain[::2]]
+                        impacted_cells = {cell for cell in COMMON_PEERS[path[0]][path[-1]]
                                           if len(board[cell]) > 1}
                         to_eliminate = [(candidate, cell) for cell in impacted_cells if candidate in board[cell]]
                         edges = [(path[n], path[n+1]) for n in range(len(path)-1)]
@@ -337,7 +178,7 @@ def naked_xy_chain(solver_status, board, window):
                         kwargs["solver_tool"] = "naked_xy_chain"
                         kwargs["impacted_cells"] = impacted_cells
                         kwargs["eliminate"] = to_eliminate
-                        kwargs["c_chain"] = _color_naked_xy_chain(graph, path, candidate)
+                        kwargs["c_chain"] = _color_xy_chain(chain)
                         kwargs["edges"] = edges
                         naked_xy_chain.options_removed += len(to_eliminate)
                         naked_xy_chain.clues += len(solver_status.naked_singles)
@@ -355,7 +196,6 @@ def simple_colors(solver_status, board, window):
     Color Wrap (https://www.sudoku9981.com/sudoku-solving/color-wrap.php
      Ranking of the methods is at the level of 200 ('Hard')
     """
-
     def _color_trap():
         """ two chain cells with different color are pointing at another cell
         outside of the chain that has a candidate equal to the value """
@@ -369,7 +209,7 @@ def simple_colors(solver_status, board, window):
                 assert(len(web_nodes_colors) == 2)
                 to_eliminate.append((value, cell))
         if to_eliminate:
-            edges = [edge for edge in graph.edges if edge[0] in component]
+            edges = [edge for edge in graph.edges() if edge[0] in component]
             solver_status.capture_baseline(board, window)
             if window:
                 window.options_visible = window.options_visible.union(_get_graph_houses(edges))
@@ -426,7 +266,7 @@ def simple_colors(solver_status, board, window):
             to_eliminate = {(value, node) for node in component if (value, conflicting_color) in c_chain[node]}
             for node in conflicted_cells:
                 c_chain[node] = {(value, 'red')}
-            edges = [edge for edge in graph.edges if edge[0] in component]
+            edges = [edge for edge in graph.edges() if edge[0] in component]
             solver_status.capture_baseline(board, window)
             if window:
                 window.options_visible = window.options_visible.union(_get_graph_houses(edges))
@@ -441,9 +281,10 @@ def simple_colors(solver_status, board, window):
         return False
 
     kwargs = {}
-    for value in SUDOKU_VALUES_LIST:
-        graph = _build_graph(value, board, solver_status)
-        for component in list(nx.connected_components(graph)):
+    links = solver_status.links.sync(board)
+    for value in solver_status.journal.changed_digits(simple_colors.__name__):
+        graph = _build_graph(value, links)
+        for component in graph.connected_components():
             c_chain = _get_c_chain(graph, component, value)
             if _color_wrap():
                 return kwargs
@@ -459,7 +300,6 @@ def multi_colors(solver_status, board, window):
     https://www.sudopedia.org/wiki/Multi-Colors
      Ranking of the methods is at the level of 200 ('Hard')
     """
-
     def _check_components(component_ids):
         components = [all_components[component_ids[0]], all_components[component_ids[1]]]
         c_chains = [_get_c_chain(graph, components[0], value, colors=('lime', 'yellow')),
@@ -475,13 +315,13 @@ def multi_colors(solver_status, board, window):
 
     def _find_color_wrap(components, c_chains, m_id, s_id):
         color_nodes = _get_color_nodes(c_chains[m_id], value)
-        s_edges = {edge for edge in graph.edges if edge[0] in components[s_id]}
+        s_edges = {edge for edge in graph.edges() if edge[0] in components[s_id]}
         for edge in s_edges:
             for color in color_nodes:
                 see_color_nodes_a = color_nodes[color].intersection(ALL_NBRS[edge[0]])
                 see_color_nodes_b = color_nodes[color].intersection(ALL_NBRS[edge[1]])
                 if see_color_nodes_a and see_color_nodes_b:
-                    edges = {edge for edge in graph.edges if edge[0] in components[m_id].union(components[s_id])}
+                    edges = {edge for edge in graph.edges() if edge[0] in components[m_id].union(components[s_id])}
                     to_eliminate = {(value, node) for node in color_nodes[color]}
                     solver_status.capture_baseline(board, window)
                     if window:
@@ -522,7 +362,7 @@ def multi_colors(solver_status, board, window):
                                 impacted_cells.add(cell)
                                 to_eliminate.append((value, cell))
                         if to_eliminate:
-                            edges = [edge for edge in graph.edges
+                            edges = [edge for edge in graph.edges()
                                      if edge[0] in components[0].union(components[1])]
                             solver_status.capture_baseline(board, window)
                             if window:
@@ -539,9 +379,10 @@ def multi_colors(solver_status, board, window):
         return False
 
     kwargs = {}
-    for value in SUDOKU_VALUES_LIST:
-        graph = _build_graph(value, board, solver_status)
-        all_components = list(nx.connected_components(graph))
+    links = solver_status.links.sync(board)
+    for value in solver_status.journal.changed_digits(multi_colors.__name__):
+        graph = _build_graph(value, links)
+        all_components = graph.connected_components()
         if len(all_components) > 1:
             for ids in combinations(range(len(all_components)), 2):
                 if _check_components(ids):
@@ -616,9 +457,10 @@ def x_colors(solver_status, board, window):
         return False
 
     kwargs = {}
-    for value in SUDOKU_VALUES_LIST:
-        graph = _build_graph(value, board, solver_status)
-        for component in list(nx.connected_components(graph)):
+    links = solver_status.links.sync(board)
+    for value in solver_status.journal.changed_digits(x_colors.__name__):
+        graph = _build_graph(value, links)
+        for component in graph.connected_components():
             c_chain = _get_c_chain(graph, component, value, colors=('yellow', 'lime'))
             color_nodes = _get_color_nodes(c_chain, value)
             with_value = {cell for cell in range(81) if value in board[cell] and len(board[cell]) > 1}
@@ -646,7 +488,7 @@ def x_colors(solver_status, board, window):
             to_eliminate = set()
             impacted_cells = set()
             if _contradiction(to_eliminate) or _elimination(to_eliminate):
-                edges = {edge for edge in graph.edges if edge[0] in component}
+                edges = {edge for edge in graph.edges() if edge[0] in component}
                 show_options = with_value.union(_get_graph_houses(edges))
                 kwargs["c_chain"] = c_chain
                 kwargs["edges"] = edges
@@ -674,7 +516,6 @@ def three_d_medusa(solver_status, board, window):
      - uncolored candidate can see a colored one, and an oppositely colored candidate in the same cell
      Ranking of the method is at the level of 320 - 380
     """
-
     def _paint_bi_value_cells(links):
         for cell in bi_value_cells:
             if cell in c_chain and len(c_chain[cell]) == 1:
@@ -801,13 +642,14 @@ def three_d_medusa(solver_status, board, window):
         return True if to_be_removed else False
 
     kwargs = {}
+    links = solver_status.links.sync(board)
+    strong_links = links.strong_links()
     for value in SUDOKU_VALUES_LIST:
-        graph = _build_graph(value, board, solver_status)
-        for component in list(nx.connected_components(graph)):
+        graph = _build_graph(value, links)
+        for component in graph.connected_components():
             bi_value_cells = {cell for cell in range(81) if len(board[cell]) == 2}
-            strong_links = get_strong_links(board)
             c_chain = _get_c_chain(graph, component, value, colors=('yellow', 'lime'))
-            edges = {edge for edge in graph.edges if edge[0] in component}
+            edges = {edge for edge in graph.edges() if edge[0] in component}
             colored_nodes = defaultdict(dict)
             colored_nodes[value] = _get_color_nodes(c_chain, value)
             additional_links = _paint_bi_value_cells(set())
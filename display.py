@@ -5,10 +5,10 @@
 import os
 from pathlib import Path
 import collections
-import numpy as np
-import matplotlib.pyplot as plt
 from tabulate import tabulate
 
+from instrumentation import export_statistics
+
 screen_messages = {
     None: "",
     "plain_board": " ",
@@ -226,15 +226,22 @@ def _output_results(config, output_lines):
         output_lines.insert(0, "\n")
     config["output_opts"]["header_line"] = True
 
-    if config["write_to_log"]:
-        with open(config["log_fname"], "a") as logfile:
-            for line in output_lines:
-                logfile.write(line)
+    if config["write_to_log"] and config["output_buffer"] is not None:
+        config["output_buffer"].extend(output_lines)
+    elif config["write_to_log"]:
+        write_to_log(config, output_lines)
     else:
         for line in output_lines:
             print(line, end="")
 
 
+def write_to_log(config, output_lines):
+    """ append output lines to the log file """
+    with open(config["log_fname"], "a") as logfile:
+        for line in output_lines:
+            logfile.write(line)
+
+
 def results(config, data, solver_ret_code):
     """ Output results of single run of the solver"""
 
@@ -256,6 +263,10 @@ def _one_puzzle_one_run_results(config, data, solver_ret_code):
             output_lines.append(
                 "Number of iterations:   %4d\n" % (data["iter_counter"])
             )
+            if config["dlx"]:
+                output_lines.append("DLX search nodes:     %6d\n" % (data["dlx_nodes"]))
+                output_lines.append("DLX solutions found:    %4s\n" % (
+                    ("unique" if data["dlx_solutions"] == 1 else "many") if data["dlx_solutions"] else "-"))
         else:
             output_lines.append("Done!\n")
     else:
@@ -463,7 +474,7 @@ def _digit_to_str(digit):
 
 
 def _show_shortest_routes(data, multi_paths, output_lines):
-    unique_routes = _shortest_routes(data)
+    unique_routes = list(data["repeat_stats"].shortest_paths.values())
     if multi_paths or len(unique_routes) > 1:
         output_lines.append(
             "\n\nShortest found path{:s} that solve{:s} this sudoku:\n".format(
@@ -491,29 +502,24 @@ def _show_shortest_routes(data, multi_paths, output_lines):
 def _show_paths_stats(config, data, output_lines):
     output_lines.append("\nIterations number statistic:\n")
     output_lines.append("-" * (len(output_lines[-1]) - 2) + "\n")
-    run_stats = {}
-    for steps in data["iterations"]:
-        if steps in run_stats:
-            run_stats[steps] += 1
-        else:
-            run_stats[steps] = 1
-    if len(run_stats) == 1:
+    repeat_stats = data["repeat_stats"]
+    if len(repeat_stats.runs) == 1:
         return False
 
     if not (config["puzzles_list"] or config["write_to_log"]):
         config["output_opts"]["plot_paths_stats"] = True
-    l_runs = sorted(list(run_stats.keys()))
+    l_runs = sorted(repeat_stats.runs)
     output_lines.append("\nIterations:   Runs:  Unique paths:\n")
     for steps in l_runs:
         output_lines.append(
             "{:^10d}    {:^5d}       {:<4d}\n".format(
-                steps, run_stats[steps], _get_unique_routes(data, steps)
+                steps, repeat_stats.runs[steps], repeat_stats.unique_paths(steps)
             )
         )
         if config["output_opts"]["plot_paths_stats"]:
             data["stat_iterations"].append(steps)
-            data["stat_runs"].append(run_stats[steps])
-            data["stat_unique_paths"].append(_get_unique_routes(data, steps))
+            data["stat_runs"].append(repeat_stats.runs[steps])
+            data["stat_unique_paths"].append(repeat_stats.unique_paths(steps))
 
     return True
 
@@ -526,6 +532,8 @@ def methods_statistics(config, data, solving_methods):
     output_lines.append(f'puzzles required iteration:   {data["iterated"]}\n')
     output_lines.append(f'maximum number of iterations: {data["max_iterations"]}\n')
     output_lines.append(f'total number of iterations:   {data["tot_iterations"]}\n')
+    if config["cache"]:
+        output_lines.append(f'puzzles found in cache:       {data["cache_hits"]}\n')
     tot_solving_time = int(data["tot_solution_time"])
     hrs = tot_solving_time // 3600
     min_time = (tot_solving_time // 60) % 60
@@ -535,6 +543,7 @@ def methods_statistics(config, data, solving_methods):
     table = []
     print()     # TODO - temporary only!
     for solving_method in solving_methods:
+        latencies = solving_method[1].stats.latencies()
         table.append([solving_method[0],
                       solving_method[1].calls,
                       solving_method[1].options_removed + solving_method[1].clues,
@@ -544,27 +553,45 @@ def methods_statistics(config, data, solving_methods):
                       (solving_method[1].options_removed + solving_method[1].clues) / solving_method[1].calls
                       if solving_method[1].calls > 0 else 0.0,
                       (solving_method[1].options_removed + solving_method[1].clues) / solving_method[1].time_in
-                      if solving_method[1].time_in > 0 else 0.0])
+                      if solving_method[1].time_in > 0 else 0.0,
+                      latencies.percentile(50) / 1e6,
+                      latencies.percentile(99) / 1e6])
         # print(f'{table[-1][0]}, :, {table[-1][2]}, {table[-1][5]}, {table[-1][6]}, {table[-1][7]}')
     _output_results(config, output_lines)
 
     headers = ["method", "method\ncalls", "  total\nhits", "options\nremoved", "  clues\nfound", "   time spent\n(sec)",
-               "effectiveness\n(hits/call)", "   efficiency\n(hits/s)"]
+               "effectiveness\n(hits/call)", "   efficiency\n(hits/s)", "latency p50\n(ms)", "latency p99\n(ms)"]
     print()
     print(tabulate(table, headers, tablefmt="simple", floatfmt=".5f"))
 
 
+def export_methods_statistics(config, solving_methods):
+    """ Export latency percentiles and eliminations statistics of sudoku solving methods
+    to config["stats_export"] file (JSON or CSV - see instrumentation.export_statistics()) """
+    export_statistics(config["stats_export"], [solving_method[1].stats for solving_method in solving_methods])
+    print(f'\nSolution methods statistics exported to: {config["stats_export"]}')
+
+
+def validation_summary(config, summary):
+    """ Display numbers of validated puzzles by their status (see validation.validate_puzzles()) """
+    print(f'\nPuzzles validated: {sum(summary.values())}')
+    for status, count in summary.items():
+        print(f'  {status}: {count}')
+    print(f'Status of the puzzles written to: {config["validate"]}')
+
+
 def solver_statistics(config, data):
     """ Output statistics of multiple solver runs """
+    repeat_stats = data["repeat_stats"]
     res_time_stat = []
     iter_stat = []
 
-    res_time_stat.append(1000.0 * sum(data["res_times"]) / float(config["repeat"]))
-    res_time_stat.append(1000.0 * min(data["res_times"]))
-    res_time_stat.append(1000.0 * max(data["res_times"]))
-    iter_stat.append(int(sum(data["iterations"]) / float(config["repeat"])))
-    iter_stat.append(min(data["iterations"]))
-    iter_stat.append(max(data["iterations"]))
+    res_time_stat.append(1000.0 * repeat_stats.time_total / float(config["repeat"]))
+    res_time_stat.append(1000.0 * repeat_stats.time_min)
+    res_time_stat.append(1000.0 * repeat_stats.time_max)
+    iter_stat.append(int(repeat_stats.iterations_total / float(config["repeat"])))
+    iter_stat.append(repeat_stats.iterations_min)
+    iter_stat.append(repeat_stats.iterations_max)
 
     output_lines = []
     if config["puzzles_list"]:
@@ -618,33 +645,8 @@ def total_execution_time(config, tot_time):
     _output_results(config, output_lines)
 
 
-def _shortest_routes(data):
-    """ select and return set of unique routes of the shortest length """
-    routes_dict = {}
-    for item in data["shortest_paths"]:
-        if item[0] not in routes_dict.keys():
-            routes_dict[item[0]] = []
-        routes_dict[item[0]].append((item[1:]))
-    unique_routes = set()
-    for key in routes_dict:
-        unique_routes.add(tuple(routes_dict[key]))
-    return unique_routes
-
-
-def _get_unique_routes(data, route_len):
-    """ return number of unique routes of length 'route_len' """
-    routes_dict = {}
-    for item in data["all_paths"][route_len]:
-        if item[0] not in routes_dict.keys():
-            routes_dict[item[0]] = []
-        routes_dict[item[0]].append((item[1:]))
-    unique_routes = set()
-    for key in routes_dict:
-        unique_routes.add(tuple(routes_dict[key]))
-    return len(unique_routes)
-
-
 def _set_x_axis(data, bar_width):
+    import numpy as np
     max_iters = data["stat_iterations"][-1]
     step = max(max_iters // 8, 1)
     if max_iters % step:
@@ -657,6 +659,9 @@ def _set_x_axis(data, bar_width):
 def plot_paths_stats(config, data):
     """plot bar chart of the number of iterations frequency and
     related number of unique solution paths"""
+    import numpy as np
+    import matplotlib.pyplot as plt
+
     nb_iterations = np.asarray(data["stat_iterations"])
     iter_frequency = np.asarray(data["stat_runs"]) * 100.0 / config["repeat"]
     bar_width = 0.3
@@ -686,6 +691,9 @@ def plot_paths_stats(config, data):
 
 def plot_sel_stats_1(data):
     """ plot statistics related to iteration cell/options selection effectiveness """
+    import numpy as np
+    import matplotlib.pyplot as plt
+
     nb_iterations = np.asarray(range(1, data["stat_iterations"][-1] + 1))
     zeros = [0.0 for _ in range(data["stat_iterations"][-1] + 1)]
     y_less = np.asarray(zeros)
@@ -726,6 +734,8 @@ def plot_sel_stats_1(data):
 
 def plot_sel_stats_2(data):
     """ plot statistics related to iteration cell/options selection effectiveness """
+    import numpy as np
+    import matplotlib.pyplot as plt
 
     nb_iterations = np.asarray(range(1, data["stat_iterations"][-1] + 1))
     zeros = [0.0 for _ in range(data["stat_iterations"][-1] + 1)]
@@ -0,0 +1,126 @@
+# -*- coding: UTF-8 -*-
+
+""" EXACT COVER (KNUTH'S ALGORITHM X / DANCING LINKS) SUDOKU SOLVER
+
+    CLASS DEFINITIONS:
+        DlxResult - named tuple: (solution, count, nodes)
+
+    GLOBAL FUNCTIONS:
+        solve() - finds solution(s) of the sudoku board by solving the exact cover problem
+
+    LOCAL FUNCTIONS:
+        _get_rows() - returns exact cover matrix rows (candidate placements) of the board
+        _select() - covers all columns of the selected row
+        _deselect() - uncovers columns covered by _select() in reverse order
+        _search() - Algorithm X recursive search
+
+    IMPORTANT DATA STRUCTURES:
+        row id: cell * 9 + digit_id - placement of the digit (digit_id = digit - 1) in the cell
+        column id (constraint):
+            0 - 80: the cell has a value
+            81 - 161: row has the digit (81 + row * 9 + digit_id)
+            162 - 242: column has the digit (162 + col * 9 + digit_id)
+            243 - 323: box has the digit (243 + box * 9 + digit_id)
+        columns: {column_id: {row_id, ...}, ...} - rows covering the column (not yet covered columns only)
+        rows: {row_id: (column_id, ...), ...} - the four columns covered by the row
+
+    The links are 'danced' on column sets: covering a column removes its set from 'columns'
+    and the conflicting rows from the sets of other columns; uncovering restores them in reverse order.
+    Unlike the standard techniques the solver doesn't update the board while searching - it is fast
+    enough to be used as the solver fallback (instead of brute force iterations) or as a standalone solver
+"""
+
+from collections import namedtuple
+
+DlxResult = namedtuple("DlxResult", ["solution", "count", "nodes"])
+
+_ROW_COLUMNS = tuple((cell, 81 + cell // 9 * 9 + digit_id, 162 + cell % 9 * 9 + digit_id,
+                      243 + (cell // 27 * 3 + cell % 9 // 3) * 9 + digit_id)
+                     for cell in range(81) for digit_id in range(9))
+
+
+def _get_rows(board):
+    """ return rows (candidate placements) and row ids of cells already set on the board
+    Cells with one digit are taken as set, cells with '.' may have any digit,
+    other cells - any digit of their candidates
+    """
+    rows = {}
+    preset = []
+    for cell in range(81):
+        candidates = board[cell]
+        if candidates == ".":
+            candidates = "123456789"
+        elif len(candidates) == 1:
+            preset.append(cell * 9 + int(candidates) - 1)
+        for digit in candidates:
+            row_id = cell * 9 + int(digit) - 1
+            rows[row_id] = _ROW_COLUMNS[row_id]
+    return rows, preset
+
+
+def _select(columns, rows, row_id):
+    covered = []
+    for column_id in rows[row_id]:
+        for other_row in columns[column_id]:
+            for other_column in rows[other_row]:
+                if other_column != column_id:
+                    columns[other_column].discard(other_row)
+        covered.append(columns.pop(column_id))
+    return covered
+
+
+def _deselect(columns, rows, row_id, covered):
+    for column_id in reversed(rows[row_id]):
+        columns[column_id] = covered.pop()
+        for other_row in columns[column_id]:
+            for other_column in rows[other_row]:
+                if other_column != column_id:
+                    columns[other_column].add(other_row)
+
+
+def _search(columns, rows, partial, stats, limit):
+    """ Algorithm X: always branch on the column with the fewest rows """
+    if not columns:
+        stats["count"] += 1
+        if stats["solution"] is None:
+            stats["solution"] = partial.copy()
+        return stats["count"] >= limit
+    column_id = min(columns, key=lambda column: len(columns[column]))
+    for row_id in sorted(columns[column_id]):
+        stats["nodes"] += 1
+        partial.append(row_id)
+        covered = _select(columns, rows, row_id)
+        done = _search(columns, rows, partial, stats, limit)
+        _deselect(columns, rows, row_id, covered)
+        partial.pop()
+        if done:
+            return True
+    return False
+
+
+def solve(board, limit=2):
+    """ Find solution of the sudoku board (list of 81 strings: digits, candidates or '.')
+    The search stops after 'limit' solutions are found, so with the default limit
+    the returned count (0, 1 or 2) tells if the puzzle has no, unique or multiple solutions
+    Returns: DlxResult: solution (list of 81 digits; None if count is 0),
+     number of solutions found, and number of search tree nodes
+    """
+    rows, preset = _get_rows(board)
+    columns = {column_id: set() for column_id in range(324)}
+    for row_id, row_columns in rows.items():
+        for column_id in row_columns:
+            columns[column_id].add(row_id)
+
+    for row_id in preset:
+        if any(column_id not in columns for column_id in rows[row_id]):
+            return DlxResult(None, 0, 0)
+        _select(columns, rows, row_id)
+
+    stats = {"solution": None, "count": 0, "nodes": 0}
+    _search(columns, rows, preset, stats, limit)
+    solution = None
+    if stats["solution"] is not None:
+        solution = ["."] * 81
+        for row_id in stats["solution"]:
+            solution[row_id // 9] = str(row_id % 9 + 1)
+    return DlxResult(solution, stats["count"], stats["nodes"])
@@ -2,6 +2,10 @@
 
 """ 'SUBSETS' CLASS OF SOLVING METHODS
 
+    CLASS DEFINITIONS:
+        Fish - named tuple: fish pattern of a digit (see IMPORTANT DATA STRUCTURES)
+        FishIndex - basic, finned and sashimi fish of the board by digit, type, size and direction
+
     GLOBAL FUNCTIONS:
         x_wing() - 'X-Wing' sudoku solving strategy
         swordfish() - 'Swordfish' sudoku solving strategy
@@ -14,23 +18,47 @@
 
     LOCAL FUNCTIONS:
         _get_impacted_lines() - return unsolved cells in impacted lines (based on 'to_eliminate' data)
-        _get_fin_box() - return set of cells of the 'finned' box
+        _get_line_cells() - return cells of the crossing points of base and cover lines
+        _find_fishes() - finds fish patterns of a digit in one enumeration of base lines
+        _apply_fish() - applies the first fish (all basic fish in batch mode) of the index
         _fish() - generic 'fish' solving strategy
         _finned_fish() - generic 'finned fish' solving strategy
         _sashimi_fish() - generic 'sashimi fish' solving strategy
 
     IMPORTANT DATA STRUCTURES:
         'chain_a':  {node: {(candidate, color), ...}, ...}
-        'lines': {row: {col1, ...}, ...} if 'by_row', {column: {row1,...}, ...} otherwise
+        lines: [positions mask of the digit in the line for each of 9 rows if 'by_row', columns otherwise]
+            - bit y of the row (column) mask is set if the digit is in column (row) y
+        Fish(lines, impacted, eliminate):
+            lines - ids of the base lines (rows if 'by_row', columns otherwise)
+            impacted - cells of the cover lines outside the base lines (for finned and sashimi fish
+                only the ones in the fin box)
+            eliminate - impacted cells with the digit
+        fishes: {(fish type, size, by_row): [Fish, ...], ...} - fish of a digit with eliminations,
+            in the order of itertools.combinations() of the base lines
+
+    Base lines of a digit are enumerated once, depth first, as 9-bit masks: a combination of lines
+    is cut as soon as its cover lines are too many for any fish. Each combination is checked
+    for basic, finned and sashimi fish of its size. The fish are kept per digit and looked for again
+    only for digits changed since the previous index update, so the fish strategies
+    (12 of them: 3 types by 4 sizes) share one enumeration
 """
 
-from itertools import combinations
 from collections import defaultdict, namedtuple
 
-from utils import CELL_BOX, CELLS_IN_ROW, CELLS_IN_COL, CELLS_IN_BOX, SUDOKU_VALUES_LIST, CELL_COL, CELL_ROW
-from utils import set_remaining_candidates, eliminate_options, get_stats, get_2_upto_n_candidates
+from utils import CELLS_IN_ROW, CELLS_IN_COL, CELL_COL, CELL_ROW, SUDOKU_VALUES_LIST
+from utils import set_remaining_candidates, eliminate_options, get_stats, apply_batch
+from bit_board import ROW_HOUSES, COL_HOUSES, mask_positions, popcount
+
+Fish = namedtuple("Fish", ["lines", "impacted", "eliminate"])
 
-Fin = namedtuple("Fin", ["x_id", "y_id"])
+_BASIC = "basic"
+_FINNED = "finned"
+_SASHIMI = "sashimi"
+_MIN_FISH_SIZE = 2
+_MAX_FISH_SIZE = 5
+_MAX_COVER = _MAX_FISH_SIZE + 2     # finned fish may have two fins outside its cover lines
+_BAND_MASK = tuple(0b111 << (3 * (idx // 3)) for idx in range(9))   # lines of the same band (stack) of boxes
 
 
 def _get_impacted_lines(to_eliminate, by_row, board):
@@ -40,244 +68,180 @@ def _get_impacted_lines(to_eliminate, by_row, board):
         return {cell for _, idx in to_eliminate for cell in CELLS_IN_ROW[CELL_ROW[idx]] if len(board[cell]) > 1}
 
 
-def _get_fin_box(fin, by_row):
-    return set(CELLS_IN_BOX[CELL_BOX[fin.x_id * 9 + fin.y_id if by_row else fin.y_id * 9 + fin.x_id]])
+def _get_line_cells(x_ids, y_mask, by_row):
+    """ return cells of the crossing points of the lines (rows if 'by_row') and the y lines of the mask """
+    y_ids = mask_positions(y_mask)
+    if by_row:
+        return tuple(x_id * 9 + y_id for x_id in x_ids for y_id in y_ids)
+    return tuple(y_id * 9 + x_id for x_id in x_ids for y_id in y_ids)
+
+
+def _find_fishes(lines, by_row, fishes):
+    """ find basic, finned and sashimi fish of sizes 2 - 5 in the lines (positions masks of a digit)
+    and add the ones with eliminations to 'fishes' """
+
+    def _add(kind, x_ids, impacted):
+        eliminate = tuple(cell for cell in impacted
+                          if lines[cell // 9 if by_row else cell % 9] >> (cell % 9 if by_row else cell // 9) & 1)
+        if eliminate:
+            fishes[kind, len(x_ids), by_row].append(Fish(tuple(x_ids), impacted, eliminate))
+
+    def _fin_box_cells(x_ids, fin_x, fin_mask, y_mask):
+        """ return cells of the fin box in the y lines of the mask, outside the base lines """
+        box_x_ids = [x_id for x_id in mask_positions(_BAND_MASK[fin_x]) if x_id not in x_ids]
+        return _get_line_cells(box_x_ids, y_mask & _BAND_MASK[mask_positions(fin_mask)[0]], by_row)
+
+    def _check(x_ids, cover):
+        size = len(x_ids)
+        cover_size = popcount(cover)
+        max_count = max(popcount(lines[x_id]) for x_id in x_ids)
+        once, twice, thrice = 0, 0, 0
+        for x_id in x_ids:
+            thrice |= twice & lines[x_id]
+            twice |= once & lines[x_id]
+            once |= lines[x_id]
+        only_once = once & ~twice
+
+        if max_count <= size and cover_size == size:
+            other_x_ids = [x_id for x_id in range(9) if x_id not in x_ids]
+            _add(_BASIC, x_ids, _get_line_cells(other_x_ids, cover, by_row))
+
+        if max_count <= size + 2 and cover_size in (size + 1, size + 2):
+            fins = []
+            for x_id in x_ids:
+                if popcount(lines[x_id]) > 2:
+                    fin_mask = 0
+                    for y_id in mask_positions(lines[x_id] & only_once):
+                        if popcount(lines[x_id] & _BAND_MASK[y_id]) > 1:
+                            fin_mask |= 1 << y_id
+                    if fin_mask:
+                        fins.append((x_id, fin_mask))
+            if len(fins) == 1:
+                fin_x, fin_mask = fins[0]
+                fins_count = popcount(fin_mask)
+                if cover_size == size + 1 and fins_count == 1 or cover_size == size + 2 and fins_count == 2 and \
+                        fin_mask & _BAND_MASK[mask_positions(fin_mask)[0]] == fin_mask:
+                    y_mask = cover & ~fin_mask
+                    if all(popcount(lines[x_id] & y_mask) > 1 for x_id in x_ids) and not y_mask & ~twice:
+                        _add(_FINNED, x_ids, _fin_box_cells(x_ids, fin_x, fin_mask, y_mask))
+
+        if max_count <= size + 1 and cover_size in (size, size + 1):
+            impacted = []
+            for x_id in x_ids:
+                fin_mask = 0
+                for y_id in mask_positions(lines[x_id] & only_once):
+                    if _BAND_MASK[y_id] & ~(1 << y_id) & cover:
+                        fin_mask |= 1 << y_id
+                fins_count = popcount(fin_mask)
+                if fins_count == 1 or fins_count == 2 and \
+                        fin_mask & _BAND_MASK[mask_positions(fin_mask)[0]] == fin_mask:
+                    y_mask = cover & ~fin_mask
+                    if y_mask & ~(twice & ~thrice):
+                        impacted.extend(cell for cell in _fin_box_cells(x_ids, x_id, fin_mask, y_mask)
+                                        if cell not in impacted)
+            _add(_SASHIMI, x_ids, tuple(impacted))
+
+    def _extend(start, x_ids, cover):
+        for idx in range(start, len(base_lines)):
+            x_id = base_lines[idx]
+            line_cover = cover | lines[x_id]
+            if popcount(line_cover) <= _MAX_COVER:
+                x_ids.append(x_id)
+                if len(x_ids) >= _MIN_FISH_SIZE:
+                    _check(x_ids, line_cover)
+                if len(x_ids) < _MAX_FISH_SIZE:
+                    _extend(idx + 1, x_ids, line_cover)
+                x_ids.pop()
+
+    base_lines = [x_id for x_id in range(9) if 1 < popcount(lines[x_id]) <= _MAX_COVER]
+    _extend(0, [], 0)
+
+
+class FishIndex:
+    """ Fish patterns (with eliminations) of the board, kept per digit """
+
+    def __init__(self):
+        self.journal = None
+        self.stamp = -1
+        self.digit_fishes = {}
+
+    def update(self, solver_status, board):
+        """ bring the index up to date with the board, return the index """
+        journal = solver_status.journal
+        if journal is self.journal and journal.counter == self.stamp:
+            return self
+        positions = solver_status.positions.sync(board)
+        for digit in SUDOKU_VALUES_LIST:
+            if journal is not self.journal or journal.digit_stamps[digit] > self.stamp:
+                fishes = defaultdict(list)
+                for by_row in (True, False):
+                    first_house = ROW_HOUSES if by_row else COL_HOUSES
+                    _find_fishes([positions.get(first_house + x_id, digit) for x_id in range(9)], by_row, fishes)
+                self.digit_fishes[digit] = fishes
+        self.journal = journal
+        self.stamp = journal.counter
+        return self
+
+    def fishes(self, kind, size, by_row, digit):
+        """ return list of Fish of the digit """
+        return self.digit_fishes[digit].get((kind, size, by_row), ())
+
+
+_fish_index = FishIndex()
+
+
+def _apply_fish(solver_status, board, window, strategy, kind, size):
+    """ Generic 'fish' technique: apply the first fish of the type and size found in the index
+    (all basic fish in batch mode) """
+    set_remaining_candidates(board, solver_status)
+    index = _fish_index.update(solver_status, board)
+    batch = set()
+    for by_row in (True, False):
+        for value in solver_status.journal.changed_digits(strategy.__name__):
+            for fish in index.fishes(kind, size, by_row, value):
+                to_eliminate = {(value, cell) for cell in fish.eliminate}
+                if kind == _BASIC and solver_status.batch:
+                    batch.update(to_eliminate)
+                    continue
+                kwargs = {}
+                cells = CELLS_IN_ROW if by_row else CELLS_IN_COL
+                houses = {cell for x_id in fish.lines for cell in cells[x_id]}
+                if window:
+                    solver_status.capture_baseline(board, window)
+                    impacted = _get_impacted_lines(to_eliminate, by_row, board) if kind == _BASIC else \
+                        {cell for cell in fish.impacted if len(board[cell]) > 1}
+                    window.options_visible = window.options_visible.union(houses).union(
+                        impacted if kind == _SASHIMI else fish.impacted)
+                    kwargs["house"] = impacted.union(houses)
+                eliminate_options(solver_status, board, to_eliminate, window)
+                strategy.clues += len(solver_status.naked_singles)
+                strategy.options_removed += len(to_eliminate)
+                kwargs["solver_tool"] = strategy.__name__
+                if window:
+                    kwargs["chain_a"] = {cell: {(value, 'cyan')} for cell in houses if value in board[cell]}
+                    kwargs["eliminate"] = to_eliminate
+                return kwargs
+    if batch:
+        return apply_batch(solver_status, board, batch, strategy)
+    return None
 
 
 def _fish(solver_status, board, window, n):
     """ Generic 'fish' technique """
-
-    fish_strategies = {2: (x_wing, 100),
-                       3: (swordfish, 140),
-                       4: (jellyfish, 470),
-                       5: (squirmbag, 470), }
-
-    def _get_chain(candidate, cells, primary_ids):
-        nodes = {cell for idx in primary_ids for cell in cells[idx] if candidate in board[cell]}
-        return {node: {(candidate, 'cyan')} for node in nodes}
-
-    def _find_fish(by_row):
-        for value in SUDOKU_VALUES_LIST:
-            lines = get_2_upto_n_candidates(board, value, n, by_row)
-            if len(lines) >= n:
-                for x_ids in combinations((id_x for id_x in lines), n):
-                    y_ids = set(id_y for id_x in x_ids for id_y in lines[id_x])
-                    if len(y_ids) == n:
-                        cells = CELLS_IN_COL if by_row else CELLS_IN_ROW
-                        impacted_cells = {cell for id_y in y_ids for cell in cells[id_y]}
-                        cells = CELLS_IN_ROW if by_row else CELLS_IN_COL
-                        houses = {cell for id_x in x_ids for cell in cells[id_x]}
-                        impacted_cells = impacted_cells.difference(houses)
-                        to_eliminate = {(value, cell) for cell in impacted_cells if value in board[cell]}
-                        if to_eliminate:
-                            if window:
-                                solver_status.capture_baseline(board, window)
-                            kwargs["solver_tool"] = fish_strategies[n][0].__name__
-                            eliminate_options(solver_status, board, to_eliminate, window)
-                            fish_strategies[n][0].clues += len(solver_status.naked_singles)
-                            fish_strategies[n][0].options_removed += len(to_eliminate)
-                            if window:
-                                impacted = _get_impacted_lines(to_eliminate, by_row, board)
-                                window.options_visible = window.options_visible.union(houses).union(impacted_cells)
-                                kwargs["chain_a"] = _get_chain(value, cells, x_ids)
-                                kwargs["eliminate"] = to_eliminate
-                                kwargs["house"] = impacted.union(houses)
-                            return True
-        return False
-
-    set_remaining_candidates(board, solver_status)
-    kwargs = {}
-    if _find_fish(True) or _find_fish(False):
-        return kwargs
-    return None
+    fish_strategies = {2: x_wing, 3: swordfish, 4: jellyfish, 5: squirmbag, }
+    return _apply_fish(solver_status, board, window, fish_strategies[n], _BASIC, n)
 
 
 def _finned_fish(solver_status, board, window, n):
     """ Generic 'finned fish' technique """
-
-    fish_strategies = {2: (finned_x_wing, 130),
-                       3: (finned_swordfish, 200),
-                       4: (finned_jellyfish, 240),
-                       5: (finned_squirmbag, 470),
-                       }
-
-    def _get_fish_nodes(candidate, cells, x_ids):
-        nodes = {cell for x_id in x_ids for cell in cells[x_id] if candidate in board[cell]}
-        return {node: {(candidate, 'cyan')} for node in nodes}
-
-    def _get_fins(lines, x_ids):
-        """ return dictionary of 'fins' {x_id: {y_id, ...}} """
-        y_ids = [id_y for id_x in x_ids for id_y in lines[id_x]]
-        fins = defaultdict(set)
-        for x_id in x_ids:
-            if len(lines[x_id]) > 2:
-                for y_id in lines[x_id]:
-                    if y_ids.count(y_id) == 1:
-                        box_y0 = (y_id // 3) * 3
-                        box_ys = {box_y0, box_y0 + 1, box_y0 + 2}
-                        if len(box_ys.intersection(lines[x_id])) > 1:
-                            fins[x_id].add(y_id)
-        return fins
-
-    def _check_if_finned(lines, x_ids, y_ids):
-        """ check if this is finned fish """
-
-        for x_id in x_ids:                          # check X - lines
-            line_nodes = {y_id for y_id in lines[x_id] if y_id in y_ids}
-            if len(line_nodes) < 2:
-                return False
-
-        ys_counter = {y_id: 0 for y_id in y_ids}    # check Y - lines
-        assert len(ys_counter) == n
-        for x_id in x_ids:
-            for y_id in ys_counter:
-                if y_id in lines[x_id]:
-                    ys_counter[y_id] += 1
-        for y_id in ys_counter:
-            if ys_counter[y_id] < 2:
-                break
-        else:
-            return True
-        return False
-
-    def _find_finned_fish(by_row):
-        """ TODO: Interestingly, as it is implemented the algorithm includes cells of
-        other Y-lines if they cross the fin box (they should be only cells
-        of the Y-line going through (x_id, y_id) node that is 'finned'.
-        However, no issues were found that contradict such implementation of the method """
-        for candidate in SUDOKU_VALUES_LIST:
-            lines = get_2_upto_n_candidates(board, candidate, n+2, by_row)
-            if len(lines) >= n:
-                for x_ids in combinations(lines, n):
-                    y_ids = set(y_id for x_id in x_ids for y_id in lines[x_id])
-                    if len(y_ids) in (n+1, n+2) and len(fins := _get_fins(lines, x_ids)) == 1:
-                        fin_x = set(fins).pop()
-                        fin_ys = list(fins[fin_x])
-                        fin_box = _get_fin_box(Fin(fin_x, fin_ys[0]), by_row)
-                        if len(y_ids) == n+1 and len(fin_ys) == 1 or \
-                                len(y_ids) == n+2 and len(fin_ys) == 2 and \
-                                _get_fin_box(Fin(fin_x, fin_ys[1]), by_row) == fin_box:
-                            y_ids = {y_id for y_id in y_ids if y_id not in fin_ys}
-                            if _check_if_finned(lines, x_ids, y_ids):
-                                cells = CELLS_IN_COL if by_row else CELLS_IN_ROW
-                                impacted_cells = {cell for y_id in y_ids for cell in cells[y_id]}
-                                impacted_cells = impacted_cells.intersection(fin_box)
-                                cells = CELLS_IN_ROW if by_row else CELLS_IN_COL
-                                houses = {cell for x_id in x_ids for cell in cells[x_id]}
-                                impacted_cells = impacted_cells.difference(houses)
-                                to_eliminate = {(candidate, cell) for cell in impacted_cells
-                                                if candidate in board[cell]}
-                                if to_eliminate:
-                                    if window:
-                                        solver_status.capture_baseline(board, window)
-                                        window.options_visible = window.options_visible.union(
-                                            houses).union(impacted_cells)
-                                        impacted = {cell for cell in impacted_cells if len(board[cell]) > 1}
-                                        kwargs["house"] = impacted.union(houses)
-                                    eliminate_options(solver_status, board, to_eliminate, window)
-                                    fish_strategies[n][0].clues += len(solver_status.naked_singles)
-                                    fish_strategies[n][0].options_removed += len(to_eliminate)
-                                    kwargs["solver_tool"] = fish_strategies[n][0].__name__
-                                    if window:
-                                        kwargs["chain_a"] = _get_fish_nodes(candidate, cells, x_ids)
-                                        kwargs["eliminate"] = to_eliminate
-                                    return True
-        return False
-
-    set_remaining_candidates(board, solver_status)
-    kwargs = {}
-    if _find_finned_fish(True) or _find_finned_fish(False):
-        return kwargs
-    return None
+    fish_strategies = {2: finned_x_wing, 3: finned_swordfish, 4: finned_jellyfish, 5: finned_squirmbag, }
+    return _apply_fish(solver_status, board, window, fish_strategies[n], _FINNED, n)
 
 
 def _sashimi_fish(solver_status, board, window, n):
     """ Generic 'sashimi fish' technique """
-
-    fish_strategies = {2: (sashimi_x_wing, 150),
-                       3: (sashimi_swordfish, 240),
-                       4: (sashimi_jellyfish, 280),
-                       5: (sashimi_squirmbag, 470), }
-
-    def _get_fish_nodes(candidate, x_ids, by_row):
-        cells = CELLS_IN_ROW if by_row else CELLS_IN_COL
-        nodes = {cell for x_id in x_ids for cell in cells[x_id] if candidate in board[cell]}
-        return {node: {(candidate, 'cyan')} for node in nodes}
-
-    def _get_fins(lines, x_ids):
-        """ return dictionary of 'fins' {x_id: {y_id, ...}} """
-        y_ids = [y_id for x_id in x_ids for y_id in lines[x_id]]
-        fins = defaultdict(set)
-        for x_id in x_ids:
-            for y_id in lines[x_id]:
-                if y_ids.count(y_id) == 1:
-                    box_y0 = (y_id // 3) * 3
-                    other_box_ys = {box_y0, box_y0 + 1, box_y0 + 2}
-                    other_box_ys.remove(y_id)
-                    if other_box_ys.intersection(y_ids):
-                        fins[x_id].add(y_id)
-        return fins
-
-    def _check_if_sashimi(lines, x_ids, y_ids):
-        """ check if this is sashimi fish, not finned """
-        xs_counter = {y_id: 0 for y_id in y_ids}
-        for x_id in x_ids:
-            line = lines[x_id]
-            for y_id in xs_counter:
-                if y_id in line:
-                    xs_counter[y_id] += 1
-        for y_id in xs_counter:
-            if xs_counter[y_id] != 2:
-                break
-        else:
-            return False
-        return True
-
-    def _find_sashimi_fish(by_row):
-        for candidate in SUDOKU_VALUES_LIST:
-            lines = get_2_upto_n_candidates(board, candidate, n+1, by_row)
-            if len(lines) >= n:
-                for x_ids in combinations(lines, n):
-                    cells = CELLS_IN_ROW if by_row else CELLS_IN_COL
-                    houses = {cell for x_id in x_ids for cell in cells[x_id]}
-                    all_y_ids = set(idy for idx in x_ids for idy in lines[idx])
-                    if len(all_y_ids) in (n, n+1):
-                        if fins := _get_fins(lines, x_ids):
-                            impacted_cells = set()
-                            for fin_x in fins:
-                                fin_ys = list(fins[fin_x])
-                                fin_box = _get_fin_box(Fin(fin_x, fin_ys[0]), by_row)
-                                if len(fin_ys) == 1 or len(fin_ys) == 2 and \
-                                        _get_fin_box(Fin(fin_x, fin_ys[1]), by_row) == fin_box:
-                                    y_ids = {y_id for y_id in all_y_ids if y_id not in fin_ys}
-                                    if _check_if_sashimi(lines, x_ids, y_ids):
-                                        cells = CELLS_IN_COL if by_row else CELLS_IN_ROW
-                                        for y_id in y_ids:
-                                            if fin_box.intersection(cells[y_id]):
-                                                impacted_cells = impacted_cells.union(fin_box.intersection(cells[y_id]))
-                                        impacted_cells = impacted_cells.difference(houses)
-                            to_eliminate = {(candidate, cell) for cell in impacted_cells if candidate in board[cell]}
-                            if to_eliminate:
-                                if window:
-                                    solver_status.capture_baseline(board, window)
-                                    impacted = {cell for cell in impacted_cells if len(board[cell]) > 1}
-                                    window.options_visible = window.options_visible.union(houses).union(impacted)
-                                    kwargs["house"] = impacted.union(houses)
-                                eliminate_options(solver_status, board, to_eliminate, window)
-                                fish_strategies[n][0].clues += len(solver_status.naked_singles)
-                                fish_strategies[n][0].options_removed += len(to_eliminate)
-                                kwargs["solver_tool"] = fish_strategies[n][0].__name__
-                                if window:
-                                    kwargs["chain_a"] = _get_fish_nodes(candidate, x_ids, by_row)
-                                    kwargs["eliminate"] = to_eliminate
-                                return True
-        return False
-
-    set_remaining_candidates(board, solver_status)
-    kwargs = {}
-    if _find_sashimi_fish(True) or _find_sashimi_fish(False):
-        return kwargs
-    return None
+    fish_strategies = {2: sashimi_x_wing, 3: sashimi_swordfish, 4: sashimi_jellyfish, 5: sashimi_squirmbag, }
+    return _apply_fish(solver_status, board, window, fish_strategies[n], _SASHIMI, n)
 
 
 @get_stats
@@ -0,0 +1,92 @@
+# -*- coding: UTF-8 -*-
+
+""" STATIC GEOMETRY OF THE SUDOKU GRID AS PRECOMPUTED TABLES
+
+    CLASS DEFINITIONS:
+        Intersection - named tuple: line/box intersection (see INTERSECTIONS)
+
+    GLOBAL FUNCTIONS:
+        mask_cells() - returns tuple of cells of the 81-bit cells mask
+        cells_mask() - returns 81-bit mask of the cells
+
+    IMPORTANT DATA STRUCTURES:
+        cells mask: bit n is set if cell n is in the set, e.g. {0, 10} -> 0b10000000001
+        ALL_CELLS_MASK - cells mask of the whole grid
+        CELL_BIT[cell] - cells mask of the cell
+        HOUSE_MASK[house_id] - cells mask of the house (house ids as in bit_board.HOUSES)
+        PEERS_MASK[cell] - cells mask of the cell peers (cells sharing a house with it, the cell excluded)
+        COMMON_PEERS[cell_a][cell_b] - tuple of cells seeing both cells (the cells themselves excluded)
+        INTERSECTIONS - 54 line/box intersections (27 for rows and 27 for columns):
+            Intersection(line, box, cells, mask, line_rest, box_rest) - line and box house ids,
+            the three cells of the intersection, their mask, cells of the line outside the box
+            and cells of the box outside the line
+        LINE_BOX - {(line_house_id, box_house_id): Intersection, ...}
+        chute id: 0-2 for stacks (vertical chutes of boxes), 3-5 for bands (horizontal chutes)
+        CHUTE_CELLS[chute_id], CHUTE_MASK[chute_id] - cells (27) and cells mask of the chute
+        CHUTE_BOXES[chute_id], CHUTE_LINES[chute_id] - box ids (0-8) and column/row ids (0-8) of the chute
+        CELL_CHUTES[cell] - (stack chute id, band chute id) of the cell
+
+    The tables are generated once at import. Set operations on cells can be replaced with bitwise
+    'and'/'or' on the masks, and common peers of two cells are looked up instead of intersecting
+    sets of their neighbours
+"""
+
+from collections import namedtuple
+
+from bit_board import HOUSES, ROW_HOUSES, COL_HOUSES, BOX_HOUSES
+
+Intersection = namedtuple("Intersection", ["line", "box", "cells", "mask", "line_rest", "box_rest"])
+
+_BYTE_POSITIONS = tuple(tuple(position for position in range(8) if byte & (1 << position)) for byte in range(256))
+
+
+def mask_cells(mask):
+    """ return tuple of cells (in ascending order) of the 81-bit cells mask """
+    cells = []
+    offset = 0
+    while mask:
+        cells.extend(offset + position for position in _BYTE_POSITIONS[mask & 0xFF])
+        mask >>= 8
+        offset += 8
+    return tuple(cells)
+
+
+def cells_mask(cells):
+    """ return 81-bit mask of the cells """
+    mask = 0
+    for cell in cells:
+        mask |= CELL_BIT[cell]
+    return mask
+
+
+ALL_CELLS_MASK = (1 << 81) - 1
+CELL_BIT = tuple(1 << cell for cell in range(81))
+HOUSE_MASK = tuple(cells_mask(house) for house in HOUSES)
+PEERS_MASK = tuple((HOUSE_MASK[ROW_HOUSES + cell // 9] | HOUSE_MASK[COL_HOUSES + cell % 9] |
+                    HOUSE_MASK[BOX_HOUSES + cell // 27 * 3 + cell % 9 // 3]) & ~CELL_BIT[cell] for cell in range(81))
+COMMON_PEERS = tuple(tuple(mask_cells(PEERS_MASK[cell_a] & PEERS_MASK[cell_b])
+                           for cell_b in range(81)) for cell_a in range(81))
+
+
+def _get_intersections():
+    intersections = []
+    for line in range(ROW_HOUSES, BOX_HOUSES):
+        for box in range(BOX_HOUSES, BOX_HOUSES + 9):
+            mask = HOUSE_MASK[line] & HOUSE_MASK[box]
+            if mask:
+                intersections.append(Intersection(line, box, mask_cells(mask), mask,
+                                                  mask_cells(HOUSE_MASK[line] & ~mask),
+                                                  mask_cells(HOUSE_MASK[box] & ~mask)))
+    return tuple(intersections)
+
+
+INTERSECTIONS = _get_intersections()
+LINE_BOX = {(intersection.line, intersection.box): intersection for intersection in INTERSECTIONS}
+
+CHUTE_LINES = tuple(tuple(range(3 * (chute % 3), 3 * (chute % 3) + 3)) for chute in range(6))
+CHUTE_BOXES = tuple(tuple(chute + 3 * offset for offset in range(3)) if chute < 3 else
+                    tuple(3 * (chute - 3) + offset for offset in range(3)) for chute in range(6))
+CHUTE_MASK = tuple(cells_mask(cell for box in CHUTE_BOXES[chute] for cell in HOUSES[BOX_HOUSES + box])
+                   for chute in range(6))
+CHUTE_CELLS = tuple(mask_cells(mask) for mask in CHUTE_MASK)
+CELL_CHUTES = tuple((cell % 9 // 3, 3 + cell // 27) for cell in range(81))
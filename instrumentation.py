@@ -0,0 +1,168 @@
+# -*- coding: UTF-8 -*-
+
+""" INSTRUMENTATION OF THE SOLVER STRATEGIES (LATENCY HISTOGRAMS)
+
+    CLASS DEFINITIONS:
+        LatencyHistogram - log-linear histogram of latencies (nanoseconds)
+        StrategyStats - latencies of hits and misses and eliminations per call of a solver strategy
+
+    GLOBAL FUNCTIONS:
+        get_strategy_stats() - returns StrategyStats of the strategy (registered on first use)
+        export_statistics() - writes summary of strategies statistics to JSON or CSV file
+
+    LOCAL FUNCTIONS:
+        _bucket() - returns histogram bucket of the latency
+        _bucket_upper_bound() - returns the largest latency of the histogram bucket
+
+    IMPORTANT DATA STRUCTURES:
+        histogram buckets: {bucket: count, ...} - latencies below 8 ns have their own buckets, each power
+            of 2 range above is split into 4 buckets, so a percentile is accurate within 25%
+        summary of strategy statistics (see StrategyStats.summary()):
+            {"strategy": name, "calls": n, "hits": n, "total_ms": ms, "p50_us": us, "p99_us": us, "max_us": us,
+             "hit_p50_us": us, "hit_p99_us": us, "miss_p50_us": us, "miss_p99_us": us,
+             "eliminations_per_call": mean, "eliminations_max": n}
+
+    The statistics are kept in the module registry, not in attributes of the decorated functions,
+    so they are not reset when a strategies module is re-imported
+"""
+
+import csv
+import json
+from collections import defaultdict
+
+_SUB_BUCKET_BITS = 2
+_LINEAR_BUCKETS = 1 << (_SUB_BUCKET_BITS + 1)
+_CSV_FIELDS = ("strategy", "calls", "hits", "total_ms", "p50_us", "p99_us", "max_us", "hit_p50_us", "hit_p99_us",
+               "miss_p50_us", "miss_p99_us", "eliminations_per_call", "eliminations_max")
+
+_registry = {}
+
+
+def _bucket(value):
+    """ return histogram bucket of the latency """
+    shift = value.bit_length() - _SUB_BUCKET_BITS - 1
+    if shift <= 0:
+        return value
+    return (shift << _SUB_BUCKET_BITS) + (value >> shift)
+
+
+def _bucket_upper_bound(bucket):
+    """ return the largest latency falling into the histogram bucket """
+    if bucket < _LINEAR_BUCKETS:
+        return bucket
+    shift = (bucket >> _SUB_BUCKET_BITS) - 1
+    mantissa = (bucket & ((1 << _SUB_BUCKET_BITS) - 1)) + (1 << _SUB_BUCKET_BITS)
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """ Log-linear histogram of latencies (nanoseconds) """
+
+    def __init__(self):
+        self.buckets = defaultdict(int)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, latency):
+        self.buckets[_bucket(latency)] += 1
+        self.count += 1
+        self.total += latency
+        if latency > self.max:
+            self.max = latency
+
+    def merge(self, other):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent):
+        """ return latency (upper bound of the bucket) not exceeded by 'percent' % of the recorded ones """
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(_bucket_upper_bound(bucket), self.max)
+        return self.max
+
+
+class StrategyStats:
+    """ Latency histograms of hits and misses and histogram of eliminations per call of a strategy """
+
+    def __init__(self, name):
+        self.name = name
+        self.hits = LatencyHistogram()
+        self.misses = LatencyHistogram()
+        self.eliminations = defaultdict(int)
+
+    def record(self, latency, hit, eliminations):
+        (self.hits if hit else self.misses).record(latency)
+        self.eliminations[eliminations] += 1
+
+    def reset(self):
+        self.hits = LatencyHistogram()
+        self.misses = LatencyHistogram()
+        self.eliminations = defaultdict(int)
+
+    def merge(self, other):
+        self.hits.merge(other.hits)
+        self.misses.merge(other.misses)
+        for eliminations, calls in other.eliminations.items():
+            self.eliminations[eliminations] += calls
+
+    def latencies(self):
+        """ return histogram of all calls latencies (hits and misses) """
+        histogram = LatencyHistogram()
+        histogram.merge(self.hits)
+        histogram.merge(self.misses)
+        return histogram
+
+    def summary(self):
+        """ return dictionary of the strategy statistics summary (times in milli- and microseconds) """
+        latencies = self.latencies()
+        calls = latencies.count
+        return {
+            "strategy": self.name,
+            "calls": calls,
+            "hits": self.hits.count,
+            "total_ms": latencies.total / 1e6,
+            "p50_us": latencies.percentile(50) / 1e3,
+            "p99_us": latencies.percentile(99) / 1e3,
+            "max_us": latencies.max / 1e3,
+            "hit_p50_us": self.hits.percentile(50) / 1e3,
+            "hit_p99_us": self.hits.percentile(99) / 1e3,
+            "miss_p50_us": self.misses.percentile(50) / 1e3,
+            "miss_p99_us": self.misses.percentile(99) / 1e3,
+            "eliminations_per_call": sum(eliminations * count for eliminations, count in self.eliminations.items())
+            / calls if calls else 0.0,
+            "eliminations_max": max(self.eliminations, default=0),
+        }
+
+
+def get_strategy_stats(name):
+    """ return StrategyStats of the strategy - the same instance for all calls with the name """
+    if name not in _registry:
+        _registry[name] = StrategyStats(name)
+    return _registry[name]
+
+
+def export_statistics(pathname, strategies_stats):
+    """ write summaries of the strategies statistics (list of StrategyStats) to the file:
+    CSV if its extension is .csv, JSON otherwise (the JSON file also includes eliminations histograms) """
+    summaries = [stats.summary() for stats in strategies_stats]
+    if pathname.lower().endswith(".csv"):
+        with open(pathname, "w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=_CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(summaries)
+    else:
+        for summary, stats in zip(summaries, strategies_stats):
+            summary["eliminations"] = {str(eliminations): count
+                                       for eliminations, count in sorted(stats.eliminations.items())}
+        with open(pathname, "w") as json_file:
+            json.dump(summaries, json_file, indent=2)
@@ -8,6 +8,7 @@ from collections import defaultdict
 from utils import CELLS_IN_ROW, CELLS_IN_COL, CELL_BOX, CELL_ROW, CELL_COL, CELLS_IN_BOX
 from utils import ALL_NBRS, SUDOKU_VALUES_LIST
 from utils import get_stats, is_digit, set_remaining_candidates, eliminate_options
+from geometry import COMMON_PEERS
 
 
 @get_stats
@@ -47,7 +48,7 @@ def remote_pairs(solver_status, board, window):
     for pair in pair_chains:
         chain = _find_chain(pair)
         if chain:
-            impacted_cells = set(ALL_NBRS[chain[0]]).intersection(set(ALL_NBRS[chain[-1]]))
+            impacted_cells = COMMON_PEERS[chain[0]][chain[-1]]
             to_eliminate = [(value, cell) for value in pair for cell in impacted_cells
                             if value in board[cell] and len(board[cell]) > 1]
             if to_eliminate:
@@ -159,7 +160,7 @@ def skyscraper(solver_status, board, window):
                             corners_idx = [corners[i][0] * 9 + corners[i][1] for i in range(4)]
                         else:
                             corners_idx = [corners[i][1] * 9 + corners[i][0] for i in range(4)]
-                        impacted_cells = set(ALL_NBRS[corners_idx[1]]).intersection(ALL_NBRS[corners_idx[2]])
+                        impacted_cells = set(COMMON_PEERS[corners_idx[1]][corners_idx[2]])
                         for corner in corners_idx:
                             impacted_cells.discard(corner)
                         clues = [cell for cell in impacted_cells if is_digit(cell, board, solver_status)]
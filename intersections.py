@@ -8,7 +8,9 @@ TODO:
 """
 
 from utils import CELLS_IN_ROW, CELLS_IN_COL, CELL_BOX, CELL_ROW, CELL_COL, CELLS_IN_BOX, SUDOKU_VALUES_SET
-from utils import get_stats, set_remaining_candidates, eliminate_options
+from utils import get_stats, set_remaining_candidates, eliminate_options, apply_batch
+from bit_board import ROW_HOUSES, COL_HOUSES, BOX_HOUSES
+from geometry import LINE_BOX
 
 
 @get_stats
@@ -30,7 +32,7 @@ def locked_candidates(solver_status, board, window):
         The surplus candidates are eliminated from the part of the line that does not intersect with this box.
         Rating: 50
         """
-        for house in CELLS_IN_BOX:
+        for box_id, house in enumerate(CELLS_IN_BOX):
             candidates = SUDOKU_VALUES_SET - {board[cell] for cell in house if len(board[cell]) == 1}
             unsolved = {cell for cell in house if len(board[cell]) > 1}
             for possibility in candidates:
@@ -38,12 +40,14 @@ def locked_candidates(solver_status, board, window):
                 in_cols = set(CELL_COL[cell] for cell in unsolved if possibility in board[cell])
                 impacted_cells = None
                 if len(in_rows) == 1:
-                    impacted_cells = set(CELLS_IN_ROW[in_rows.pop()]).difference(house)
+                    impacted_cells = set(LINE_BOX[(ROW_HOUSES + in_rows.pop(), BOX_HOUSES + box_id)].line_rest)
                 elif len(in_cols) == 1:
-                    impacted_cells = set(CELLS_IN_COL[in_cols.pop()]).difference(house)
+                    impacted_cells = set(LINE_BOX[(COL_HOUSES + in_cols.pop(), BOX_HOUSES + box_id)].line_rest)
                 if impacted_cells:
                     to_eliminate = {(possibility, cell) for cell in impacted_cells if possibility in board[cell]}
-                    if to_eliminate:
+                    if to_eliminate and solver_status.batch:
+                        batch.update(to_eliminate)
+                    elif to_eliminate:
                         if window:
                             solver_status.capture_baseline(board, window)
                         eliminate_options(solver_status, board, to_eliminate, window)
@@ -64,16 +68,18 @@ def locked_candidates(solver_status, board, window):
         The surplus candidates are eliminated from the part of the box that does not intersect with this line.
         Rating: 50 - 60
         """
-        for cells in (CELLS_IN_ROW, CELLS_IN_COL):
-            for house in cells:
+        for first_house, cells in ((ROW_HOUSES, CELLS_IN_ROW), (COL_HOUSES, CELLS_IN_COL)):
+            for line_id, house in enumerate(cells):
                 candidates = SUDOKU_VALUES_SET - {board[cell] for cell in house if len(board[cell]) == 1}
                 unsolved = {cell for cell in house if len(board[cell]) > 1}
                 for possibility in candidates:
                     boxes = {CELL_BOX[cell] for cell in unsolved if possibility in board[cell]}
                     if len(boxes) == 1:
-                        impacted_cells = set(CELLS_IN_BOX[boxes.pop()]).difference(house)
+                        impacted_cells = set(LINE_BOX[(first_house + line_id, BOX_HOUSES + boxes.pop())].box_rest)
                         to_eliminate = {(possibility, cell) for cell in impacted_cells if possibility in board[cell]}
-                        if to_eliminate:
+                        if to_eliminate and solver_status.batch:
+                            batch.update(to_eliminate)
+                        elif to_eliminate:
                             if window:
                                 solver_status.capture_baseline(board, window)
                             eliminate_options(solver_status, board, to_eliminate, window)
@@ -90,6 +96,9 @@ def locked_candidates(solver_status, board, window):
 
     set_remaining_candidates(board, solver_status)
     kwargs = {}
+    batch = set()
     if _type_1() or _type_2():
         return kwargs
+    if batch:
+        return apply_batch(solver_status, board, batch, locked_candidates)
     return None
@@ -0,0 +1,176 @@
+# -*- coding: UTF-8 -*-
+
+""" GRAPH OF STRONG AND WEAK LINKS BETWEEN CANDIDATES OF THE BOARD
+
+    CLASS DEFINITIONS:
+        LinkGraph - strong and weak links of the board candidates, updated as per the change journal
+
+    IMPORTANT DATA STRUCTURES:
+        node: (cell, digit) - candidate of an unsolved cell
+        strong link: two nodes of which at least one is true:
+            - conjugate pair: the only two cells of a house with the digit
+            - bi-value cell: the only two candidates of a cell
+        weak link: two nodes of which at most one is true:
+            - two cells sharing a house, with the same digit
+            - two candidates of the same cell
+        pairs: [[(cell_1, cell_2) or None for each digit] for each house] - conjugate pairs
+            (cells in the house order)
+        chain: [node, ...] - alternating inference chain: starts and ends with a strong link,
+            strong and weak links alternate (if the first node is false, the last one is true)
+
+    The graph is shared by the chain and coloring strategies. On sync() only conjugate pairs
+    of digits and bi-value cells of houses changed since the previous sync (as per the solver status
+    change journal) are looked up again. Weak links are not stored: they are looked up in the board
+    when a chain is searched for
+"""
+
+from collections import defaultdict
+
+from bit_board import CELL_HOUSES, DIGIT_ID, HOUSES, ROW_HOUSES, COL_HOUSES, BOX_HOUSES
+from utils import ALL_NBRS, SUDOKU_VALUES_LIST
+
+_HOUSES_ORDER = tuple(house_id for idx in range(9) for house_id in (ROW_HOUSES + idx, COL_HOUSES + idx,
+                                                                     BOX_HOUSES + idx))
+
+
+class LinkGraph:
+    """ Strong and weak links of the board candidates with alternating inference chains search """
+
+    def __init__(self, positions, journal):
+        self.positions = positions
+        self.journal = journal
+        self.stamp = -1
+        self.board = None
+        self.pairs = [[None] * 9 for _ in range(27)]
+        self.bi_value = [False] * 81
+
+    def sync(self, board):
+        """ bring the graph up to date with the board, return the graph """
+        journal = self.journal
+        if board is self.board and journal.counter == self.stamp:
+            return self
+        positions = self.positions.sync(board)
+        changed = board is not self.board
+        for digit in SUDOKU_VALUES_LIST:
+            if changed or journal.digit_stamps[digit] > self.stamp:
+                digit_id = DIGIT_ID[digit]
+                for house_id in range(27):
+                    self.pairs[house_id][digit_id] = positions.conjugate_pair(house_id, digit, unsolved_only=True)
+        for house_id in range(27):
+            if changed or journal.house_stamps[house_id] > self.stamp:
+                for cell in HOUSES[house_id]:
+                    self.bi_value[cell] = len(board[cell]) == 2
+        self.board = board
+        self.stamp = journal.counter
+        return self
+
+    def conjugate_pairs(self, digit):
+        """ return list of conjugate pairs of the digit (houses in the order: row, column, box 0, row 1...) """
+        digit_id = DIGIT_ID[digit]
+        return [self.pairs[house_id][digit_id] for house_id in _HOUSES_ORDER if self.pairs[house_id][digit_id]]
+
+    def strong_links(self):
+        """ return dictionary of conjugate pairs: {digit: {(cell_1, cell_2), ...}, ...} """
+        strong_links = defaultdict(set)
+        for digit in SUDOKU_VALUES_LIST:
+            for pair in self.conjugate_pairs(digit):
+                strong_links[digit].add(pair)
+        return strong_links
+
+    def connected_cells(self):
+        """ return dictionary of cells strongly linked by conjugate pairs:
+        {(cell_1, cell_2): {digit, ...}, ...} """
+        connected_cells = defaultdict(set)
+        for house_id in _HOUSES_ORDER:
+            for digit_id, pair in enumerate(self.pairs[house_id]):
+                if pair:
+                    connected_cells[pair].add(SUDOKU_VALUES_LIST[digit_id])
+        return connected_cells
+
+    def bi_value_cells(self):
+        """ return set of bi-value cells """
+        return {cell for cell in range(81) if self.bi_value[cell]}
+
+    def bi_values(self):
+        """ return dictionary of bi-value cells by their candidates: {(digit_1, digit_2): {cell, ...}, ...} """
+        bi_values = defaultdict(set)
+        for cell in range(81):
+            if self.bi_value[cell]:
+                bi_values[(self.board[cell][0], self.board[cell][1])].add(cell)
+        return bi_values
+
+    def strong_neighbours(self, node, conjugate_pairs=True):
+        """ return list of nodes strongly linked with the node
+        (conjugate pairs are included only if 'conjugate_pairs' is set) """
+        cell, digit = node
+        neighbours = []
+        if conjugate_pairs:
+            digit_id = DIGIT_ID[digit]
+            for house_id, _ in CELL_HOUSES[cell]:
+                pair = self.pairs[house_id][digit_id]
+                if pair and cell in pair:
+                    other_cell = pair[1] if pair[0] == cell else pair[0]
+                    if (other_cell, digit) not in neighbours:
+                        neighbours.append((other_cell, digit))
+        if self.bi_value[cell]:
+            neighbours.append((cell, self.board[cell].replace(digit, "")))
+        return neighbours
+
+    def weak_neighbours(self, node):
+        """ return list of nodes weakly linked with the node """
+        cell, digit = node
+        board = self.board
+        neighbours = [(other_cell, digit) for other_cell in ALL_NBRS[cell]
+                      if digit in board[other_cell] and len(board[other_cell]) > 1]
+        neighbours.extend((cell, other_digit) for other_digit in board[cell] if other_digit != digit)
+        return neighbours
+
+    def _expand(self, fringe, visited, other, forward, conjugate_pairs):
+        """ expand the whole level of the search fringe, return the next level and the state
+        of the shortest chain meeting the other direction of the search (None if there is no such state)
+        Forward: strong links from false nodes and weak links from true ones; backward: strong links
+        to true nodes and weak links to false ones """
+        next_fringe = []
+        meeting, length = None, None
+        for state in fringe:
+            node, true = state
+            depth = visited[state][1] + 1
+            for neighbour in (self.weak_neighbours(node) if true == forward else
+                              self.strong_neighbours(node, conjugate_pairs)):
+                next_state = (neighbour, not true)
+                if next_state not in visited:
+                    visited[next_state] = (state, depth)
+                    next_fringe.append(next_state)
+                    if next_state in other and (meeting is None or depth + other[next_state][1] < length):
+                        meeting, length = next_state, depth + other[next_state][1]
+        return next_fringe, meeting
+
+    def chain(self, start, end, conjugate_pairs=True):
+        """ return the shortest alternating inference chain from start node to end node
+        (if start is false, end is true), None if there is no such chain
+        Bidirectional breadth-first search: the states are (node, true), the level of the smaller fringe
+        is expanded as a whole and the shortest of the chains meeting at the level is returned
+        """
+        forward = {(start, False): (None, 0)}
+        backward = {(end, True): (None, 0)}
+        forward_fringe = [(start, False)]
+        backward_fringe = [(end, True)]
+        meeting = None
+        while meeting is None and forward_fringe and backward_fringe:
+            if len(forward_fringe) <= len(backward_fringe):
+                forward_fringe, meeting = self._expand(forward_fringe, forward, backward, True, conjugate_pairs)
+            else:
+                backward_fringe, meeting = self._expand(backward_fringe, backward, forward, False, conjugate_pairs)
+        if meeting is None:
+            return None
+        chain = []
+        state = meeting
+        while state is not None:
+            chain.append(state[0])
+            state = forward[state][0]
+        chain.reverse()
+        state = backward[meeting][0]
+        while state is not None:
+            chain.append(state[0])
+            state = backward[state][0]
+        return chain
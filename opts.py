@@ -7,12 +7,12 @@
 #  - 'puzzles_list' option should be available only in textual mode
 #  - 'video ocr' should be available only in graphical mode
 
-import sys
 import os
 from pathlib import Path
 import argparse
 
 from utils import set_puzzle_input_file, check_file
+from repeat_stats import RepeatStatistics
 
 
 def _set_config_defaults(args, config, data):
@@ -34,7 +34,15 @@ def _set_config_defaults(args, config, data):
         config["first_id"] = args.sel
         config["last_id"] = args.sel
     config["techniques"] = args.techniques
+    config["dlx"] = args.dlx
+    config["jobs"] = args.jobs
+    config["cache"] = args.cache
+    config["validate"] = args.validate
+    config["schedule"] = args.schedule
+    config["batch"] = args.batch
+    config["schedule_weights"] = args.schedule_weights
     config["method_stats"] = args.stats
+    config["stats_export"] = args.stats_export
     config["graphical_mode"] = args.txt
     config["peep"] = args.peep
     config["log_fname"] = args.log
@@ -46,6 +54,7 @@ def _set_config_defaults(args, config, data):
     config["output_opts"] = None
     config["stats"] = False
     config["ocr"] = False   # checking integrity of OCR scan - no solver output
+    config["output_buffer"] = None  # list collecting log file lines instead of writing them (worker processes)
 
     set_puzzle_input_file(args.sudoku, config, data)
     data["error_data"] = config["cnn_model"]        # TODO
@@ -60,11 +69,7 @@ def _set_data_defaults(data):
     data["current_loop"] = 0  # sudoku solver loop counter
     data["current_path"] = []  # solver current run path
     data["iter_counter"] = 0  # solver iterations counter
-    data["min_iters"] = sys.maxsize  # minimum number of iterations found by solver
-    data["shortest_paths"] = []  # list of shortest solver found paths
-    data["all_paths"] = {}  # all solver runs paths database
-    data["iterations"] = []  # iterations per loop stats
-    data["res_times"] = []  # resolution time per loop stats
+    data["repeat_stats"] = RepeatStatistics()  # statistics of the solver runs of the current puzzle
     data["critical_error"] = False  # critical error flag
     data["failures"] = 0  # total number of failures
     data["trials"] = []  # unsuccessful/successful trials to set a cell
@@ -72,6 +77,10 @@ def _set_data_defaults(data):
     data["stat_runs"] = []  # runs per iteration statistic
     data["stat_unique_paths"] = []  # number of unique paths per iteration statistic
     data["graph_display"] = None    # placeholder for AppWindow class instance
+    data["dlx_nodes"] = 0  # number of exact cover search nodes (when solving with DLX)
+    data["dlx_solutions"] = 0  # number of solutions found by DLX (up to 2)
+    data["solver_tools"] = []  # techniques applied by the solver (in the current run)
+    data["cache_hits"] = 0  # number of puzzles solved by the solution cache lookup
 
     # TODO
     data["stat_opts"] = []  # options statistics TO-DO
@@ -255,6 +264,55 @@ def set_solver_options(config, data):
         help="basic techniques used for solving a sudoku",
         default="mu"    # "muphoyirjxst"      # "muhoyirpxstqj"  TODO
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="solve puzzles of the list in JOBS parallel processes (text mode only)",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        default=False,
+        help="apply all eliminations found in one scan of the board at once (text mode only; "
+             "locked candidates, naked and hidden subsets and basic fish)"
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=["default", "adaptive"],
+        default="default",
+        help="order of solver strategies: default (predefined) or adaptive (learned at runtime "
+             "from hits per millisecond of the strategies; singles are always tried first)"
+    )
+    parser.add_argument(
+        "--schedule-weights",
+        type=str,
+        default=None,
+        help="pathname of JSON file the adaptive scheduler weights are loaded from and saved to"
+    )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        default=None,
+        help="pathname of solutions cache database: solved puzzles (and puzzles equivalent to them) "
+             "are not solved again (text mode only)"
+    )
+    parser.add_argument(
+        "--validate",
+        type=str,
+        default=None,
+        help="only check if the puzzles have a unique solution and write status of each puzzle "
+             "(unique, multiple, unsolvable or invalid) to VALIDATE file in CSV format"
+    )
+    parser.add_argument(
+        "--dlx",
+        type=str,
+        choices=["fallback", "solve"],
+        default=None,
+        help="use exact cover (dancing links) solver instead of brute force iterations ('fallback') "
+             "or instead of the solver techniques ('solve')"
+    )
     parser.add_argument(
         "-p",
         "--peep",
@@ -269,6 +327,13 @@ def set_solver_options(config, data):
         default=False,
         help="whether to show sudoku solving methods statistics"
     )
+    parser.add_argument(
+        "--stats-export",
+        type=str,
+        default=None,
+        help="export sudoku solving methods latency percentiles and eliminations statistics "
+             "to STATS_EXPORT file (CSV if the extension is .csv, JSON otherwise)"
+    )
     parser.add_argument(
         "-x",
         "--txt",
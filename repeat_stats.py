@@ -0,0 +1,63 @@
+# -*- coding: UTF-8 -*-
+
+""" STREAMING STATISTICS OF REPEATED SOLVER RUNS OF A PUZZLE (OPTION --repeat)
+
+    CLASS DEFINITIONS:
+        RepeatStatistics - running aggregates of resolution times, iterations and solution paths
+
+    IMPORTANT DATA STRUCTURES:
+        path: ((row, col, value, options), ...) - subsequent guesses of a brute force run
+        runs: {iterations: number of runs, ...}
+        path_hashes: {iterations: {hash(path), ...}, ...} - unique paths of the runs by number of iterations
+        shortest_paths: {hash(path): path, ...} - unique paths of the runs with the fewest iterations
+
+    The runs are recorded one by one and only the aggregates are kept: paths are stored as their hashes
+    (the paths themselves only when they are the shortest ones), so memory grows with the number
+    of unique paths, not with the number of runs, and reporting doesn't rescan the runs
+"""
+
+import sys
+from collections import defaultdict
+
+
+class RepeatStatistics:
+    """ Running aggregates of the solver runs of one puzzle """
+
+    def __init__(self):
+        self.count = 0
+        self.time_total = 0.0
+        self.time_min = float("inf")
+        self.time_max = 0.0
+        self.iterations_total = 0
+        self.iterations_min = sys.maxsize
+        self.iterations_max = 0
+        self.runs = defaultdict(int)
+        self.path_hashes = defaultdict(set)
+        self.shortest_paths = {}
+
+    def reset(self):
+        self.__init__()
+
+    def record(self, iterations, resolution_time, path=None):
+        """ add the run to the statistics ('path' - sequence of the run guesses, if it is to be recorded) """
+        self.count += 1
+        self.time_total += resolution_time
+        self.time_min = min(self.time_min, resolution_time)
+        self.time_max = max(self.time_max, resolution_time)
+        self.iterations_total += iterations
+        self.runs[iterations] += 1
+        if iterations < self.iterations_min:
+            self.iterations_min = iterations
+            self.shortest_paths = {}
+        self.iterations_max = max(self.iterations_max, iterations)
+
+        if path is not None:
+            path = tuple(path)
+            path_hash = hash(path)
+            self.path_hashes[iterations].add(path_hash)
+            if iterations == self.iterations_min and path_hash not in self.shortest_paths:
+                self.shortest_paths[path_hash] = path
+
+    def unique_paths(self, iterations):
+        """ return number of unique paths of the runs with the number of iterations """
+        return len(self.path_hashes.get(iterations, ()))
@@ -0,0 +1,107 @@
+# -*- coding: UTF-8 -*-
+
+""" ADAPTIVE SCHEDULER OF THE SOLVER STRATEGIES
+
+    CLASS DEFINITIONS:
+        StrategyScheduler - orders solver strategies by expected eliminations per millisecond
+
+    LOCAL FUNCTIONS:
+        _get_stage() - returns solving stage of the board
+
+    IMPORTANT DATA STRUCTURES:
+        weights: {strategy name: [[hits, time_ms] for each stage], ...} - hits (options removed and clues found)
+            and time spent by the strategy at the stage, as recorded by get_stats() decorator
+        stage: 0 - 3 - solving stage by the number of unsolved cells (see _STAGE_CELLS)
+
+    The singles strategies always run first (in their default order). Other strategies are ordered
+    by expected hits per millisecond at the current board stage: (hits + 1) / (time_ms + difficulty_rate / 100),
+    i.e. before a strategy is tried it is expected to find one hit per difficulty_rate / 100 ms.
+    The order is recalculated before each step of the solver loop; time and hits of the strategies
+    called in the previous step are attributed to the stage of the board at the step beginning
+"""
+
+import json
+import os
+from collections import OrderedDict
+
+_STAGE_CELLS = 20   # number of unsolved cells per stage
+_STAGES = 4
+_SINGLES = "singles"
+
+
+def _get_stage(board):
+    """ return solving stage of the board (0: less than _STAGE_CELLS unsolved cells) """
+    unsolved = sum(1 for candidates in board if len(candidates) != 1)
+    return min(unsolved // _STAGE_CELLS, _STAGES - 1)
+
+
+class StrategyScheduler:
+    """ Orders solver strategies by expected hits per millisecond learned at runtime
+    Learned weights can be loaded from and saved to JSON file (see IMPORTANT DATA STRUCTURES) """
+
+    def __init__(self, pathname=None):
+        self.pathname = pathname
+        self.weights = {}       # loaded weights and weights merged from learned ones
+        self.learned = {}       # weights learned since the last take_learned() call
+        self.totals = {}        # last seen (time_in, hits) totals of the strategies (get_stats attributes)
+        self.stage = None
+        if pathname and os.path.isfile(pathname):
+            with open(pathname) as weights_file:
+                self.weights = json.load(weights_file)
+
+    def _update(self, strategies):
+        """ attribute time and hits of the strategies since the last update to the previous stage """
+        for name, strategy in strategies.items():
+            if not strategy.active:
+                continue
+            solver = strategy.solver
+            time_in, hits = solver.time_in, solver.options_removed + solver.clues
+            last_time_in, last_hits = self.totals.get(name, (0, 0))
+            if time_in < last_time_in:      # the statistics were reset
+                last_time_in, last_hits = 0, 0
+            if self.stage is not None and time_in > last_time_in:
+                weight = self.learned.setdefault(name, [[0, 0.0] for _ in range(_STAGES)])[self.stage]
+                weight[0] += hits - last_hits
+                weight[1] += (time_in - last_time_in) * 1000
+            self.totals[name] = (time_in, hits)
+
+    def _score(self, name, strategy, stage):
+        hits, time_ms = 0, 0.0
+        for weights in (self.weights, self.learned):
+            if name in weights:
+                hits += weights[name][stage][0]
+                time_ms += weights[name][stage][1]
+        return (hits + 1) / (time_ms + max(strategy.difficulty_rate, 1) / 100)
+
+    def prioritized(self, strategies, board):
+        """ return strategies (dictionary of Strategy) ordered for the board: singles first (in the order
+        of 'strategies'), then by expected hits per millisecond at the board stage """
+        self._update(strategies)
+        self.stage = _get_stage(board)
+        singles = [(name, strategy) for name, strategy in strategies.items() if strategy.technique == _SINGLES]
+        others = sorted(((name, strategy) for name, strategy in strategies.items() if strategy.technique != _SINGLES),
+                        key=lambda item: -self._score(item[0], item[1], self.stage))
+        return OrderedDict(singles + others)
+
+    def take_learned(self):
+        """ return weights learned since the last call and merge them into the scheduler weights
+        (used to collect the weights learned in worker processes) """
+        learned = self.learned
+        self.merge(learned)
+        self.learned = {}
+        return learned
+
+    def merge(self, learned):
+        """ merge learned weights (e.g. of a worker process) into the scheduler weights """
+        for name, stages in learned.items():
+            weights = self.weights.setdefault(name, [[0, 0.0] for _ in range(_STAGES)])
+            for stage, (hits, time_ms) in enumerate(stages):
+                weights[stage][0] += hits
+                weights[stage][1] += time_ms
+
+    def save(self):
+        """ save the weights (loaded and learned ones) to the scheduler weights file """
+        if self.pathname:
+            self.take_learned()
+            with open(self.pathname, "w") as weights_file:
+                json.dump(self.weights, weights_file)
@@ -14,8 +14,9 @@ TODO:
 
 from collections import namedtuple
 
-from utils import CELL_ROW, CELL_COL, CELL_BOX, CELLS_IN_ROW, CELLS_IN_COL, CELLS_IN_BOX, SUDOKU_VALUES_LIST
+from utils import CELL_ROW, CELL_COL, CELL_BOX, CELLS_IN_ROW, CELLS_IN_COL, CELLS_IN_BOX
 from utils import get_stats, set_remaining_candidates, eliminate_options
+from bit_board import ROW_HOUSES, COL_HOUSES
 
 ConjugateCells = namedtuple("ConjugatePair", ["cells", "boxes"])
 ConjugatePair = namedtuple("ConjugatePair", ["cell_a", "cell_b"])
@@ -58,7 +59,7 @@ def empty_rectangle(solver_status, board, window):
 
     def basic_empty_rectangle():
         """ canonical form of empty rectangle pattern """
-        for candidate in SUDOKU_VALUES_LIST:
+        for candidate in solver_status.journal.changed_digits(empty_rectangle.__name__):
             er_boxes = get_er_boxes(candidate)
 
             # if er_boxes:
@@ -130,20 +131,21 @@ def empty_rectangle(solver_status, board, window):
 def two_string_kite(solver_status, board, window):
     """ Two crossing strong links, weakly connected in a box """
 
-    def _get_strings(digit, lines):
+    def _get_strings(digit, first_house):
         strings = set()
-        for line in lines:
-            cells = tuple(cell for cell in line if digit in board[cell])
+        for house_id in range(first_house, first_house + 9):
+            cells = positions.cells(house_id, digit)
             in_boxes = tuple(CELL_BOX[cell] for cell in cells)
             if len(cells) in (2, 3) and len(set(in_boxes)) == 2:
                 strings.add(ConjugateCells(cells, in_boxes))
         return strings
 
     set_remaining_candidates(board, solver_status)
+    positions = solver_status.positions.sync(board)
     kwargs = {}
-    for candidate in SUDOKU_VALUES_LIST:
-        x_strings = _get_strings(candidate, CELLS_IN_ROW)
-        y_strings = _get_strings(candidate, CELLS_IN_COL)
+    for candidate in solver_status.journal.changed_digits(two_string_kite.__name__):
+        x_strings = _get_strings(candidate, ROW_HOUSES)
+        y_strings = _get_strings(candidate, COL_HOUSES)
         for x_string in x_strings:
             for y_string in y_strings:
                 nodes = {cell for cell in x_string.cells}.union(cell for cell in y_string.cells)
@@ -7,13 +7,78 @@
         naked_single() - when there is only one (remaining) candidate in a cell
         hidden_single() - when there is only one single candidate remaining for a specific digit in a row, column or box
 
+    LOCAL FUNCTIONS:
+        _get_hidden_single() - returns the first hidden single of the houses (as per the position index)
+        _propagate_singles() - places naked and hidden singles until none is left (text mode)
+
+    In text mode naked_single() does not solve one cell per call: the singles are propagated
+    to a fixed point. Each placed digit puts the houses of the cell and of the cells with eliminated
+    candidates on a worklist, and hidden singles are looked for only in the queued houses.
+    Each placed digit is credited (clues, options removed) to the technique that found it;
+    hidden_single() places one hidden single per call
+
 TODO:
 """
 
+from collections import deque
+
 from utils import CELLS_IN_ROW, CELLS_IN_COL, CELL_BOX, CELL_ROW, CELL_COL, CELLS_IN_BOX
 from utils import SUDOKU_VALUES_LIST, SUDOKU_VALUES_SET
 from utils import get_stats, is_digit, get_cell_candidates, set_remaining_candidates, get_impacted_houses
 from utils import place_digit, get_impacting_cells
+from bit_board import ROW_HOUSES, COL_HOUSES, BOX_HOUSES, CELL_HOUSES
+from geometry import HOUSE_MASK, CHUTE_CELLS, CHUTE_BOXES, mask_cells
+
+_PROPAGATION = "singles_propagation"     # journal key: the last fixed point of the singles propagation
+
+
+def _get_hidden_single(positions, house_ids):
+    """ return (cell, digit) of the first hidden single of the houses, None if there is none """
+    for house_id in house_ids:
+        for digit in SUDOKU_VALUES_LIST:
+            if positions.count(house_id, digit) == 1 and positions.count(house_id, digit, unsolved_only=True):
+                return positions.cells(house_id, digit)[0], digit
+    return None
+
+
+def _propagate_singles(solver_status, board):
+    """ Text mode: place naked singles and hidden singles until none is left (fixed point).
+    The worklist starts with the houses changed since the last fixed point; a placed digit
+    queues the houses of its cell and of the cells with eliminated candidates.
+    Naked singles are placed before the next queued house is checked for hidden singles
+    Returns: True if any digit was placed
+    """
+    positions = solver_status.positions.sync(board)
+    journal = solver_status.journal
+    worklist = deque(sorted(journal.changed_houses(_PROPAGATION)))
+    queued = set(worklist)
+    placed = False
+
+    def _place(cell, digit, strategy):
+        nonlocal placed
+        placed = True
+        eliminate, _ = place_digit(cell, digit, board, solver_status, None)
+        strategy.clues += 1
+        strategy.options_removed += len(eliminate)
+        for changed_cell in {cell}.union(cell_id for _, cell_id in eliminate):
+            for house_id, _ in CELL_HOUSES[changed_cell]:
+                if house_id not in queued:
+                    queued.add(house_id)
+                    worklist.append(house_id)
+
+    while True:
+        if solver_status.naked_singles:
+            cell = min(solver_status.naked_singles)
+            _place(cell, board[cell], naked_single)
+        elif worklist:
+            house_id = worklist.popleft()
+            queued.discard(house_id)
+            if hidden := _get_hidden_single(positions, (house_id, )):
+                _place(*hidden, hidden_single)
+        else:
+            break
+    journal.record_miss(_PROPAGATION)
+    return placed
 
 
 @get_stats
@@ -34,8 +99,10 @@ def full_house(solver_status, board, window):
             cell = unsolved_cells.pop()
             missing_digit = SUDOKU_VALUES_SET - set(
                 ''.join(board[cell] for cell in house if is_digit(cell, board, solver_status)))
+            solver_status.trail.save_cell(board, cell)
             board[cell] = missing_digit.pop()
             solver_status.cells_solved.add(cell)
+            solver_status.board_changed()
             kwargs["solver_tool"] = full_house.__name__
             kwargs["house"] = house
             kwargs["cell_solved"] = cell
@@ -64,22 +131,21 @@ def visual_elimination(solver_status, board, window):
     def _check_zone(value, chute):
         """ Look for lone singles in the chute (vertical or horizontal stack of boxes) """
         vertical = True if chute < 3 else False
-        chute = chute % 3
-        cols_rows = CELLS_IN_COL if vertical else CELLS_IN_ROW
-        house = {cell for offset in range(3) for cell in cols_rows[3 * chute + offset]}
-        with_value = [cell for cell in house if board[cell] == value]
+        with_value = [cell for cell in CHUTE_CELLS[chute] if board[cell] == value]
         if len(with_value) == 2 and CELL_BOX[with_value[0]] != CELL_BOX[with_value[1]]:
-            boxes = [chute + 3*offset if vertical else 3*chute + offset for offset in range(3)]
+            boxes = list(CHUTE_BOXES[chute])
             boxes.remove(CELL_BOX[with_value[0]])
             boxes.remove(CELL_BOX[with_value[1]])
-            box_cells = set(CELLS_IN_BOX[boxes.pop()])
+            box_mask = HOUSE_MASK[BOX_HOUSES + boxes.pop()]
             if vertical:
-                other_cells = set(CELLS_IN_COL[CELL_COL[with_value[0]]]).union(CELLS_IN_COL[CELL_COL[with_value[1]]])
+                other_mask = HOUSE_MASK[COL_HOUSES + CELL_COL[with_value[0]]] | \
+                    HOUSE_MASK[COL_HOUSES + CELL_COL[with_value[1]]]
             else:
-                other_cells = set(CELLS_IN_ROW[CELL_ROW[with_value[0]]]).union(CELLS_IN_ROW[CELL_ROW[with_value[1]]])
+                other_mask = HOUSE_MASK[ROW_HOUSES + CELL_ROW[with_value[0]]] | \
+                    HOUSE_MASK[ROW_HOUSES + CELL_ROW[with_value[1]]]
             possibilities = set()
             greyed_out = set()
-            for cell in {cell for cell in box_cells.difference(other_cells)
+            for cell in {cell for cell in mask_cells(box_mask & ~other_mask)
                          if not is_digit(cell, board, solver_status)}:
                 if vertical:
                     interacting = {cell_id for cell_id in CELLS_IN_ROW[CELL_ROW[cell]] if board[cell_id] == value}
@@ -94,13 +160,15 @@ def visual_elimination(solver_status, board, window):
             if len(possibilities) == 1:
                 solver_status.capture_baseline(board, window)
                 cell_solved = possibilities.pop()
+                solver_status.trail.save_cell(board, cell_solved)
                 board[cell_solved] = value
                 solver_status.cells_solved.add(cell_solved)
+                solver_status.board_changed()
                 kwargs["solver_tool"] = visual_elimination.__name__
                 kwargs["cell_solved"] = cell_solved
                 kwargs["greyed_out"] = greyed_out
                 kwargs["chain_a"] = {cell: set() for cell in with_value}
-                kwargs["house"] = house
+                kwargs["house"] = set(CHUTE_CELLS[chute])
                 visual_elimination.clues += 1
                 return True
         return False
@@ -124,6 +192,7 @@ def naked_single(solver_status, board, window):
     Otherwise, a naked single is that what remains after you have applied
     your solving techniques, by eliminating other candidates.
     Alternative terms are Forced Digit and Sole Candidate.
+    In text mode all naked and hidden singles are placed in one call (see _propagate_singles())
     Rating: 4
     """
     kwargs = {}
@@ -131,7 +200,9 @@ def naked_single(solver_status, board, window):
         set_remaining_candidates(board, solver_status)
         naked_single.clues += len(solver_status.naked_singles)
 
-    if solver_status.pencilmarks:
+    if solver_status.pencilmarks and not window:
+        return {"solver_tool": naked_single.__name__} if _propagate_singles(solver_status, board) else None
+    elif solver_status.pencilmarks:
         if not solver_status.naked_singles:
             return None
         else:
@@ -152,10 +223,12 @@ def naked_single(solver_status, board, window):
                 cell_opts = get_cell_candidates(cell, board, solver_status)
                 if len(cell_opts) == 1:
                     solver_status.capture_baseline(board, window)
+                    solver_status.trail.save_cell(board, cell)
                     board[cell] = cell_opts.pop()
                     kwargs["solver_tool"] = naked_single.__name__
                     kwargs["cell_solved"] = cell
                     solver_status.cells_solved.add(cell)
+                    solver_status.board_changed()
                     naked_single.clues += 1
                     return kwargs
         return kwargs
@@ -165,6 +238,8 @@ def naked_single(solver_status, board, window):
 def hidden_single(solver_status, board, window):
     """ A Hidden Single is a single candidate remaining for a specific digit in a row, column or box.
     'Hidden Singles' technique (see: https://www.learn-sudoku.com/hidden-singles.html)
+    In text mode the hidden singles are looked up in the position index, only in the houses changed
+    since the last miss of the technique
     Rating: 6 - 20
     """
 
@@ -200,6 +275,16 @@ def hidden_single(solver_status, board, window):
                 return True
         return False
 
+    if solver_status.pencilmarks and not window:
+        positions = solver_status.positions.sync(board)
+        house_ids = sorted(solver_status.journal.changed_houses(hidden_single.__name__))
+        if hidden := _get_hidden_single(positions, house_ids):
+            eliminate, _ = place_digit(*hidden, board, solver_status, None)
+            hidden_single.clues += 1
+            hidden_single.options_removed += len(eliminate)
+            return {"solver_tool": hidden_single.__name__}
+        return None
+
     kwargs = {}
     for idx in range(9):
         if _find_hidden_single(CELLS_IN_ROW[idx]) or \
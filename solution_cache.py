@@ -0,0 +1,204 @@
+# -*- coding: UTF-8 -*-
+
+""" ON-DISK CACHE OF SUDOKU SOLUTIONS KEYED BY CANONICAL FORM OF THE PUZZLE
+
+    CLASS DEFINITIONS:
+        Transformation - named tuple: sudoku symmetry transformation (see canonical_form())
+        SolutionCache - sqlite database of solutions and technique traces of canonical puzzles
+
+    GLOBAL FUNCTIONS:
+        canonical_form() - returns canonical form of the puzzle and the transformation giving it
+        to_canonical() - applies the transformation to a board
+        from_canonical() - applies inverse of the transformation to a canonical board
+        get_cache() - returns SolutionCache instance of the database file (one per process)
+
+    LOCAL FUNCTIONS:
+        _get_first_row_columns() - returns columns orders giving the minimal first row of the puzzle
+        _relabel_row() - returns the row values after relabeling the digits
+
+    Puzzles with less than 17 givens are not cached: none of them has a unique solution
+    and the canonical form of a puzzle with few givens is expensive to find.
+    Puzzles equivalent up to sudoku symmetries (digit relabeling, permutations of bands, stacks,
+    rows within a band and columns within a stack, transposition) have the same canonical form:
+    the lexicographically minimal 81-character string ('0' for empty cells) over all the symmetries,
+    with digits labeled in order of their first appearance
+"""
+
+import os
+import json
+import sqlite3
+from collections import namedtuple
+from itertools import permutations, product
+
+Transformation = namedtuple("Transformation", ["transposed", "rows", "cols", "labels"])
+
+_PERMUTATIONS_3 = tuple(permutations(range(3)))
+_MIN_GIVENS = 17
+_caches = {}
+
+
+def _relabel_row(values, labels, next_label):
+    """ return tuple of relabeled row values, updated labels dictionary and next free label """
+    row = []
+    copied = False
+    for value in values:
+        if value:
+            label = labels.get(value)
+            if label is None:
+                if not copied:
+                    labels = dict(labels)
+                    copied = True
+                label = labels[value] = next_label
+                next_label += 1
+            row.append(label)
+        else:
+            row.append(0)
+    return tuple(row), labels, next_label
+
+
+def _get_first_row_columns(values):
+    """ return list of columns orders that move the row givens as far to the right as possible:
+    stacks ordered by the number of givens, empty cells first within each stack """
+    stack_counts = [sum(1 for col in range(3 * stack, 3 * stack + 3) if values[col]) for stack in range(3)]
+    stack_orders = [order for order in _PERMUTATIONS_3
+                    if stack_counts[order[0]] <= stack_counts[order[1]] <= stack_counts[order[2]]]
+    in_stack_orders = [[order for order in _PERMUTATIONS_3
+                        if bool(values[3 * stack + order[0]]) <= bool(values[3 * stack + order[1]])
+                        <= bool(values[3 * stack + order[2]])] for stack in range(3)]
+    columns = []
+    for stack_order in stack_orders:
+        for orders in product(*(in_stack_orders[stack] for stack in stack_order)):
+            columns.append(tuple(3 * stack + col for stack, order in zip(stack_order, orders) for col in order))
+    return columns
+
+
+def canonical_form(board):
+    """ Return canonical form (81-character string, '0' for empty cells) of the puzzle
+    and the Transformation of the puzzle into the canonical form
+    The minimal string is searched row by row: only the partial transformations
+    giving the minimal prefix of the string are extended with the next row
+    """
+    grid = tuple(tuple(int(board[row * 9 + col]) if board[row * 9 + col] not in ".0" else 0
+                       for col in range(9)) for row in range(9))
+    grids = (grid, tuple(zip(*grid)))
+
+    best = None
+    states = []
+    for transposed, first_row in product((False, True), range(9)):
+        values = grids[transposed][first_row]
+        for cols in _get_first_row_columns(values):
+            row, labels, next_label = _relabel_row([values[col] for col in cols], {}, 1)
+            if best is None or row < best:
+                best = row
+                states = []
+            if row == best:
+                states.append((transposed, (first_row, ), cols, labels, next_label))
+    canonical = list(best)
+
+    for row_id in range(1, 9):
+        best = None
+        next_states = []
+        for transposed, rows, cols, labels, next_label in states:
+            if row_id % 3:
+                band = rows[-1] // 3
+                candidates = [row for row in range(3 * band, 3 * band + 3) if row not in rows]
+            else:
+                used_bands = {row // 3 for row in rows}
+                candidates = [row for row in range(9) if row // 3 not in used_bands]
+            values = grids[transposed]
+            for next_row in candidates:
+                row, row_labels, row_next_label = _relabel_row([values[next_row][col] for col in cols],
+                                                               labels, next_label)
+                if best is None or row < best:
+                    best = row
+                    next_states = []
+                if row == best:
+                    next_states.append((transposed, rows + (next_row, ), cols, row_labels, row_next_label))
+        states = next_states
+        canonical.extend(best)
+
+    transposed, rows, cols, labels, _ = states[0]
+    return "".join(str(value) for value in canonical), Transformation(transposed, rows, cols, labels)
+
+
+def to_canonical(board, transformation):
+    """ return the board (list of 81 digits or '.') transformed as per the transformation """
+    labels = dict(transformation.labels)
+    free_labels = iter(label for label in range(1, 10) if label not in labels.values())
+    for digit in range(1, 10):
+        if digit not in labels:
+            labels[digit] = next(free_labels)
+    canonical = []
+    for row in transformation.rows:
+        for col in transformation.cols:
+            cell = col * 9 + row if transformation.transposed else row * 9 + col
+            canonical.append(str(labels[int(board[cell])]) if board[cell] not in ".0" else ".")
+    return canonical
+
+
+def from_canonical(canonical, transformation):
+    """ return the canonical board (list or string of 81 digits or '.') transformed back to the original puzzle """
+    digits = {label: digit for digit, label in transformation.labels.items()}
+    free_digits = iter(digit for digit in range(1, 10) if digit not in transformation.labels)
+    for label in range(1, 10):
+        if label not in digits:
+            digits[label] = next(free_digits)
+    board = ["."] * 81
+    for row_id, row in enumerate(transformation.rows):
+        for col_id, col in enumerate(transformation.cols):
+            cell = col * 9 + row if transformation.transposed else row * 9 + col
+            value = canonical[row_id * 9 + col_id]
+            board[cell] = str(digits[int(value)]) if value not in ".0" else "."
+    return board
+
+
+class SolutionCache:
+    """ sqlite database of solutions and technique traces of canonical puzzles
+    The connection is opened on first use, so the instance can be created before
+    the worker processes are forked (option --jobs)
+    """
+
+    def __init__(self, pathname):
+        self.pathname = pathname
+        self.connection = None
+
+    def _connect(self):
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.pathname, timeout=60)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS solutions "
+                                    "(puzzle TEXT PRIMARY KEY, solution TEXT NOT NULL, trace TEXT NOT NULL)")
+            self.connection.commit()
+        return self.connection
+
+    def get(self, board):
+        """ return solution (list of 81 digits) and technique trace (dictionary)
+        of the puzzle if it or an equivalent puzzle was cached, None otherwise """
+        if sum(1 for value in board if value not in ".0") < _MIN_GIVENS:
+            return None
+        puzzle, transformation = canonical_form(board)
+        record = self._connect().execute("SELECT solution, trace FROM solutions WHERE puzzle = ?",
+                                         (puzzle, )).fetchone()
+        if record is None:
+            return None
+        solution = from_canonical(record[0], transformation)
+        if any(board[cell] not in ".0" and board[cell] != solution[cell] for cell in range(81)):
+            return None
+        return solution, json.loads(record[1])
+
+    def put(self, board, solution, trace):
+        """ cache the solution and technique trace (dictionary) of the puzzle """
+        if sum(1 for value in board if value not in ".0") < _MIN_GIVENS:
+            return
+        puzzle, transformation = canonical_form(board)
+        connection = self._connect()
+        connection.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)",
+                           (puzzle, "".join(to_canonical(solution, transformation)), json.dumps(trace)))
+        connection.commit()
+
+
+def get_cache(pathname):
+    """ return SolutionCache of the database file - one instance per process """
+    key = (os.path.abspath(pathname), os.getpid())
+    if key not in _caches:
+        _caches[key] = SolutionCache(pathname)
+    return _caches[key]
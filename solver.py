@@ -5,12 +5,15 @@
         Strategy - named tuple
         Priority - named tuple
         ValueEntered - named tuple
+        Checkpoint - named tuple
         SolverStatus - class to store data needed to recover status of the puzzle solver
-                       prior to a move
+                       prior to a move; it also holds index of digits positions in houses,
+                       journal of the board changes and trail (undo log) of the changes
 
     GLOBAL FUNCTIONS:
         solver_manager() - manages the process (manual or automatic moves) of solving a given sudoku puzzle
         get_prioritized_strategies() - returns prioritized list of solver strategies (methods)
+        set_scheduler() - sets (or resets) adaptive scheduler of the solver strategies
         get_strategy_name() - if strategy is in _solver_strategies then it returns the method name string
                               otherwise it returns screen_messages[strategy]
 
@@ -28,10 +31,13 @@ TODO:
 """
 
 from sys import exit
-from pygame import K_b, K_h, quit
 from collections import defaultdict, namedtuple, OrderedDict
 
 from utils import CELLS_IN_ROW, CELLS_IN_COL, CELLS_IN_BOX
+from bit_board import PositionIndex, ChangeJournal
+from link_graph import LinkGraph
+from trail import Trail, TrailedSet
+from scheduler import StrategyScheduler
 from utils import is_digit, is_solved, set_cell_candidates, set_neighbours_candidates, get_cell_candidates
 from display import screen_messages
 
@@ -47,13 +53,13 @@ import coloring
 import almost_locked_set
 import questionable
 
-board_image_stack = []
 iter_stack = []
-solver_status_stack = []
+scheduler = None        # StrategyScheduler instance when strategies are scheduled adaptively
 
 Strategy = namedtuple("Strategy", ["solver", "technique", "name", "difficulty_rate", "active"])
 Priority = namedtuple("Priority", ["by_ranking", "by_hits", "by_effectiveness", "by_efficiency"])
 ValueEntered = namedtuple("ValueEntered", ["cell", "value", "as_clue"])
+Checkpoint = namedtuple("Checkpoint", ["trail_length", "pencilmarks", "baselines"])
 
 _solver_strategies = {
     "full_house": Strategy(singles.full_house, "singles", "Full House", 4, True),
@@ -144,13 +150,18 @@ class SolverStatus:
         self.pencilmarks = False
         self.set_givens = False
         self.iteration = 0
+        self.batch = False      # text mode: apply all eliminations found in one scan (see utils.apply_batch())
         self.givens = set()
-        self.cells_solved = set()
-        self.naked_singles = set()
+        self.trail = Trail()
+        self.cells_solved = TrailedSet(self.trail)
+        self.naked_singles = TrailedSet(self.trail)
         self.board_baseline = list()
         self.naked_singles_baseline = set()
         self.cells_solved_baseline = set()
         self.visible_pencilmarks_baseline = set()
+        self.positions = PositionIndex()
+        self.journal = ChangeJournal()
+        self.links = LinkGraph(self.positions, self.journal)
 
     def initialize(self, board):
         self.givens = set(cell_id for cell_id in range(81) if board[cell_id] != ".")
@@ -165,27 +176,43 @@ class SolverStatus:
             self.cells_solved_baseline = self.cells_solved.copy()
             self.visible_pencilmarks_baseline = window.options_visible.copy()
             if window.solver_loop != -1 and not window.animate and not window.suggest_technique:
+                from pygame import K_b
                 window.buttons[K_b].set_status(True)
 
     def restore_baseline(self, board, window):
         for cell_id in range(81):
             board[cell_id] = self.board_baseline[cell_id]
-        self.naked_singles = self.naked_singles_baseline.copy()
-        self.cells_solved = self.cells_solved_baseline.copy()
+        self.board_changed()
+        self.naked_singles = TrailedSet(self.trail, self.naked_singles_baseline)
+        self.cells_solved = TrailedSet(self.trail, self.cells_solved_baseline)
         window.options_visible = self.visible_pencilmarks_baseline.copy()
 
-    def restore(self, solver_status_baseline):
-        self.pencilmarks = solver_status_baseline.pencilmarks
-        self.givens = solver_status_baseline.givens.copy()
-        self.cells_solved = solver_status_baseline.cells_solved.copy()
-        self.naked_singles = solver_status_baseline.naked_singles.copy()
-        self.board_baseline = solver_status_baseline.board_baseline.copy()
-        self.naked_singles_baseline = solver_status_baseline.naked_singles_baseline.copy()
-        self.cells_solved_baseline = solver_status_baseline.cells_solved_baseline.copy()
-        self.visible_pencilmarks_baseline = solver_status_baseline.visible_pencilmarks_baseline.copy()
+    def checkpoint(self):
+        """ open checkpoint of the board and solver status, return Checkpoint to roll back to """
+        return Checkpoint(self.trail.checkpoint(), self.pencilmarks,
+                          (self.board_baseline, self.naked_singles_baseline,
+                           self.cells_solved_baseline, self.visible_pencilmarks_baseline))
+
+    def rollback(self, checkpoint):
+        """ undo changes of the board and solver status made since the checkpoint """
+        self.trail.rollback(checkpoint.trail_length)
+        self.pencilmarks = checkpoint.pencilmarks
+        (self.board_baseline, self.naked_singles_baseline,
+         self.cells_solved_baseline, self.visible_pencilmarks_baseline) = checkpoint.baselines
+        self.board_changed()
+
+    def release(self, checkpoint):
+        """ close the checkpoint keeping the changes made since it was opened """
+        self.trail.release(checkpoint.trail_length)
+
+    def board_changed(self):
+        """ to be called after changes of the board made outside eliminate_options() and place_digit() """
+        self.positions.invalidate()
+        self.journal.touch_all()
 
     def reset(self, board):
         self.pencilmarks = False
+        self.trail.clear()
         self.cells_solved.clear()
         self.naked_singles.clear()
         self.naked_singles_baseline.clear()
@@ -195,6 +222,7 @@ class SolverStatus:
             if cell_id not in self.givens:
                 board[cell_id] = "."
         self.board_baseline = board.copy()
+        self.board_changed()
 
 
 solver_status = SolverStatus()
@@ -230,10 +258,13 @@ def solver_loop(board, window, data):
         if is_solved(board, solver_status):
             return True
 
+        if scheduler:
+            strategies = get_prioritized_strategies(board)
         for _, strategy in strategies.items():
             if strategy.active:
                 kwargs = strategy.solver(solver_status, board, window)
                 if kwargs:
+                    data["solver_tools"].append(kwargs.get("solver_tool"))
                     if window:
                         if window.suggest_technique:
                             solver_status.restore_baseline(board, window)
@@ -243,6 +274,7 @@ def solver_loop(board, window, data):
         else:
             return False
         if data["current_loop"] == -1 and window and window.critical_error:
+            from pygame import quit
             print(f'\n{screen_messages["critical_error"]}\n')
             quit()
             exit()
@@ -251,8 +283,20 @@ def solver_loop(board, window, data):
     assert False
 
 
-def get_prioritized_strategies():
-    """ returns prioritized list of solver strategies (methods)"""
+def set_scheduler(schedule, weights_pathname=None):
+    """ set adaptive scheduler of the solver strategies if 'schedule' is "adaptive",
+    otherwise the strategies are prioritized as per get_prioritized_strategies() settings """
+    global scheduler
+    scheduler = StrategyScheduler(weights_pathname) if schedule == "adaptive" else None
+    return scheduler
+
+
+def get_prioritized_strategies(board=None):
+    """ returns prioritized list of solver strategies (methods)
+    With adaptive scheduler set and the board given the strategies are ordered by the scheduler """
+    if scheduler and board is not None:
+        return scheduler.prioritized(_solver_strategies, board)
+
     # priorities = "by_ranking"             # 13-09-2021: 289 00:17:07
     # priorities = "by_hits"                # 13-09-2021: 293 00:19:55
     # priorities = "by_effectiveness"       # 13-09-2021: 271 02:40:14
@@ -349,6 +393,7 @@ def _manual_move(board, window):
     kwargs = {}
     if window and window.value_entered.cell is not None:
         solver_status.capture_baseline(board, window)
+        solver_status.board_changed()
         cell_id, value, as_value = window.value_entered
         if solver_status.set_givens:
             if board[window.value_entered.cell] == window.value_entered.value:
@@ -378,6 +423,7 @@ def _manual_move(board, window):
                   "c_chain": c_chain,
                   }
         if not solver_status.set_givens:
+            from pygame import K_h
             window.buttons[K_h].set_status(True)
     if is_solved(board, solver_status) and window.solver_loop != -1:
         kwargs["solver_tool"] = "end_of_game"
@@ -2,6 +2,10 @@
 
 """ 'SUBSETS' CLASS OF SOLVING METHODS
 
+    CLASS DEFINITIONS:
+        HouseSubsets - named tuple: naked and hidden subsets of a house (see IMPORTANT DATA STRUCTURES)
+        SubsetIndex - naked and hidden subsets of the board houses
+
     GLOBAL FUNCTIONS:
         hidden_pair() - 'Hidden Pair' sudoku solving strategy
         hidden_triplet() - 'Hidden Triplet' sudoku solving strategy
@@ -12,18 +16,36 @@
 
     LOCAL FUNCTIONS:
         _get_chain() - returns chain of cells with subset candidates
+        _get_locked_sets() - returns combinations of masks having as many bits in total as masks
+        _get_house_subsets() - returns naked and hidden subsets of the house
         _hidden_subset() - generic algorithm of finding hidden subsets
         _naked_subset() - generic algorithm of finding naked subsets
 
-TODO:
+    IMPORTANT DATA STRUCTURES:
+        HouseSubsets(unsolved, candidates, dead_end, naked, hidden):
+            unsolved - tuple of the house unsolved cells
+            candidates - candidates string of the unsolved cells
+            dead_end - True if the number of the candidates is other than the number of unsolved cells
+            naked - [[(cells, candidates string), ...] for each subset size 0 - 4]
+            hidden - [[(candidates string, cells), ...] for each subset size 0 - 4]
 
+    Subsets of a house are found in one pass over 9-bit masks of the index BitBoard: digits of each
+    unsolved cell for naked subsets, positions of each candidate in the house unsolved cells for hidden
+    ones. The subset index is shared by the six strategies and on update only subsets of the houses
+    changed since the previous update (as per the solver status change journal) are searched for again
 """
 
-import itertools
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 
 from utils import CELLS_IN_ROW, CELLS_IN_COL, CELLS_IN_BOX, DeadEndException
-from utils import get_stats, set_remaining_candidates, eliminate_options, get_subsets, get_impacted_cells
+from utils import get_stats, set_remaining_candidates, eliminate_options, get_impacted_cells
+from utils import apply_batch
+from bit_board import POPCOUNT, BitBoard, mask_bits, mask_to_digits, mask_positions, popcount
+
+HouseSubsets = namedtuple("HouseSubsets", ["unsolved", "candidates", "dead_end", "naked", "hidden"])
+
+_HOUSES = CELLS_IN_ROW + CELLS_IN_COL + CELLS_IN_BOX    # in the order of house ids
+_MAX_SUBSET_SIZE = 4
 
 
 def _get_chain(subset_cells, subset_candidates):
@@ -34,6 +56,80 @@ def _get_chain(subset_cells, subset_candidates):
     return chain
 
 
+def _get_locked_sets(masks, max_size):
+    """ return lists of (ids, union) of the masks combinations (by size 0 - max_size) such that the union
+    of the masks has as many bits as the combination has ids, each list in the order
+    of itertools.combinations()
+    The combinations are extended mask by mask with a running union: a combination having more bits
+    than the largest subset is not extended
+    """
+    locked_sets = [[] for _ in range(_MAX_SUBSET_SIZE + 1)]
+    n_masks = len(masks)
+
+    def _extend(start, ids, union, size):
+        for idx in range(start, n_masks):
+            subset_union = union | masks[idx]
+            n_bits = POPCOUNT[subset_union]
+            if n_bits > max_size:
+                continue
+            subset = ids + (idx, )
+            if n_bits == size:
+                locked_sets[size].append((subset, subset_union))
+            if size < max_size:
+                _extend(idx + 1, subset, subset_union, size + 1)
+
+    if max_size > 1:
+        _extend(0, (), 0, 1)
+    return locked_sets
+
+
+def _get_house_subsets(house, bit_board):
+    """ return naked and hidden subsets of the house (see IMPORTANT DATA STRUCTURES) """
+    unsolved = tuple({cell for cell in house if bit_board.count(cell) > 1})
+    unsolved_positions = 0
+    for position, cell in enumerate(house):
+        if bit_board.count(cell) > 1:
+            unsolved_positions |= 1 << position
+    digits = bit_board.house_mask(house, unsolved_only=True)
+    naked = [[(tuple(unsolved[idx] for idx in ids), mask_to_digits(subset_digits))
+              for ids, subset_digits in size_sets]
+             for size_sets in _get_locked_sets([bit_board[cell] for cell in unsolved],
+                                               min(_MAX_SUBSET_SIZE, len(unsolved) - 2))]
+    bits = mask_bits(digits)
+    position_masks = [bit_board.positions(house, bit) & unsolved_positions for bit in bits]
+    hidden = [[(mask_to_digits(sum(bits[idx] for idx in ids)),
+                tuple(house[position] for position in mask_positions(cells)))
+               for ids, cells in size_sets]
+              for size_sets in _get_locked_sets(position_masks, min(_MAX_SUBSET_SIZE, len(unsolved) - 1))]
+    return HouseSubsets(unsolved, mask_to_digits(digits), popcount(digits) != len(unsolved), naked, hidden)
+
+
+class SubsetIndex:
+    """ Naked and hidden subsets of the board houses """
+
+    def __init__(self):
+        self.journal = None
+        self.stamp = -1
+        self.houses = [None] * 27
+        self.bit_board = BitBoard()
+
+    def update(self, solver_status, board):
+        """ bring the index up to date with the board, return the index """
+        journal = solver_status.journal
+        if journal is self.journal and journal.counter == self.stamp:
+            return self
+        self.bit_board.load(board)
+        for house_id, house in enumerate(_HOUSES):
+            if journal is not self.journal or journal.house_stamps[house_id] > self.stamp:
+                self.houses[house_id] = _get_house_subsets(house, self.bit_board)
+        self.journal = journal
+        self.stamp = journal.counter
+        return self
+
+
+_subset_index = SubsetIndex()
+
+
 def _hidden_subset(solver_status, board, window, subset_size):
     """ Generic technique of finding hidden subsets
     A Hidden Subset is formed when N digits have only candidates in N cells in a house.
@@ -50,36 +146,38 @@ def _hidden_subset(solver_status, board, window, subset_size):
                          3: (hidden_triplet, 100),
                          4: (hidden_quad, 150), }
 
-    for cells in (CELLS_IN_ROW, CELLS_IN_COL, CELLS_IN_BOX):
-        for house in cells:
-            unsolved = {cell for cell in house if len(board[cell]) > 1}
-            if len(unsolved) <= subset_size:
+    index = _subset_index.update(solver_status, board)
+    changed_houses = solver_status.journal.changed_houses(subset_strategies[subset_size][0].__name__)
+    batch = set()
+    for house_id, house in enumerate(_HOUSES):
+        if house_id in changed_houses:
+            house_subsets = index.houses[house_id]
+            if len(house_subsets.unsolved) <= subset_size:
                 continue
-            candidates = set("".join(board[cell] for cell in unsolved))
-            if len(unsolved) != len(candidates):
+            if house_subsets.dead_end:
                 raise DeadEndException
 
-            candidates_positions = {candidate: {cell for cell in unsolved if candidate in board[cell]}
-                                    for candidate in candidates}
-            for subset in itertools.combinations(candidates, subset_size):
-                subset_nodes = {cell for candidate in subset for cell in candidates_positions[candidate]}
-                if len(subset_nodes) == subset_size:
-                    to_eliminate = {(candidate, cell) for cell in subset_nodes for candidate in board[cell]
-                                    if candidate not in subset}
-                    if to_eliminate:
-                        kwargs = {}
-                        if window:
-                            solver_status.capture_baseline(board, window)
-                        eliminate_options(solver_status, board, to_eliminate, window)
-                        subset_strategies[subset_size][0].clues += len(solver_status.naked_singles)
-                        subset_strategies[subset_size][0].options_removed += len(to_eliminate)
-                        kwargs["solver_tool"] = subset_strategies[subset_size][0].__name__
-                        if window:
-                            window.options_visible = window.options_visible.union(unsolved)
-                            kwargs["chain_a"] = _get_chain(subset_nodes, candidates_positions)
-                            kwargs["eliminate"] = to_eliminate
-                            kwargs["house"] = house
-                        return kwargs
+            for subset, subset_nodes in house_subsets.hidden[subset_size]:
+                to_eliminate = {(candidate, cell) for cell in subset_nodes for candidate in board[cell]
+                                if candidate not in subset}
+                if to_eliminate and solver_status.batch:
+                    batch.update(to_eliminate)
+                elif to_eliminate:
+                    kwargs = {}
+                    if window:
+                        solver_status.capture_baseline(board, window)
+                    eliminate_options(solver_status, board, to_eliminate, window)
+                    subset_strategies[subset_size][0].clues += len(solver_status.naked_singles)
+                    subset_strategies[subset_size][0].options_removed += len(to_eliminate)
+                    kwargs["solver_tool"] = subset_strategies[subset_size][0].__name__
+                    if window:
+                        window.options_visible = window.options_visible.union(house_subsets.unsolved)
+                        kwargs["chain_a"] = _get_chain(subset_nodes, house_subsets.candidates)
+                        kwargs["eliminate"] = to_eliminate
+                        kwargs["house"] = house
+                    return kwargs
+    if batch:
+        return apply_batch(solver_status, board, batch, subset_strategies[subset_size][0])
     return None
 
 
@@ -95,25 +193,31 @@ def _naked_subset(solver_status, board, window, subset_size):
     subset_strategies = {2: (naked_pair, 60),
                          3: (naked_triplet, 80),
                          4: (naked_quad, 120), }
-    for house, subset_dict in get_subsets(board, subset_size):
-        subset_cells = {cell for cells in subset_dict.values() for cell in cells}
-        impacted_cells = get_impacted_cells(board, subset_cells)
-        to_eliminate = {(candidate, cell)
-                        for cell in impacted_cells for candidate in set(board[cell]).intersection(subset_dict)}
-        if to_eliminate:
-            kwargs = {}
-            if window:
-                solver_status.capture_baseline(board, window)
-            eliminate_options(solver_status, board, to_eliminate, window)
-            subset_strategies[subset_size][0].clues += len(solver_status.naked_singles)
-            subset_strategies[subset_size][0].options_removed += len(to_eliminate)
-            kwargs["solver_tool"] = subset_strategies[subset_size][0].__name__
-            if window:
-                window.options_visible = window.options_visible.union(subset_cells).union(impacted_cells)
-                kwargs["chain_a"] = _get_chain(subset_cells, subset_dict)
-                kwargs["eliminate"] = to_eliminate
-                kwargs["house"] = impacted_cells.union(house)
-            return kwargs
+    index = _subset_index.update(solver_status, board)
+    batch = set()
+    for house_id, house in enumerate(_HOUSES):
+        for subset_cells, subset_candidates in index.houses[house_id].naked[subset_size]:
+            impacted_cells = get_impacted_cells(board, subset_cells)
+            to_eliminate = {(candidate, cell)
+                            for cell in impacted_cells for candidate in board[cell] if candidate in subset_candidates}
+            if to_eliminate and solver_status.batch:
+                batch.update(to_eliminate)
+            elif to_eliminate:
+                kwargs = {}
+                if window:
+                    solver_status.capture_baseline(board, window)
+                eliminate_options(solver_status, board, to_eliminate, window)
+                subset_strategies[subset_size][0].clues += len(solver_status.naked_singles)
+                subset_strategies[subset_size][0].options_removed += len(to_eliminate)
+                kwargs["solver_tool"] = subset_strategies[subset_size][0].__name__
+                if window:
+                    window.options_visible = window.options_visible.union(subset_cells).union(impacted_cells)
+                    kwargs["chain_a"] = _get_chain(subset_cells, subset_candidates)
+                    kwargs["eliminate"] = to_eliminate
+                    kwargs["house"] = impacted_cells.union(house)
+                return kwargs
+    if batch:
+        return apply_batch(solver_status, board, batch, subset_strategies[subset_size][0])
     return None
 
 
@@ -7,6 +7,7 @@
                  the puzzle (text file, image or video ocr), also manages list of puzzles
 
     LOCAL FUNCTIONS:
+        _validate_puzzles() - checks if the puzzles of the file have a unique solution
         _picture_ocr() - uses image file to define the puzzle
         _video_ocr() - uses video to define the puzzle
         _solve_sudoku_puzzle() - solves a sudoku puzzle: handles running the solver multiple times
@@ -14,13 +15,18 @@
         _apply_standard_techniques() - solver wrapper for handling unexpected exceptions
         _try_standard_techniques() - solver wrapper for handling expected exceptions
         _apply_brute_force() - solves the sudoku by guessing clues of selected empty cells
+        _apply_dlx() - solves the sudoku with the exact cover (dancing links) solver
+        _get_solution_cache() - returns the solutions cache (if it is to be used)
+        _apply_cached_solution() - sets the board as per the cached solution
         _next_cell_to_resolve() - selects next empty cell to be resolved by 'brute force' method
         _init_board() - initializes the current sudoku board before running the solver
         _reset_solver_runs_data() - resets a sudoku solver multiple runs data
-        _read_boards() - reads the sudoku board(s) definition file
+        _read_boards() - opens the sudoku board(s) definition file and reads the first puzzle(s)
+        _next_puzzles() - yields ids of subsequent puzzles of the list, reading their boards lazily
         _run_in_silence() - runs the application with minimum output information
-        _update_shortest_path_data() - updates data corresponding to the shortest path
-        _update_all_paths_data() - updates database of all solver paths data
+        _run_in_parallel() - solves the puzzles list in parallel worker processes
+        _init_worker() - initializes solver data of a worker process
+        _solve_puzzles_chunk() - solves a chunk of the puzzles list in a worker process
         _get_methods() - returns list of (strategy.name, strategy.solver) tuples
 
 TODO:
@@ -33,26 +39,33 @@ TODO:
       redundancies and simplify interfaces between solver modules/functions
 """
 
-import copy
+import itertools
+import contextlib
+import io
+import multiprocessing
 import sys
 import os
-import re
 import random
 import time
 import math
+from collections import deque
 
 from progress.bar import Bar
+from progress.counter import Counter
 
-from solver import solver_loop, get_prioritized_strategies
-from solver import solver_status, board_image_stack, iter_stack, solver_status_stack
+from solver import solver_loop, get_prioritized_strategies, set_scheduler
+from solver import solver_status, iter_stack
 
 from opts import set_solver_options, set_output_options
-from graph_utils import quit_btn_clicked
 
+import solver
 import display
-import graphics
-import sudoku_ocr
-from utils import eliminate_options, DeadEndException
+import dlx
+import solution_cache
+import validation
+from utils import eliminate_options, read_puzzles, DeadEndException
+# graphics, graph_utils (pygame) and sudoku_ocr (cv2) modules are imported on first use,
+# so running the solver in text mode doesn't load them
 
 
 config = {}
@@ -60,6 +73,9 @@ data = {}
 boards = {}
 board = []
 methods = []
+puzzles = iter(())     # (sudoku id, board) pairs of the puzzles list not read yet
+
+_CHUNK_SIZE = 16        # number of puzzles sent at once to a worker process (option --jobs)
 
 
 def main():
@@ -72,8 +88,13 @@ def main():
 
     start_time = time.time()
     set_solver_options(config, data)    # set solver data & configuration parameters
+    if config["validate"]:
+        _validate_puzzles()
+        return
+    set_scheduler(config["schedule"], config["schedule_weights"])
     _read_boards()
     if config['graphical_mode']:
+        import graphics
         data["graph_display"] = graphics.AppWindow(board, solver_status, config)
 
     if boards:
@@ -81,10 +102,12 @@ def main():
             data["current_sudoku"] = config["first_id"]
             _solve_sudoku_puzzle()
         else:
-            if config["verbose"] == 0:
+            if config["jobs"] > 1 and not config["graphical_mode"]:
+                _run_in_parallel()
+            elif config["verbose"] == 0:
                 _run_in_silence()
             else:
-                for data["current_sudoku"] in range(config["first_id"], config["last_id"] + 1):
+                for data["current_sudoku"] in _next_puzzles():
                     if not config["output_opts"]["results_in_line"]:
                         display.puzzle_id(config, data)
                     _solve_sudoku_puzzle()
@@ -93,27 +116,45 @@ def main():
     else:
         _video_ocr()
 
+    if solver.scheduler:
+        solver.scheduler.save()
     display.total_execution_time(config, int(math.ceil(time.time() - start_time)))
     if config["output_opts"]["plot_paths_stats"]:
         display.plot_paths_stats(config, data)
     if config["method_stats"]:
         display.methods_statistics(config, data, _get_methods())
+    if config["stats_export"]:
+        display.export_methods_statistics(config, _get_methods())
     print()
 
 
+def _validate_puzzles():
+    """ validates the puzzles of the file (in config["jobs"] processes) without solving them:
+    status of each puzzle is written to config["validate"] file """
+    if not config["fname"]:
+        print("\nNothing to validate! - Please check the solver options\n")
+        sys.exit(0)
+    summary = validation.validate_puzzles(config["fname"], config["validate"], config["jobs"])
+    display.validation_summary(config, summary)
+
+
 def _picture_ocr():
     """ uses image file to define the puzzle """
+    import sudoku_ocr
     ocr_engine = sudoku_ocr.SudokuOCR(img_fname=config["image"])
     boards[0] = ocr_engine.sudoku_ocr()
     ocr_engine.show_contour(10)
     _init_board()
     if config['graphical_mode']:
+        import graphics
         data["graph_display"] = graphics.AppWindow(board, solver_status, config)
     _solve_sudoku_puzzle()
 
 
 def _video_ocr():
     """ uses video to define the puzzle """
+    import sudoku_ocr
+    import graphics
     ocr_engine = sudoku_ocr.SudokuOCR()
     config["ocr"] = True
     while True:
@@ -148,6 +189,7 @@ def _solve_sudoku_puzzle():
             if data["critical_error"]:
                 print(f'\n{display.screen_messages["critical_error"]}\n')
                 if config['graphical_mode']:
+                    from graph_utils import quit_btn_clicked
                     quit_btn_clicked(data["graph_display"])
                 else:
                     sys.exit()
@@ -172,11 +214,8 @@ def _solve_sudoku_puzzle():
             if data["current_loop"] == -1:
                 data["solved_board"] = board.copy()
             else:
-                data["iterations"].append(data["iter_counter"])
-                data["res_times"].append(data["resolution_time"])
-                if config["stats"]:
-                    _update_shortest_path_data()
-                    _update_all_paths_data()
+                data["repeat_stats"].record(data["iter_counter"], data["resolution_time"],
+                                            data["current_path"] if config["stats"] else None)
         elif data["current_loop"] != -1:
             data["failures"] += 1
 
@@ -193,6 +232,7 @@ def _run_solver(progress_bar=None):
     start_time = time.time()
     _init_board()
     solver_status.initialize(board)
+    solver_status.batch = config["batch"] and not data["graph_display"]
     data["iter_counter"] = 0
     config["is_solved"] = False
     display.puzzle_filename(config, data)
@@ -212,9 +252,22 @@ def _run_solver(progress_bar=None):
             window.solved_board = data["solved_board"]
         window.mask_buttons()   # TODO
 
-    ret_code = _apply_standard_techniques()
-    if not ret_code:
-        ret_code = _apply_brute_force()
+    data["dlx_nodes"] = 0
+    data["dlx_solutions"] = 0
+    data["solver_tools"].clear()
+    cache = _get_solution_cache()
+    cached = cache.get(boards[data["current_sudoku"] - 1]) if cache else None
+    if cached:
+        ret_code = _apply_cached_solution(*cached)
+    elif config["dlx"] == "solve":
+        ret_code = _apply_dlx()
+    else:
+        ret_code = _apply_standard_techniques()
+        if not ret_code:
+            ret_code = _apply_dlx() if config["dlx"] else _apply_brute_force()
+    if cache and not cached and ret_code and not data["critical_error"]:
+        cache.put(boards[data["current_sudoku"] - 1], board,
+                  {"iterations": data["iter_counter"], "solver_tools": data["solver_tools"]})
 
     # the code below is executed only when running the
     # solver in textual mode or when calculating the
@@ -269,19 +322,13 @@ def _apply_brute_force():
     if next_cell is None:
         return True
 
-    def _restore_board():
-        for cell_id, value in enumerate(board_image_stack[-1]):
-            board[cell_id] = value
-
-    board_image_stack.append(board.copy())
     iter_stack.append(clue_iterator)
-    solver_status_stack.append(copy.deepcopy(solver_status))
+    checkpoint = solver_status.checkpoint()
     window = data["graph_display"]
     for value in iter_stack[-1]:
         data["iter_counter"] += 1
         solver_status.iteration = data["iter_counter"]
-        _restore_board()
-        solver_status.restore(solver_status_stack[-1])
+        solver_status.rollback(checkpoint)
 
         to_eliminate = {(option, next_cell) for option in board[next_cell] if option != value}
         solver_status.capture_baseline(board, window)
@@ -292,24 +339,60 @@ def _apply_brute_force():
         if config["output_opts"]["iterations"] and data["current_loop"] == config["repeat"] - 1:
             display.iteration(config, data, board, next_cell, value)
         if config["stats"]:
-            data["current_path"].append((data["current_loop"], next_cell // 9 + 1,
-                                         next_cell % 9 + 1, value, board[next_cell], ))
+            data["current_path"].append((next_cell // 9 + 1, next_cell % 9 + 1, value, board[next_cell]))
         if window:
             window.draw_board(board, solver_tool="iterate", eliminate=to_eliminate, c_chain={next_cell: {(value, 'lime')}})
 
         if _try_standard_techniques() and _apply_brute_force():
             iter_stack.pop()
-            board_image_stack.pop()
-            solver_status_stack.pop()
+            solver_status.release(checkpoint)
             return True
 
     iter_stack.pop()
-    _restore_board()
-    board_image_stack.pop()
-    solver_status_stack.pop()
+    solver_status.rollback(checkpoint)
+    solver_status.release(checkpoint)
     return False
 
 
+def _apply_dlx():
+    """ resolve the remaining cells of the puzzle with the exact cover solver
+    Return: True if a solution was found, False otherwise
+    """
+    result = dlx.solve(board)
+    data["dlx_nodes"] = result.nodes
+    data["dlx_solutions"] = result.count
+    if result.solution is None:
+        return False
+    for cell_id in range(81):
+        if board[cell_id] != result.solution[cell_id]:
+            board[cell_id] = result.solution[cell_id]
+            solver_status.cells_solved.add(cell_id)
+    solver_status.naked_singles.clear()
+    solver_status.board_changed()
+    return True
+
+
+def _get_solution_cache():
+    """ return the solutions cache if it is set and the puzzle is solved once (text mode only) """
+    if config["cache"] and not config["graphical_mode"] and config["repeat"] == 1:
+        return solution_cache.get_cache(config["cache"])
+    return None
+
+
+def _apply_cached_solution(solution, trace):
+    """ set the board as per the cached solution and restore the solver run data from the trace """
+    for cell_id in range(81):
+        if board[cell_id] != solution[cell_id]:
+            board[cell_id] = solution[cell_id]
+            solver_status.cells_solved.add(cell_id)
+    solver_status.naked_singles.clear()
+    solver_status.board_changed()
+    data["iter_counter"] = trace["iterations"]
+    data["solver_tools"] = trace["solver_tools"]
+    data["cache_hits"] += 1
+    return True
+
+
 def _next_cell_to_resolve():
     """ Return index of the next_cell cell to be resolved and an iterator of possible clues.
     The next_cell cell is always selected from the set of cells with the lowest number of options,
@@ -338,7 +421,6 @@ def _next_cell_to_resolve():
 
 def _init_board():
     """ Initialize the current sudoku puzzle board """
-    board_image_stack.clear()
     iter_stack.clear()
     board.clear()
     for cell in range(81):
@@ -354,46 +436,35 @@ def _reset_solver_runs_data():
     """ reset a sudoku solver runs data
      - used when solving the sudoku more than once to collect statistics
      """
-    data["iterations"].clear()
-    data["res_times"].clear()
-    data["min_iters"] = sys.maxsize
+    data["repeat_stats"].reset()
     data["critical_error"] = False
     data["failures"] = 0
-    data["all_paths"].clear()
-    data["shortest_paths"].clear()
 
 
 def _read_boards():
-    """ read a file containing definition of one or more sudoku puzzles
-    The procedure is very flexible with respect of puzzle definition format:
-    it has to be a text file containing 81 (or multiply of 81) characters from {'.', 0-9} set.
-    The characters can be separated by any other characters. The subsequent characters
-    are used to define the puzzle(s) board(s) by rows.
+    """ open a file containing definition of one or more sudoku puzzles (see utils.read_puzzles()
+    for the format) and read the first puzzle(s) to be solved. The remaining puzzles are read lazily
+    by _next_puzzles(), so config["last_id"] stays None unless it was set by solver options
     If the file name is not given and OCR option is not active it creates one empty board
     and sets "first_id" and "last_id" to 1
     TODO: add checking if webcam/OCR is off
     """
+    global puzzles
     if config["fname"]:
-        board_id = 0
-        with open(config["fname"]) as lines:
-            boards[board_id] = []
-            for line in lines:
-                for item in re.findall(r"[.0-9]", line):
-                    boards[board_id].append(item if item != "0" else ".")
-                if len(boards[board_id]) == 81:
-                    board_id += 1
-                    boards[board_id] = []
-        del boards[board_id]
-
-        if not config["last_id"] or config["last_id"] > len(boards):
-            config["last_id"] = len(boards)
         if config["first_id"] < 1:
             config["first_id"] = 1
-        if not 0 < config["first_id"] <= config["last_id"]:
+        if config["last_id"] is not None and config["last_id"] < config["first_id"]:
+            config["last_id"] = 0
+        puzzles = zip(itertools.count(config["first_id"]),
+                      itertools.islice(read_puzzles(config["fname"]), config["first_id"] - 1, config["last_id"]))
+        first_puzzles = list(itertools.islice(puzzles, 2))
+        if not first_puzzles:
             print("\nNothing to solve! - Please check the solver options\n")
             sys.exit(0)
-        if config["last_id"] - config["first_id"] > 0:
+        boards[config["first_id"] - 1] = first_puzzles[0][1]
+        if len(first_puzzles) > 1:
             config["puzzles_list"] = True
+        puzzles = itertools.chain(first_puzzles, puzzles)
     else:
         boards[0] = ['.'] * 81
         config["first_id"] = 1
@@ -402,12 +473,28 @@ def _read_boards():
     set_output_options(config)
 
 
+def _next_puzzles():
+    """ yield ids of subsequent puzzles of the list
+    The puzzle board is read when its id is yielded and only the current one is kept in 'boards'
+    """
+    for sudoku_id, puzzle in puzzles:
+        boards.clear()
+        boards[sudoku_id - 1] = puzzle
+        yield sudoku_id
+
+
+def _get_progress_bar():
+    """ return progress bar of the puzzles list processing (a counter if the list length is unknown) """
+    if config["last_id"] is None:
+        return Counter("Processing puzzles list ")
+    return Bar("Processing puzzles list", max=config["last_id"] - config["first_id"] + 1)
+
+
 def _run_in_silence():
     """ runs the application with minimum output information  """
-    puzzles = config["last_id"] - config["first_id"] + 1
     print()
-    progress_bar = Bar("Processing puzzles list", max=puzzles)
-    for data["current_sudoku"] in range(config["first_id"], config["last_id"] + 1):
+    progress_bar = _get_progress_bar()
+    for data["current_sudoku"] in _next_puzzles():
         progress_bar.next()
         _solve_sudoku_puzzle()
     progress_bar.finish()
@@ -417,24 +504,109 @@ def _run_in_silence():
         print("\nDone with some failures!")
 
 
-def _update_shortest_path_data():
-    """ update data corresponding to the shortest path """
-    if data["iter_counter"] < data["min_iters"]:
-        data["min_iters"] = data["iter_counter"]
-        data["shortest_paths"].clear()
-        data["shortest_paths"] = data["current_path"].copy()
-    elif data["iter_counter"] == data["min_iters"]:
-        for item in data["current_path"]:
-            data["shortest_paths"].append(item)
+def _run_in_parallel():
+    """ solves the puzzles list in config["jobs"] worker processes
+    The list is read and split into chunks of subsequent puzzles lazily (there are at most
+    2 * config["jobs"] chunks waiting for results); outputs and statistics of the chunks
+    are merged in the list order, so the results are the same as of the serial run
+    """
 
+    def _merge(results):
+        print(results["stdout"], end="")
+        if results["log_lines"]:
+            display.write_to_log(config, results["log_lines"])
+        for name, (calls, clues, options_removed, time_in) in results["methods"].items():
+            methods[name].calls += calls
+            methods[name].clues += clues
+            methods[name].options_removed += options_removed
+            methods[name].time_in += time_in
+        for name, stats in results["stats"].items():
+            methods[name].stats.merge(stats)
+        if results["schedule_weights"]:
+            solver.scheduler.merge(results["schedule_weights"])
+        for key in ("tot_solution_time", "tot_iterations", "iterated", "failures", "cache_hits"):
+            data[key] += results["data"][key]
+        data["max_iterations"] = max(data["max_iterations"], results["data"]["max_iterations"])
+        config["output_opts"]["header_line"] = results["header_line"]
+        if results["critical_error"]:
+            sys.exit()
+        if progress_bar:
+            for _ in range(results["puzzles"]):
+                progress_bar.next()
 
-def _update_all_paths_data():
-    """ update database of all solver paths data """
-    if data["iter_counter"] in data["all_paths"]:
-        for item in data["current_path"]:
-            data["all_paths"][data["iter_counter"]].append(item)
-    else:
-        data["all_paths"][data["iter_counter"]] = data["current_path"].copy()
+    progress_bar = None
+    if config["verbose"] == 0:
+        print()
+        progress_bar = _get_progress_bar()
+
+    methods = dict(_get_methods())
+    pending = deque()
+    with multiprocessing.Pool(config["jobs"], initializer=_init_worker, initargs=(config, data)) as pool:
+        while chunk := list(itertools.islice(puzzles, _CHUNK_SIZE)):
+            pending.append(pool.apply_async(_solve_puzzles_chunk, (chunk, )))
+            if len(pending) > 2 * config["jobs"]:
+                _merge(pending.popleft().get())
+        while pending:
+            _merge(pending.popleft().get())
+
+    if progress_bar:
+        progress_bar.finish()
+        if data["failures"] == 0:
+            print("\nDone without failure!")
+        else:
+            print("\nDone with some failures!")
+
+
+def _init_worker(parent_config, parent_data):
+    """ initializes solver data of a worker process (needed when the process is spawned, not forked) """
+    config.update(parent_config)
+    data.update(parent_data)
+    set_scheduler(config["schedule"], config["schedule_weights"])
+
+
+def _solve_puzzles_chunk(chunk):
+    """ solves the puzzles (list of (sudoku id, board) pairs) in a worker process
+    Return: dictionary of the chunk output (screen and log file) and solver statistics
+    collected since the chunk start
+    """
+    methods = _get_methods()
+    for _, method in methods:
+        method.calls = 0
+        method.clues = 0
+        method.options_removed = 0
+        method.time_in = 0
+        method.stats.reset()
+    for key in ("tot_solution_time", "tot_iterations", "iterated", "max_iterations", "failures", "cache_hits"):
+        data[key] = 0
+    config["output_buffer"] = []
+    config["output_opts"]["header_line"] = True
+
+    critical_error = False
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        try:
+            for data["current_sudoku"], puzzle in chunk:
+                boards.clear()
+                boards[data["current_sudoku"] - 1] = puzzle
+                if not config["output_opts"]["results_in_line"]:
+                    display.puzzle_id(config, data)
+                _solve_sudoku_puzzle()
+        except SystemExit:
+            critical_error = True
+
+    return {
+        "puzzles": len(chunk),
+        "stdout": stdout.getvalue(),
+        "log_lines": config["output_buffer"],
+        "methods": {name: (method.calls, method.clues, method.options_removed, method.time_in)
+                    for name, method in methods},
+        "stats": {name: method.stats for name, method in methods},
+        "schedule_weights": solver.scheduler.take_learned() if solver.scheduler else None,
+        "data": {key: data[key] for key in ("tot_solution_time", "tot_iterations", "iterated",
+                                            "max_iterations", "failures", "cache_hits")},
+        "header_line": config["output_opts"]["header_line"],
+        "critical_error": critical_error,
+    }
 
 
 def _get_methods():
@@ -0,0 +1,12 @@
+# -*- coding: UTF-8 -*-
+
+""" pytest configuration: the solver modules are imported from the repository root """
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 17 givens puzzle (minimal: removing any given makes the solution ambiguous) and its solution
+PUZZLE = "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......"
+SOLUTION = "417369825632158947958724316825437169791586432346912758289643571573291684164875293"
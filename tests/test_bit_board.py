@@ -0,0 +1,41 @@
+# -*- coding: UTF-8 -*-
+
+""" Tests of the bit mask board representation (bit_board.py) """
+
+from bit_board import BitBoard, HOUSES, digits_to_mask, mask_to_digits, popcount, lowest_bit, lowest_digit
+from conftest import PUZZLE
+
+
+def test_masks():
+    assert digits_to_mask("158") == 0b010010001
+    assert digits_to_mask(".") == digits_to_mask("") == 0
+    assert mask_to_digits(0b010010001) == "158"
+    assert popcount(0b010010001) == 3
+    assert lowest_bit(0b010010000) == 0b000010000
+    assert lowest_bit(0) == 0
+    assert lowest_digit(0b010010000) == "5"
+    assert lowest_digit(0) is None
+
+
+def test_board_round_trip():
+    board = list(PUZZLE)
+    board[1] = "1269"
+    bit_board = BitBoard(board)
+    assert len(bit_board) == 81
+    assert bit_board.to_board() == board
+    assert bit_board.count(1) == 4
+    assert bit_board.digits(1) == "1269"
+    assert bit_board[0] == digits_to_mask("4")
+
+
+def test_remove_and_house_masks():
+    board = ["."] * 81
+    board[:4] = ["4", "12", "239", "19"]
+    bit_board = BitBoard(board)
+    assert bit_board.remove(2, digits_to_mask("358")) == digits_to_mask("3")
+    assert bit_board.digits(2) == "29"
+    row = HOUSES[0]
+    assert mask_to_digits(bit_board.house_mask(row)) == "1249"
+    assert mask_to_digits(bit_board.house_mask(row, unsolved_only=True)) == "129"
+    assert bit_board.positions(row, digits_to_mask("9")) == 0b1100
+    assert bit_board.positions(row, digits_to_mask("4")) == 0b0001
@@ -0,0 +1,55 @@
+# -*- coding: UTF-8 -*-
+
+""" Tests of the union-find connected components of the cell graph (cell_graph.py) """
+
+import random
+
+from cell_graph import CellGraph
+
+
+def _traversed_components(graph):
+    """ connected components found by traversing the neighbours lists """
+    components, seen = [], set()
+    for node in graph.nodes:
+        if node not in seen:
+            component, stack = set(), [node]
+            while stack:
+                cell = stack.pop()
+                if cell not in component:
+                    component.add(cell)
+                    stack.extend(graph.adj[cell])
+            seen |= component
+            components.append(component)
+    return components
+
+
+def test_components_of_chains():
+    graph = CellGraph()
+    graph.add_edge(10, 2)
+    graph.add_edge(40, 41)
+    graph.add_edge(2, 30)
+    graph.add_edge(41, 80, "12")
+    graph.add_edge(30, 10)
+    assert graph.connected_components() == [{2, 10, 30}, {40, 41, 80}]
+    graph.add_edge(80, 30)
+    assert graph.connected_components() == [{2, 10, 30, 40, 41, 80}]
+    assert graph.nodes == [10, 2, 40, 41, 30, 80]
+
+
+def test_components_match_traversal():
+    rnd = random.Random(0)
+    for _ in range(50):
+        graph = CellGraph()
+        for _ in range(rnd.randrange(1, 60)):
+            cell_1, cell_2 = rnd.sample(range(81), 2)
+            graph.add_edge(cell_1, cell_2)
+        assert graph.connected_components() == _traversed_components(graph)
+
+
+def test_duplicate_edge_replaces_candidates():
+    graph = CellGraph()
+    graph.add_edge(5, 7, "3")
+    graph.add_edge(7, 5, "39")
+    assert graph.adj[5] == [7] and graph.adj[7] == [5]
+    assert list(graph.edges()) == [(5, 7)]
+    assert graph.edge_candidates(7, 5) == "39"
@@ -0,0 +1,51 @@
+# -*- coding: UTF-8 -*-
+
+""" Tests of the exact cover solver (dlx.py) """
+
+import dlx
+from conftest import PUZZLE, SOLUTION
+
+
+def test_unique_solution():
+    result = dlx.solve(list(PUZZLE))
+    assert result.count == 1
+    assert "".join(result.solution) == SOLUTION
+    assert result.nodes > 0
+
+
+def test_solved_board():
+    result = dlx.solve(list(SOLUTION))
+    assert result.count == 1
+    assert "".join(result.solution) == SOLUTION
+
+
+def test_empty_grid_stops_at_limit():
+    for limit in (1, 2, 5):
+        result = dlx.solve(["."] * 81, limit)
+        assert result.count == limit
+        assert result.solution is not None
+
+
+def test_given_removed_gives_multiple_solutions():
+    board = list(PUZZLE)
+    board[0] = "."
+    result = dlx.solve(board)
+    assert result.count == 2
+    assert result.solution is not None
+
+
+def test_conflicting_givens():
+    board = list(PUZZLE)
+    board[1] = board[0]
+    result = dlx.solve(board)
+    assert result.count == 0
+    assert result.solution is None
+
+
+def test_candidates_strings():
+    board = list(PUZZLE)
+    board[1] = "16"
+    board[2] = "27"
+    assert "".join(dlx.solve(board).solution) == SOLUTION
+    board[1] = "26"
+    assert dlx.solve(board).count == 0
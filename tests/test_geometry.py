@@ -0,0 +1,48 @@
+# -*- coding: UTF-8 -*-
+
+""" Tests of the precomputed geometry tables (geometry.py) against the cell lists of utils.py """
+
+import random
+
+from geometry import CELL_BIT, HOUSE_MASK, PEERS_MASK, COMMON_PEERS, INTERSECTIONS, LINE_BOX
+from geometry import CHUTE_CELLS, CHUTE_BOXES, CELL_CHUTES, mask_cells, cells_mask
+from utils import ALL_NBRS, CELLS_IN_ROW, CELLS_IN_COL, CELLS_IN_BOX, CELL_BOX
+
+
+def test_mask_cells_round_trip():
+    rnd = random.Random(0)
+    for _ in range(100):
+        cells = sorted(rnd.sample(range(81), rnd.randrange(82)))
+        assert mask_cells(cells_mask(cells)) == tuple(cells)
+    assert mask_cells(0) == ()
+    assert mask_cells(CELL_BIT[80]) == (80, )
+
+
+def test_houses_and_peers():
+    for house_id, house in enumerate(CELLS_IN_ROW + CELLS_IN_COL + CELLS_IN_BOX):
+        assert set(mask_cells(HOUSE_MASK[house_id])) == set(house)
+    for cell in range(81):
+        assert set(mask_cells(PEERS_MASK[cell])) == set(ALL_NBRS[cell])
+        for other_cell in range(81):
+            common = set(ALL_NBRS[cell]) & set(ALL_NBRS[other_cell])
+            assert set(COMMON_PEERS[cell][other_cell]) == common - {cell, other_cell}
+
+
+def test_intersections():
+    assert len(INTERSECTIONS) == 54
+    for intersection in INTERSECTIONS:
+        line = set(mask_cells(HOUSE_MASK[intersection.line]))
+        box = set(mask_cells(HOUSE_MASK[intersection.box]))
+        assert set(intersection.cells) == line & box and len(intersection.cells) == 3
+        assert set(intersection.line_rest) == line - box
+        assert set(intersection.box_rest) == box - line
+        assert LINE_BOX[intersection.line, intersection.box] is intersection
+
+
+def test_chutes():
+    for cell in range(81):
+        for chute in CELL_CHUTES[cell]:
+            assert cell in CHUTE_CELLS[chute]
+            assert CELL_BOX[cell] in CHUTE_BOXES[chute]
+    assert sorted(cell for chute in range(3) for cell in CHUTE_CELLS[chute]) == list(range(81))
+    assert sorted(cell for chute in range(3, 6) for cell in CHUTE_CELLS[chute]) == list(range(81))
@@ -0,0 +1,74 @@
+# -*- coding: UTF-8 -*-
+
+""" Tests of the alternating inference chains search of the link graph (link_graph.py) """
+
+import random
+
+from bit_board import PositionIndex, ChangeJournal
+from conftest import SOLUTION
+from link_graph import LinkGraph
+
+
+def _random_board(rnd):
+    """ board of candidates including the SOLUTION digits, with some solved cells and bi-value cells """
+    board = []
+    for cell in range(81):
+        if rnd.random() < 0.3:
+            board.append(SOLUTION[cell])
+        else:
+            candidates = {SOLUTION[cell]} | {digit for digit in "123456789" if rnd.random() < 0.25}
+            if len(candidates) == 1:
+                candidates.add("1" if SOLUTION[cell] != "1" else "2")
+            board.append("".join(sorted(candidates)))
+    return board
+
+
+def _chain_length(links, start, end, conjugate_pairs):
+    """ number of links of the shortest chain from start to end (plain breadth-first search) """
+    depths = {(start, False): 0}
+    fringe = [(start, False)]
+    while fringe:
+        next_fringe = []
+        for state in fringe:
+            node, true = state
+            for neighbour in (links.weak_neighbours(node) if true else
+                              links.strong_neighbours(node, conjugate_pairs)):
+                if (neighbour, not true) not in depths:
+                    depths[(neighbour, not true)] = depths[state] + 1
+                    next_fringe.append((neighbour, not true))
+        fringe = next_fringe
+    return depths.get((end, True))
+
+
+def test_chain_is_shortest():
+    rnd = random.Random(0)
+    chains = 0
+    for _ in range(30):
+        board = _random_board(rnd)
+        links = LinkGraph(PositionIndex(), ChangeJournal()).sync(board)
+        nodes = [(cell, digit) for cell in range(81) if len(board[cell]) > 1 for digit in board[cell]]
+        for _ in range(20):
+            start, end = rnd.choice(nodes), rnd.choice(nodes)
+            for conjugate_pairs in (True, False):
+                chain = links.chain(start, end, conjugate_pairs)
+                length = _chain_length(links, start, end, conjugate_pairs)
+                if chain is None:
+                    assert length is None
+                    continue
+                chains += 1
+                assert len(chain) - 1 == length
+                assert chain[0] == start and chain[-1] == end
+                for idx in range(len(chain) - 1):
+                    neighbours = (links.strong_neighbours(chain[idx], conjugate_pairs) if idx % 2 == 0 else
+                                  links.weak_neighbours(chain[idx]))
+                    assert chain[idx + 1] in neighbours
+    assert chains
+
+
+def test_bi_value_chain():
+    board = _random_board(random.Random(1))
+    board[0], board[1], board[11] = "12", "23", "13"
+    links = LinkGraph(PositionIndex(), ChangeJournal()).sync(board)
+    chain = links.chain((0, "1"), (11, "1"), conjugate_pairs=False)
+    assert chain is not None and len(chain) == 6
+    assert chain[0] == (0, "1") and chain[-1] == (11, "1")
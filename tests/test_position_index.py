@@ -0,0 +1,82 @@
+# -*- coding: UTF-8 -*-
+
+""" Tests of the position index and the change journal kept up to date
+by eliminate_options() and place_digit() """
+
+import pytest
+
+from bit_board import PositionIndex, HOUSES
+from conftest import PUZZLE, SOLUTION
+from solver import SolverStatus
+from utils import set_remaining_candidates, eliminate_options, place_digit, DeadEndException
+
+
+def _solver_status(board):
+    solver_status = SolverStatus()
+    solver_status.initialize(board)
+    set_remaining_candidates(board, solver_status)
+    solver_status.positions.sync(board)
+    return solver_status
+
+
+def _assert_index_matches(positions, board):
+    """ the incrementally updated index has to be the same as the one built from scratch """
+    rebuilt = PositionIndex()
+    rebuilt.build(board)
+    assert positions.valid
+    assert list(positions.masks) == list(rebuilt.masks)
+    assert list(positions.unsolved) == list(rebuilt.unsolved)
+
+
+def test_eliminate_options_updates_index():
+    board = list(PUZZLE)
+    solver_status = _solver_status(board)
+    to_eliminate = {(digit, cell) for cell in range(81) if len(board[cell]) > 2
+                    for digit in board[cell] if digit != SOLUTION[cell]}
+    to_eliminate = set(sorted(to_eliminate)[::3])
+    eliminate_options(solver_status, board, to_eliminate, None)
+    _assert_index_matches(solver_status.positions, board)
+    for digit, cell in to_eliminate:
+        for house_id, bit in ((house_id, 1 << house.index(cell)) for house_id, house in enumerate(HOUSES)
+                              if cell in house):
+            assert not solver_status.positions.get(house_id, digit) & bit
+
+
+def test_place_digit_updates_index():
+    board = list(PUZZLE)
+    solver_status = _solver_status(board)
+    for cell in range(0, 81, 7):
+        if len(board[cell]) > 1:
+            place_digit(cell, SOLUTION[cell], board, solver_status, None)
+            _assert_index_matches(solver_status.positions, board)
+            assert cell in solver_status.cells_solved
+
+
+def test_dead_end():
+    board = list(PUZZLE)
+    solver_status = _solver_status(board)
+    cell = next(cell for cell in range(81) if len(board[cell]) == 2)
+    with pytest.raises(DeadEndException):
+        eliminate_options(solver_status, board, {(digit, cell) for digit in board[cell]}, None)
+
+
+def test_journal_stamps_changed_digits_and_houses():
+    board = list(PUZZLE)
+    solver_status = _solver_status(board)
+    journal = solver_status.journal
+    journal.record_miss("strategy")
+    assert journal.changed_digits("strategy") == []
+    assert journal.changed_houses("strategy") == set()
+    assert len(journal.changed_digits("other")) == 9
+
+    cell = next(cell for cell in range(81) if len(board[cell]) > 2)
+    digit = next(digit for digit in board[cell] if digit != SOLUTION[cell])
+    eliminate_options(solver_status, board, {(digit, cell)}, None)
+    assert journal.changed_digits("strategy") == [digit]
+    assert journal.changed_houses("strategy") == {cell // 9, 9 + cell % 9, 18 + cell // 27 * 3 + cell % 9 // 3}
+
+    journal.record_miss("strategy")
+    solver_status.board_changed()
+    assert not solver_status.positions.valid
+    assert len(journal.changed_digits("strategy")) == 9
+    assert len(journal.changed_houses("strategy")) == 27
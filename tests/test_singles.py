@@ -0,0 +1,55 @@
+# -*- coding: UTF-8 -*-
+
+""" Tests of the text mode singles: propagation to a fixed point and per technique credit """
+
+import singles
+from bit_board import HOUSES
+from conftest import PUZZLE, SOLUTION
+from solver import SolverStatus
+from utils import set_remaining_candidates
+
+
+def _text_mode(puzzle):
+    board = list(puzzle)
+    solver_status = SolverStatus()
+    solver_status.initialize(board)
+    set_remaining_candidates(board, solver_status)
+    solver_status.pencilmarks = True
+    return board, solver_status
+
+
+def _has_hidden_single(board):
+    for house in HOUSES:
+        for digit in "123456789":
+            cells = [cell for cell in house if digit in board[cell]]
+            if len(cells) == 1 and len(board[cells[0]]) > 1:
+                return True
+    return False
+
+
+def test_propagation_reaches_fixed_point():
+    board, solver_status = _text_mode(PUZZLE)
+    naked_clues, hidden_clues = singles.naked_single.clues, singles.hidden_single.clues
+    unsolved = sum(len(value) > 1 for value in board)
+
+    assert singles.naked_single(solver_status, board, None) == {"solver_tool": "naked_single"}
+    placed = unsolved - sum(len(value) > 1 for value in board)
+    assert placed
+    assert not solver_status.naked_singles
+    assert not any(len(value) == 1 and value != SOLUTION[cell] for cell, value in enumerate(board))
+    assert not _has_hidden_single(board)
+    assert singles.naked_single.clues - naked_clues + singles.hidden_single.clues - hidden_clues == placed
+    assert singles.naked_single(solver_status, board, None) is None
+    assert singles.hidden_single(solver_status, board, None) is None
+
+
+def test_hidden_single_places_one_digit():
+    board, solver_status = _text_mode(PUZZLE)
+    assert not solver_status.naked_singles
+    clues = singles.hidden_single.clues
+    unsolved = sum(len(value) > 1 for value in board)
+
+    assert singles.hidden_single(solver_status, board, None) == {"solver_tool": "hidden_single"}
+    assert sum(len(value) > 1 for value in board) == unsolved - 1
+    assert singles.hidden_single.clues == clues + 1
+    assert all(len(value) > 1 or value == SOLUTION[cell] for cell, value in enumerate(board))
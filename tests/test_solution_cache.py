@@ -0,0 +1,58 @@
+# -*- coding: UTF-8 -*-
+
+""" Tests of the canonical form of puzzles (solution_cache.py) """
+
+import random
+
+import pytest
+
+from conftest import PUZZLE, SOLUTION
+from solution_cache import canonical_form, to_canonical, from_canonical
+
+
+def _permutation(rnd):
+    """ return random order of rows (or columns) allowed by sudoku symmetries """
+    order = []
+    for band in rnd.sample(range(3), 3):
+        order.extend(3 * band + row for row in rnd.sample(range(3), 3))
+    return order
+
+
+def _transform(board, rnd):
+    """ return the board with a random symmetry applied: digits relabeled, bands, stacks,
+    rows and columns permuted and (possibly) transposed """
+    labels = dict(zip("123456789", rnd.sample("123456789", 9)))
+    rows, cols = _permutation(rnd), _permutation(rnd)
+    transposed = rnd.random() < 0.5
+    transformed = []
+    for row in rows:
+        for col in cols:
+            value = board[col * 9 + row if transposed else row * 9 + col]
+            transformed.append(labels.get(value, "."))
+    return transformed
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_canonical_form_is_invariant(seed):
+    rnd = random.Random(seed)
+    canonical, _ = canonical_form(list(PUZZLE))
+    assert canonical_form(_transform(list(PUZZLE), rnd))[0] == canonical
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_round_trip(seed):
+    rnd = random.Random(seed)
+    board = _transform(list(PUZZLE), rnd)
+    solution = _transform(list(SOLUTION), random.Random(seed))
+    canonical, transformation = canonical_form(board)
+    assert "".join(to_canonical(board, transformation)).replace(".", "0") == canonical
+    assert from_canonical(canonical, transformation) == board
+    assert from_canonical(to_canonical(solution, transformation), transformation) == solution
+
+
+def test_canonical_form_format():
+    canonical, transformation = canonical_form(list(PUZZLE))
+    assert len(canonical) == 81
+    assert sum(value != "0" for value in canonical) == 17
+    first_appearance = "".join(sorted(set(canonical) - {"0"}, key=canonical.index))
+    assert first_appearance == "123456789"[:len(first_appearance)]
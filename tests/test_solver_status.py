@@ -0,0 +1,71 @@
+# -*- coding: UTF-8 -*-
+
+""" Tests of backtracking of the solver status with the undo trail (checkpoint / rollback) """
+
+from bit_board import PositionIndex
+from conftest import PUZZLE, SOLUTION
+from solver import SolverStatus
+from utils import set_remaining_candidates, place_digit, eliminate_options
+
+
+def _snapshot(board, solver_status):
+    return board.copy(), set(solver_status.cells_solved), set(solver_status.naked_singles)
+
+
+def _assert_positions_match(solver_status, board):
+    rebuilt = PositionIndex()
+    rebuilt.build(board)
+    positions = solver_status.positions.sync(board)
+    assert list(positions.masks) == list(rebuilt.masks)
+    assert list(positions.unsolved) == list(rebuilt.unsolved)
+
+
+def _guess(board, solver_status, cells):
+    for cell in cells:
+        if len(board[cell]) > 1:
+            place_digit(cell, SOLUTION[cell], board, solver_status, None)
+
+
+def test_rollback_restores_board_and_sets():
+    board = list(PUZZLE)
+    solver_status = SolverStatus()
+    solver_status.initialize(board)
+    set_remaining_candidates(board, solver_status)
+    solver_status.cells_solved.update({0, 1})
+    before = _snapshot(board, solver_status)
+
+    checkpoint = solver_status.checkpoint()
+    _guess(board, solver_status, range(0, 81, 5))
+    assert _snapshot(board, solver_status) != before
+    solver_status.rollback(checkpoint)
+    assert _snapshot(board, solver_status) == before
+    _assert_positions_match(solver_status, board)
+    solver_status.release(checkpoint)
+    assert not solver_status.trail.records
+
+
+def test_nested_checkpoints():
+    board = list(PUZZLE)
+    solver_status = SolverStatus()
+    solver_status.initialize(board)
+    set_remaining_candidates(board, solver_status)
+    before = _snapshot(board, solver_status)
+
+    outer = solver_status.checkpoint()
+    _guess(board, solver_status, range(0, 27, 4))
+    after_outer = _snapshot(board, solver_status)
+
+    inner = solver_status.checkpoint()
+    cell = next(cell for cell in range(81) if len(board[cell]) > 2)
+    eliminate_options(solver_status, board, {(digit, cell) for digit in board[cell][1:]}, None)
+    assert cell in solver_status.naked_singles
+    _guess(board, solver_status, range(27, 81, 4))
+    solver_status.rollback(inner)
+    assert _snapshot(board, solver_status) == after_outer
+    _assert_positions_match(solver_status, board)
+    solver_status.release(inner)
+
+    solver_status.rollback(outer)
+    assert _snapshot(board, solver_status) == before
+    _assert_positions_match(solver_status, board)
+    solver_status.release(outer)
@@ -0,0 +1,103 @@
+# -*- coding: UTF-8 -*-
+
+""" Tests of the undo log of the solver state (trail.py) """
+
+import pytest
+
+from trail import Trail, TrailedSet
+
+
+def _change(items, method):
+    """ apply a mutating set method (or in-place operator) to the set """
+    if method == "add":
+        items.add(9)
+    elif method == "discard":
+        items.discard(1)
+    elif method == "remove":
+        items.remove(2)
+    elif method == "pop":
+        items.pop()
+    elif method == "clear":
+        items.clear()
+    elif method == "update":
+        items.update([7, 8], (1, 9))
+    elif method == "difference_update":
+        items.difference_update([1], {2, 5})
+    elif method == "intersection_update":
+        items.intersection_update({1, 3, 8})
+    elif method == "symmetric_difference_update":
+        items.symmetric_difference_update({1, 8})
+    elif method == "ior":
+        items |= {6, 7}
+    elif method == "isub":
+        items -= {1, 3}
+    elif method == "iand":
+        items &= {2, 3, 9}
+    elif method == "ixor":
+        items ^= {3, 4}
+    return items
+
+
+METHODS = ("add", "discard", "remove", "pop", "clear", "update", "difference_update", "intersection_update",
+           "symmetric_difference_update", "ior", "isub", "iand", "ixor")
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_rollback_of_set_changes(method):
+    trail = Trail()
+    items = TrailedSet(trail, {1, 2, 3})
+    checkpoint = trail.checkpoint()
+    changed = _change(items, method)
+    assert changed is items
+    assert isinstance(items, TrailedSet)
+    assert items == _change({1, 2, 3}, method) or method == "pop"
+    assert items != {1, 2, 3}
+    trail.rollback(checkpoint)
+    assert items == {1, 2, 3}
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_changes_without_checkpoint_are_not_logged(method):
+    trail = Trail()
+    items = TrailedSet(trail, {1, 2, 3})
+    _change(items, method)
+    assert not trail.records
+
+
+def test_in_place_operations_with_self():
+    trail = Trail()
+    items = TrailedSet(trail, {1, 2, 3})
+    checkpoint = trail.checkpoint()
+    items -= items
+    assert not items
+    items.update({4})
+    items ^= items
+    assert not items
+    trail.rollback(checkpoint)
+    assert items == {1, 2, 3}
+
+
+def test_nested_checkpoints():
+    trail = Trail()
+    board = ["1", "23", "456"]
+    items = TrailedSet(trail)
+    outer = trail.checkpoint()
+    trail.save_cell(board, 1)
+    board[1] = "3"
+    items.add(1)
+
+    inner = trail.checkpoint()
+    trail.save_cell(board, 2)
+    board[2] = "5"
+    items.update({2, 3})
+    trail.rollback(inner)
+    assert board == ["1", "3", "456"]
+    assert items == {1}
+
+    trail.release(inner)
+    assert trail.records
+    trail.rollback(outer)
+    assert board == ["1", "23", "456"]
+    assert not items
+    trail.release(outer)
+    assert not trail.records and not trail.depth
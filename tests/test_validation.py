@@ -0,0 +1,70 @@
+# -*- coding: UTF-8 -*-
+
+""" Tests of the puzzles validation (validation.py), cross-checked with the exact cover solver """
+
+import random
+
+import pytest
+
+import dlx
+from conftest import PUZZLE, SOLUTION
+from validation import count_solutions, get_puzzle_status
+
+
+def _unsolvable():
+    """ return board without conflicts and without solution: the last cell of the first row
+    can only be 9, which is already in its column """
+    board = ["."] * 81
+    board[:8] = list("12345678")
+    board[9 * 4 + 8] = "9"
+    return board
+
+
+def test_unique():
+    assert get_puzzle_status(list(PUZZLE)) == "unique"
+    assert get_puzzle_status(list(SOLUTION)) == "unique"
+
+
+def test_multiple():
+    board = list(PUZZLE)
+    board[0] = "."
+    assert get_puzzle_status(board) == "multiple"
+    assert get_puzzle_status(["."] * 81) == "multiple"
+
+
+def test_unsolvable():
+    assert get_puzzle_status(_unsolvable()) == "unsolvable"
+
+
+@pytest.mark.parametrize("cells", [(0, 1), (0, 72), (0, 20)])
+def test_invalid(cells):
+    board = list(PUZZLE)
+    board[cells[1]] = board[cells[0]]
+    assert get_puzzle_status(board) == "invalid"
+    assert count_solutions(board) == 0
+
+
+def test_limit():
+    assert count_solutions(["."] * 81, limit=5) == 5
+    assert count_solutions(list(PUZZLE), limit=5) == 1
+
+
+def _random_boards(count):
+    """ generate boards with 0, 1 or more solutions: givens of the solution removed
+    and (sometimes) a wrong given added """
+    rnd = random.Random(0)
+    for _ in range(count):
+        board = [value if rnd.random() < 0.35 else "." for value in SOLUTION]
+        if rnd.random() < 0.5:
+            cell = rnd.randrange(81)
+            board[cell] = rnd.choice("123456789")
+        yield board
+
+
+def test_count_matches_dlx():
+    statuses = set()
+    for board in _random_boards(150):
+        for limit in (1, 2, 3):
+            assert count_solutions(board, limit) == dlx.solve(board, limit).count
+        statuses.add(get_puzzle_status(board))
+    assert statuses == {"unique", "multiple", "unsolvable", "invalid"}
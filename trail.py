@@ -0,0 +1,140 @@
+# -*- coding: UTF-8 -*-
+
+""" UNDO LOG (TRAIL) OF THE SOLVER STATE CHANGES
+
+    CLASS DEFINITIONS:
+        Trail - log of changes of the board cells and of the solver status sets
+        TrailedSet - set logging its changes in the trail
+
+    While there is an open checkpoint every change of a board cell (it has to be saved with
+    save_cell() just before the change) and every change of a TrailedSet is logged in the trail
+    together with data needed to undo it. Rolling back to a checkpoint undoes the changes
+    in reverse order, so the cost of backtracking is proportional to the number of changes made
+    since the checkpoint, not to the size of the solver state
+"""
+
+_CELL = 0
+_ADDED = 1
+_REMOVED = 2
+
+
+class Trail:
+    """ Log of changes of the board cells and TrailedSet sets, with nested checkpoints """
+
+    def __init__(self):
+        self.records = []
+        self.depth = 0
+
+    def checkpoint(self):
+        """ open a checkpoint, return its position in the log """
+        self.depth += 1
+        return len(self.records)
+
+    def release(self, checkpoint):
+        """ close the checkpoint keeping the changes made since it was opened """
+        self.depth -= 1
+        if not self.depth:
+            self.records.clear()
+
+    def rollback(self, checkpoint):
+        """ undo the changes made since the checkpoint (the checkpoint remains open) """
+        records = self.records
+        while len(records) > checkpoint:
+            kind, target, key, value = records.pop()
+            if kind == _CELL:
+                target[key] = value
+            elif kind == _ADDED:
+                set.discard(target, key)
+            else:
+                set.add(target, key)
+
+    def clear(self):
+        """ close all checkpoints and clear the log """
+        self.records.clear()
+        self.depth = 0
+
+    def save_cell(self, board, cell):
+        """ log the cell value before it is changed """
+        if self.depth:
+            self.records.append((_CELL, board, cell, board[cell]))
+
+
+class TrailedSet(set):
+    """ Set logging its changes in the trail (all in-place set methods and operators
+    are routed through add() and discard()) """
+
+    def __init__(self, trail, items=()):
+        super().__init__(items)
+        self.trail = trail
+
+    def add(self, item):
+        if self.trail.depth and item not in self:
+            self.trail.records.append((_ADDED, self, item, None))
+        set.add(self, item)
+
+    def discard(self, item):
+        if self.trail.depth and item in self:
+            self.trail.records.append((_REMOVED, self, item, None))
+        set.discard(self, item)
+
+    def remove(self, item):
+        if item not in self:
+            raise KeyError(item)
+        self.discard(item)
+
+    def pop(self):
+        item = set.pop(self)
+        if self.trail.depth:
+            self.trail.records.append((_REMOVED, self, item, None))
+        return item
+
+    def clear(self):
+        if self.trail.depth:
+            self.trail.records.extend((_REMOVED, self, item, None) for item in self)
+        set.clear(self)
+
+    def update(self, *others):
+        for other in others:
+            for item in other:
+                self.add(item)
+
+    def difference_update(self, *others):
+        for other in others:
+            for item in list(other):
+                self.discard(item)
+
+    def intersection_update(self, *others):
+        kept = set.intersection(self, *others)
+        for item in [item for item in self if item not in kept]:
+            self.discard(item)
+
+    def symmetric_difference_update(self, other):
+        for item in set(other):
+            if item in self:
+                self.discard(item)
+            else:
+                self.add(item)
+
+    def __ior__(self, other):
+        if not isinstance(other, (set, frozenset)):
+            return NotImplemented
+        self.update(other)
+        return self
+
+    def __isub__(self, other):
+        if not isinstance(other, (set, frozenset)):
+            return NotImplemented
+        self.difference_update(other)
+        return self
+
+    def __iand__(self, other):
+        if not isinstance(other, (set, frozenset)):
+            return NotImplemented
+        self.intersection_update(other)
+        return self
+
+    def __ixor__(self, other):
+        if not isinstance(other, (set, frozenset)):
+            return NotImplemented
+        self.symmetric_difference_update(other)
+        return self
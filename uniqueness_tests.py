@@ -25,6 +25,7 @@ from collections import defaultdict
 
 from utils import CELLS_IN_ROW, CELLS_IN_COL, CELL_BOX, CELL_ROW, CELL_COL, CELLS_IN_BOX, ALL_NBRS
 from utils import set_remaining_candidates, eliminate_options, get_stats
+from geometry import COMMON_PEERS
 
 
 def _get_xyz(n_z, board, bi_value, cells_a, cells_b):
@@ -141,7 +142,7 @@ def test_2(solver_status, board, window):
                         if board[ceiling_a] == board[ceiling_b] and len(boxes) == 2:
                             z_candidate = board[ceiling_a].replace(bi_value[0], '').replace(bi_value[1], '')
                             to_eliminate = set()
-                            for cell in set(ALL_NBRS[ceiling_a]).intersection(ALL_NBRS[ceiling_b]):
+                            for cell in COMMON_PEERS[ceiling_a][ceiling_b]:
                                 if z_candidate in board[cell]:
                                     to_eliminate.add((z_candidate, cell))
                             if to_eliminate:
@@ -181,7 +182,7 @@ def test_3(solver_status, board, window):
     """
 
     def find_naked_subset(subset_size, ceiling_a, ceiling_b, bi_value, subset_candidates, by_row):
-        search_area = {cell for cell in set(ALL_NBRS[ceiling_a]).intersection(ALL_NBRS[ceiling_b])
+        search_area = {cell for cell in COMMON_PEERS[ceiling_a][ceiling_b]
                        if len(board[cell]) > 1}
         possible_subset_nodes = {cell for cell in search_area if len(board[cell]) <= subset_size 
                                  and set(board[cell]).intersection(subset_candidates) 
@@ -284,7 +285,7 @@ def test_4(solver_status, board, window):
                         boxes = {floor_a[2], floor_b[2], CELL_BOX[ceiling_a], CELL_BOX[ceiling_b]}
                         if len(boxes) == 2:
                             to_eliminate = None
-                            cells = set(ALL_NBRS[ceiling_a]).intersection(ALL_NBRS[ceiling_b])
+                            cells = set(COMMON_PEERS[ceiling_a][ceiling_b])
                             if not _get_candidate_count(cells, bi_value[0]):
                                 to_eliminate = {(bi_value[1], ceiling_a), (bi_value[1], ceiling_b)}
                             elif not _get_candidate_count(cells, bi_value[1]):
@@ -343,7 +344,7 @@ def test_5(solver_status, board, window):
                         other_candidates = set(board[node_b]).difference(bi_value)
                         c_chain = _get_c_chain(nodes, bi_value, other_candidates)
                         z_value = other_candidates.pop()
-                        to_eliminate = {(z_value, cell) for cell in set(ALL_NBRS[node_b]).intersection(ALL_NBRS[node_d])
+                        to_eliminate = {(z_value, cell) for cell in COMMON_PEERS[node_b][node_d]
                                         if z_value in board[cell]}
                         if to_eliminate:
                             solver_status.capture_baseline(board, window)
@@ -3,16 +3,20 @@
 """ Utilities related to input files """
 
 import os
+import re
 import sys
+import mmap
 import time
 import glob
 import difflib
 
 from collections import defaultdict
-from itertools import combinations
 from pathlib import Path
 
 from display import error_message, did_you_mean_message
+from bit_board import mask_positions, ROW_HOUSES, COL_HOUSES
+from geometry import ALL_CELLS_MASK, PEERS_MASK, mask_cells
+from instrumentation import get_strategy_stats
 
 
 def box_cells(k):
@@ -55,18 +59,28 @@ class DeadEndException(Exception):      # TODO
 
 
 def get_stats(func):
-    """ Decorator for getting solver method statistics """
-    def function_wrapper(board, window, lone_singles):
+    """ Decorator for getting solver method statistics
+    Besides the totals kept in the function attributes, latency of each call (hit or miss)
+    and the number of options it removed are recorded in the method StrategyStats """
+    stats = get_strategy_stats(func.__name__)
+
+    def function_wrapper(solver_status, board, window):
         function_wrapper.calls += 1
-        start = time.time()
-        ret = func(board, window, lone_singles)
-        function_wrapper.time_in += time.time() - start
+        options_removed = function_wrapper.options_removed
+        start = time.perf_counter_ns()
+        ret = func(solver_status, board, window)
+        latency = time.perf_counter_ns() - start
+        function_wrapper.time_in += latency / 1e9
+        stats.record(latency, bool(ret), function_wrapper.options_removed - options_removed)
+        if not ret:
+            solver_status.journal.record_miss(func.__name__)
         return ret
 
     function_wrapper.calls = 0
     function_wrapper.clues = 0
     function_wrapper.options_removed = 0
     function_wrapper.time_in = 0
+    function_wrapper.stats = stats
     function_wrapper.__name__ = func.__name__
     return function_wrapper
 
@@ -105,27 +119,6 @@ def is_single(board, house, value):
     return None
 
 
-def get_subsets(board, n_size_subset, als=False):
-    """ generator of dictionaries of n-size subsets:
-     - naked subsets if als == False
-     - als'es if als == True
-     The format of the 'subset' dictionary is: {candidate: {cell_1, ...}, ...}
-     """
-    for cells in (CELLS_IN_ROW, CELLS_IN_COL, CELLS_IN_BOX):
-        for house in cells:
-            unsolved = {cell for cell in house if len(board[cell]) > 1}
-            if len(unsolved) > n_size_subset + 1:
-                for subset in combinations(unsolved, n_size_subset):
-                    candidates = set("".join(board[cell_id] for cell_id in subset))
-                    expected_length = n_size_subset if not als else n_size_subset + 1
-                    if len(candidates) == expected_length:
-                        subset_data = defaultdict(set)
-                        for cell in subset:
-                            for candidate in board[cell]:
-                                subset_data[candidate].add(cell)
-                        yield house, subset_data
-
-
 def get_impacting_cells(digit, greyed_out, board):
     """ return set of (solved) cells that impose restraint on the greyed-out cells """
     impacting_cells = set()
@@ -136,10 +129,10 @@ def get_impacting_cells(digit, greyed_out, board):
 
 def get_impacted_cells(board, subset):
     """ return set of unsolved cells impacted by subset cells """
-    impacted_cells = set(range(81))
+    impacted_mask = ALL_CELLS_MASK
     for cell in subset:
-        impacted_cells = impacted_cells.intersection(ALL_NBRS[cell])
-    return {cell for cell in impacted_cells if len(board[cell]) > 1}
+        impacted_mask &= PEERS_MASK[cell]
+    return {cell for cell in mask_cells(impacted_mask) if len(board[cell]) > 1}
 
 
 def get_impacted_houses(cell, base_house=None, to_eliminate=None):
@@ -183,63 +176,29 @@ def get_pair_house(pair):
     return CELLS_IN_BOX[CELL_BOX[cell_a]]
 
 
-def get_strong_links(board):
-    """ return dictionary ({value: {(c1, c2), ...}} of strong links """
-
-    def _house_strong_links(house):
-        values = ''.join(board[cell] for cell in house if len(board) > 1)
-        for value in set(values):
-            if values.count(value) == 2:
-                pair = tuple([cell for cell in house if value in board[cell]])
-                strong_links[value].add(pair)
-
-    strong_links = defaultdict(set)
-    for idx in range(9):
-        _house_strong_links(CELLS_IN_ROW[idx])
-        _house_strong_links(CELLS_IN_COL[idx])
-        _house_strong_links(CELLS_IN_BOX[idx])
-    return strong_links
-
-
 def get_cell_candidates(cell_id, board, solver_status):
     """ return set of cell candidates """
     return SUDOKU_VALUES_SET.difference(
         ''.join(board[cell] for cell in ALL_NBRS[cell_id] if is_digit(cell, board, solver_status)))
 
 
-def get_pairs(board, by_row):
+def get_pairs(board, by_row, solver_status):
     # 'pairs' data structure:
     # {(col_1, col_2): {value: [row_1, ...]}} for 'by row' direction
     # {(row_1, row_2): {value: [col_1, ...]}} for 'by col' direction
+    positions = solver_status.positions.sync(board)
     pairs_dict = {}
     for idx in range(9):
-        cells = CELLS_IN_ROW[idx] if by_row else CELLS_IN_COL[idx]
-        unsolved = [cell for cell in cells if len(board[cell]) > 1]
-        options = "".join([board[cell] for cell in unsolved])
-        for value in set(options):
-            if options.count(value) == 2:
-                pair = tuple(j for j in range(9) if value in board[cells[j]])
+        house_id = (ROW_HOUSES if by_row else COL_HOUSES) + idx
+        for value in SUDOKU_VALUES_LIST:
+            if positions.count(house_id, value, unsolved_only=True) == 2:
+                pair = mask_positions(positions.get(house_id, value))
                 pair_item = pairs_dict.pop(pair, defaultdict(list))
                 pair_item[value].append(idx)
                 pairs_dict[pair] = pair_item
     return pairs_dict
 
 
-def get_2_upto_n_candidates(board, digit, n, by_row):
-    """ return dictionary of rows/columns nodes where there are 2 - n nodes
-    per line with the 'digit' candidate
-     - if 'by_row' is True, the returned data structure is {row: {col1, ...}, ...}
-     - if 'by_row' if False, the returned data structure is {column: {row1,...}, ...}
-    """
-    nodes = {}
-    for x_id in range(9):
-        cells = CELLS_IN_ROW[x_id] if by_row else CELLS_IN_COL[x_id]
-        candidates = "".join(board[cell] for cell in cells)
-        if 1 < candidates.count(digit) <= n:
-            nodes[x_id] = {y_id for y_id in range(9) if digit in board[cells[y_id]]}
-    return nodes
-
-
 def get_house_pairs(house, board):
     """ return dictionary of pairs in the house (row, column, or box) """
     # pairs data structure:
@@ -256,8 +215,17 @@ def get_house_pairs(house, board):
 
 def eliminate_options(solver_status, board, to_eliminate, window):
     """ utility function: removes options as per 'to_eliminate' list """
+    positions = solver_status.positions
+    journal = solver_status.journal
+    trail = solver_status.trail
     for option, cell in to_eliminate:
+        trail.save_cell(board, cell)
         board[cell] = board[cell].replace(option, "")
+        positions.discard(cell, option)
+        journal.touch(cell, option)
+        if len(board[cell]) < 2:
+            positions.set_solved(cell)
+            journal.touch_cell(cell, board[cell])
         if not board[cell]:
             if window and solver_status.iteration == 0:
                 window.critical_error = (cell, )
@@ -267,6 +235,17 @@ def eliminate_options(solver_status, board, to_eliminate, window):
             solver_status.naked_singles.add(cell)
 
 
+def apply_batch(solver_status, board, to_eliminate, strategy):
+    """ Batch mode (text mode only): remove all options the strategy found in one scan of the board
+    at once (instead of returning after the first found pattern) and update the strategy statistics
+    Returns: kwargs of the move
+    """
+    eliminate_options(solver_status, board, to_eliminate, None)
+    strategy.clues += len(solver_status.naked_singles)
+    strategy.options_removed += len(to_eliminate)
+    return {"solver_tool": strategy.__name__}
+
+
 def place_digit(cell_id, digit, board, solver_status, window):
     """ establish the given digit as cell value
     Returns:
@@ -275,6 +254,10 @@ def place_digit(cell_id, digit, board, solver_status, window):
     """
     if window:
         solver_status.capture_baseline(board, window)
+    solver_status.positions.place(cell_id, digit, board[cell_id])
+    solver_status.journal.touch_cell(cell_id, board[cell_id])
+    solver_status.journal.touch(cell_id, digit)
+    solver_status.trail.save_cell(board, cell_id)
     board[cell_id] = digit
     solver_status.cells_solved.add(cell_id)
     solver_status.naked_singles.discard(cell_id)
@@ -290,7 +273,9 @@ def place_digit(cell_id, digit, board, solver_status, window):
 
 def set_cell_candidates(cell_id, board, solver_status):
     """ Set cell remaining candidates """
+    solver_status.trail.save_cell(board, cell_id)
     board[cell_id] = ''.join(get_cell_candidates(cell_id, board, solver_status))
+    solver_status.board_changed()
     if len(board[cell_id]) == 1:
         solver_status.naked_singles.add(cell_id)
 
@@ -301,8 +286,10 @@ def set_neighbours_candidates(cell_id, board, window, solver_status):
         - remove all options that are not allowed
         - if the set is empty, set allowed options and remove the cell
           from the set with 'visible' options """
+    solver_status.board_changed()
     for cell in ALL_NBRS[cell_id]:
         if not is_digit(cell, board, solver_status):
+            solver_status.trail.save_cell(board, cell)
             if cell in window.options_visible:
                 updated_opts = set(board[cell]) & get_cell_candidates(cell, board, solver_status)
                 if updated_opts:
@@ -325,12 +312,43 @@ def set_remaining_candidates(board, solver_status):
             if not is_digit(cell, board, solver_status):
                 nbr_clues = [board[nbr_cell] for nbr_cell in ALL_NBRS[cell]
                              if is_digit(nbr_cell, board, solver_status)]
+                solver_status.trail.save_cell(board, cell)
                 board[cell] = "".join(value for value in SUDOKU_VALUES_LIST if value not in nbr_clues)
                 if len(board[cell]) == 1:
                     solver_status.naked_singles.add(cell)
+        solver_status.board_changed()
         solver_status.pencilmarks = True
 
 
+_PUZZLE_ITEM = re.compile(rb"[.0-9]")
+_PUZZLE_CHARS = b".0123456789"
+
+
+def read_puzzles(fname):
+    """ Generator of sudoku puzzles (lists of 81 one-character strings, '.' for empty cells)
+    defined in the file. The file is memory-mapped and read line by line.
+    The format is very flexible: the puzzle is defined by 81 subsequent characters from {'.', 0-9} set,
+    by rows; the characters can be separated by any other characters, also by line breaks.
+    Lines holding exactly one puzzle as 81 characters (the most common format) are taken directly
+    """
+    with open(fname, "rb") as puzzles_file:
+        try:
+            lines = mmap.mmap(puzzles_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:      # empty file
+            return
+        with lines:
+            items = []
+            for line in iter(lines.readline, b""):
+                line = line.rstrip()
+                if not items and len(line) == 81 and not line.translate(None, _PUZZLE_CHARS):
+                    yield list(line.decode().replace("0", "."))
+                    continue
+                items.extend("." if item == b"0" else item.decode() for item in _PUZZLE_ITEM.findall(line))
+                if len(items) == 81:
+                    yield items
+                    items = []
+
+
 def check_file(pathname, data, additional_info=""):
     """ Check if the required files exist
     - otherwise show appropriate message and with error code = -1
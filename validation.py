@@ -0,0 +1,155 @@
+# -*- coding: UTF-8 -*-
+
+""" VALIDATION OF SUDOKU PUZZLES (COUNTING OF SOLUTIONS)
+
+    GLOBAL FUNCTIONS:
+        count_solutions() - returns number of solutions of the board (up to the limit)
+        get_puzzle_status() - returns validation status of the puzzle
+        validate_puzzles() - validates puzzles of the file and writes status of each puzzle
+
+    LOCAL FUNCTIONS:
+        _has_conflicts() - checks if a digit is set more than once in a row, column or box
+        _search() - bitmask backtracking search with minimum remaining values heuristic
+        _validate() - returns puzzle string and its status (the unit of work of a worker process)
+
+    IMPORTANT DATA STRUCTURES:
+        used: [mask, ...] - masks of digits set in the rows (0-8), columns (9-17) and boxes (18-26)
+        unsolved: [(allowed mask, row, column, box), ...] - digits allowed in the cells to be solved
+            and indices of the cells houses in 'used'
+        puzzle status:
+            "unique" - the puzzle has exactly one solution
+            "multiple" - the puzzle has two or more solutions
+            "unsolvable" - the puzzle has no solution
+            "invalid" - a digit is given twice in a row, column or box
+
+    The search never updates the board: it branches on the unsolved cell with the fewest digits left
+    (a cell with one digit left is just set) unless a digit can go to only one cell of a house - then
+    the digit is set in the cell. A cell with no digit left or a house missing a digit ends the branch.
+    The search stops as soon as 'limit' solutions are found
+"""
+
+import csv
+import multiprocessing
+
+from bit_board import ALL_DIGITS_MASK, DIGIT_BIT, MASK_BITS, POPCOUNT, digits_to_mask
+from utils import CELLS_IN_ROW, CELLS_IN_COL, CELLS_IN_BOX, CELL_ROW, CELL_COL, CELL_BOX
+from utils import read_puzzles
+
+_CELL_USED = tuple((CELL_ROW[cell], 9 + CELL_COL[cell], 18 + CELL_BOX[cell]) for cell in range(81))
+_CHUNK_SIZE = 64        # number of puzzles sent at once to a worker process
+
+
+def _has_conflicts(board):
+    """ check if any digit is set more than once in a row, column or box of the board """
+    for house in CELLS_IN_ROW + CELLS_IN_COL + CELLS_IN_BOX:
+        digits = [board[cell] for cell in house if len(board[cell]) == 1 and board[cell] != "."]
+        if len(digits) != len(set(digits)):
+            return True
+    return False
+
+
+def _search(unsolved, used, limit):
+    """ count solutions (up to 'limit') branching on the unsolved cell with the fewest allowed digits
+    or on the only cell of a house the digit can go to (a hidden single) """
+    if not unsolved:
+        return 1
+    once, twice = [0] * 27, [0] * 27
+    masks = []
+    best_idx, best_mask, best_count = 0, 0, 10
+    for idx, (allowed, row, col, box) in enumerate(unsolved):
+        mask = allowed & ~(used[row] | used[col] | used[box])
+        if not mask:
+            return 0
+        masks.append(mask)
+        for house in (row, col, box):
+            twice[house] |= once[house] & mask
+            once[house] |= mask
+        count = POPCOUNT[mask]
+        if count < best_count:
+            best_idx, best_mask, best_count = idx, mask, count
+
+    if best_count > 1:
+        for house in range(27):
+            if once[house] | used[house] != ALL_DIGITS_MASK:
+                return 0
+            hidden = once[house] & ~twice[house]
+            if hidden:
+                best_mask = hidden & -hidden
+                best_idx = next(idx for idx, entry in enumerate(unsolved)
+                                if house in entry[1:] and masks[idx] & best_mask)
+                break
+
+    unsolved[best_idx], unsolved[-1] = unsolved[-1], unsolved[best_idx]
+    entry = unsolved.pop()
+    _, row, col, box = entry
+    solutions = 0
+    for bit in MASK_BITS[best_mask]:
+        used[row] |= bit
+        used[col] |= bit
+        used[box] |= bit
+        solutions += _search(unsolved, used, limit - solutions)
+        used[row] ^= bit
+        used[col] ^= bit
+        used[box] ^= bit
+        if solutions >= limit:
+            break
+    unsolved.append(entry)
+    unsolved[best_idx], unsolved[-1] = unsolved[-1], unsolved[best_idx]
+    return solutions
+
+
+def count_solutions(board, limit=2):
+    """ Count solutions of the sudoku board (list of 81 strings: digits, candidates or '.')
+    Cells with one digit are taken as set, cells with '.' may have any digit,
+    other cells - any digit of their candidates.
+    The search stops after 'limit' solutions are found, so with the default limit
+    the returned count (0, 1 or 2) tells if the puzzle has no, unique or multiple solutions
+    """
+    if _has_conflicts(board):
+        return 0
+    used = [0] * 27
+    unsolved = []
+    for cell in range(81):
+        candidates = board[cell]
+        if len(candidates) == 1 and candidates != ".":
+            bit = DIGIT_BIT[candidates]
+            for house in _CELL_USED[cell]:
+                used[house] |= bit
+        else:
+            unsolved.append((ALL_DIGITS_MASK if candidates == "." else digits_to_mask(candidates),) + _CELL_USED[cell])
+    return _search(unsolved, used, limit)
+
+
+def get_puzzle_status(board):
+    """ return validation status of the puzzle (see IMPORTANT DATA STRUCTURES) """
+    if _has_conflicts(board):
+        return "invalid"
+    return ("unsolvable", "unique", "multiple")[count_solutions(board)]
+
+
+def _validate(puzzle):
+    return "".join(puzzle), get_puzzle_status(puzzle)
+
+
+def validate_puzzles(fname, pathname, jobs=1):
+    """ validate puzzles of the file (see utils.read_puzzles() for the format) in 'jobs' processes
+    and write CSV file of their status: id, puzzle, status
+    Returns: {status: number of puzzles, ...}
+    """
+    summary = {"unique": 0, "multiple": 0, "unsolvable": 0, "invalid": 0}
+    pool = multiprocessing.Pool(jobs) if jobs > 1 else None
+    try:
+        if pool:
+            results = pool.imap(_validate, read_puzzles(fname), _CHUNK_SIZE)
+        else:
+            results = map(_validate, read_puzzles(fname))
+        with open(pathname, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(("id", "puzzle", "status"))
+            for sudoku_id, (puzzle, status) in enumerate(results, 1):
+                summary[status] += 1
+                writer.writerow((sudoku_id, puzzle, status))
+    finally:
+        if pool:
+            pool.terminate()
+    return summary
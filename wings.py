@@ -9,7 +9,8 @@ from itertools import combinations
 from utils import CELLS_IN_ROW, CELLS_IN_COL, CELL_BOX, CELL_ROW, CELL_COL, CELLS_IN_BOX
 from utils import ALL_NBRS, SUDOKU_VALUES_LIST
 from utils import get_stats, set_remaining_candidates, eliminate_options
-from utils import get_bi_value_cells, get_house_pairs, get_strong_links, get_pair_house
+from utils import get_house_pairs, get_pair_house
+from geometry import ALL_CELLS_MASK, PEERS_MASK, COMMON_PEERS, mask_cells
 
 
 def _get_chain(board, nodes, z, w=None):
@@ -241,7 +242,7 @@ def xy_wing(solver_status, board, window):
             yz = set(board[pair[1]])
             if len(xy.union(xz).union(yz)) == 3 and not xy.intersection(xz).intersection(yz):
                 z_value = xz.intersection(yz).pop()
-                impacted_cells = set(ALL_NBRS[pair[0]]).intersection(set(ALL_NBRS[pair[1]]))
+                impacted_cells = COMMON_PEERS[pair[0]][pair[1]]
                 to_eliminate = [(z_value, a_cell) for a_cell in impacted_cells if
                                 z_value in board[a_cell] and len(board[a_cell]) > 1]
                 if to_eliminate:
@@ -293,8 +294,7 @@ def xyz_wing(solver_status, board, window):
             yz = set(board[pair[1]])
             if xz != yz and len(xyz.union(xz).union(yz)) == 3:
                 z_value = xyz.intersection(xz).intersection(yz).pop()
-                impacted_cells = set(ALL_NBRS[cell_id]).intersection(set(ALL_NBRS[pair[0]])).intersection(
-                                 set(ALL_NBRS[pair[1]]))
+                impacted_cells = set(ALL_NBRS[cell_id]).intersection(COMMON_PEERS[pair[0]][pair[1]])
                 to_eliminate = [(z_value, a_cell) for a_cell in impacted_cells if
                                 z_value in board[a_cell] and len(board[cell]) > 1]
                 if to_eliminate:
@@ -369,15 +369,11 @@ def wxyz_wing(solver_status, board, window):
         return candidates
 
     def _get_impacted_cells(nodes, z):
-        impacted_cells = None
+        impacted_mask = ALL_CELLS_MASK
         for node in nodes:
             if z in board[node]:
-                impacted_cells = ALL_NBRS[node]
-                break
-        for node in nodes:
-            if z in board[node]:
-                impacted_cells = impacted_cells.intersection(ALL_NBRS[node])
-        impacted_cells = {cell_id for cell_id in impacted_cells if len(board[cell_id]) > 1}
+                impacted_mask &= PEERS_MASK[node]
+        impacted_cells = {cell_id for cell_id in mask_cells(impacted_mask) if len(board[cell_id]) > 1}
         return impacted_cells
 
     """
@@ -590,9 +586,10 @@ def w_wing(solver_status, board, window):
     Rating: 150
     """
 
-    bi_value_cells = get_bi_value_cells(board)
-    strong_links = get_strong_links(board)
     set_remaining_candidates(board, solver_status)
+    links = solver_status.links.sync(board)
+    bi_value_cells = links.bi_values()
+    strong_links = links.strong_links()
     for pair in bi_value_cells:
         if len(bi_value_cells[pair]) > 1:
             va, vb = pair
@@ -623,8 +620,7 @@ def w_wing(solver_status, board, window):
                 continue
             assert w_constraint
             other_value = vb if w_constraint == va else va
-            impacted_cells = set(ALL_NBRS[positions[0]]).intersection(ALL_NBRS[positions[1]])
-            impacted_cells = {cell for cell in impacted_cells if len(board[cell]) > 1}
+            impacted_cells = {cell for cell in COMMON_PEERS[positions[0]][positions[1]] if len(board[cell]) > 1}
             to_eliminate = [(other_value, cell) for cell in impacted_cells if other_value in board[cell]]
             if to_eliminate:
                 kwargs = {}